@@ -1,4 +1,8 @@
-from .action import *
-from .reco import *
+# 只注册懒加载代理，各模块在首次调度时导入（见 registry）
+from . import action
+from . import reco
+
+# 缓存所需的事件钩子（轻量，始终注册）
+from . import hooks
 
 # from .sink import *
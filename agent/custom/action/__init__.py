@@ -1,46 +1,66 @@
-from .general import *
-from .activity import *
-from .bank import *
-from .combat import *
-from .lucidscape import *
-from .wilderness import *
-from .outside_deduction import *
-from .reveries_in_the_rain import *
-from .syndrome_of_silence import *
-from .critter_crash import *
+from ..registry import ACTION, register_lazy, resolve_attr
 
-__all__ = [
-    "Screenshot",
-    "DisableNode",
-    "NodeOverride",
-    "ResetCount",
-    "DuringAct",
-    "DuringAnecdote",
-    "DuringRe_release",
-    "BankPurchaseRecord",
-    "ModifyBankTaskList",
-    "SwitchCombatTimes",
-    "PsychubeDoubleTimes",
-    "LucidscapeStageSelect",
-    "LucidscapeStatusDetect",
-    "TeamSelect",
-    "CombatTargetLevel",
-    "SummonlngSwipe",
-    "SOD_DifficultySelect",
-    "ActivityTargetLevel",
-    "SelectChapter",
-    "SelectCombatStage",
-    "TargetCountInit",
-    "TargetCountDetermine",
-    "TargetCountSelectTimes",
-    "TargetCountEatCandy",
-    "TargetCountProgress",
-    "TargetCountFinish",
-    "TargetCountAbort",
-    "JudgeDepthsOfMythWeekly",
-    "SOSSelectNode",
-    "SOSNodeProcess",
-    "SOSSelectEncounterOption_OCR",
-    "SOSSelectEncounterOption_HSV",
-    "ResetEatCandyFlag",
-]
+# 模块 -> 其中注册的自定义动作名（新增动作时需同步声明，模块在首次调度时才导入）
+MODULES = {
+    "general": ["Screenshot", "DisableNode", "NodeOverride", "ResetCount"],
+    "activity": [
+        "DuringAct",
+        "CombatActivityOverride",
+        "DuringAnecdote",
+        "DuringRe_release",
+        "SSTaskEntryGet",
+        "SailingRecordDiceStrategy",
+        "SailingRecordBoatSelect",
+    ],
+    "bank": ["BankPurchaseRecord", "ModifyBankTaskList"],
+    "combat": [
+        "SwitchCombatTimes",
+        "PsychubeDoubleTimes",
+        "TeamSelect",
+        "CombatTargetLevel",
+        "ActivityTargetLevel",
+        "SelectChapter",
+        "SelectCombatStage",
+        "TargetCountInit",
+        "TargetCountDetermine",
+        "TargetCountSelectTimes",
+        "TargetCountEatCandy",
+        "TargetCountProgress",
+        "TargetCountFinish",
+        "TargetCountAbort",
+        "SSReopenReplay",
+        "EatCandyStart",
+        "ResetEatCandyFlag",
+        "DropRecognition",
+    ],
+    "lucidscape": ["LucidscapeStageSelect", "LucidscapeStatusDetect"],
+    "wilderness": ["SummonlngSwipe", "GoodDreamWellFishing"],
+    "outside_deduction": ["SOD_DifficultySelect"],
+    "reveries_in_the_rain": ["JudgeDepthsOfMythWeekly"],
+    "syndrome_of_silence": [
+        "SOSSelectNode",
+        "SOSNodeProcess",
+        "SOSSelectEncounterOption_OCR",
+        "SOSSelectEncounterOption_HSV",
+        "SOSShoppingList",
+        "SOSBuyItems",
+        "SOSSelectNoise",
+        "SOSSelectInstrument",
+        "SOSSwitchStat",
+    ],
+    "critter_crash": [
+        "CCChessboard",
+        "CCChessboardReset",
+        "CCBuyCard",
+        "CCLevelUp",
+        "CCResetData",
+    ],
+}
+
+__all__ = [name for names in MODULES.values() for name in names]
+
+register_lazy(__name__, ACTION, MODULES)
+
+
+def __getattr__(name):
+    return resolve_attr(__name__, MODULES, name)
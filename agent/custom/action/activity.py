@@ -6,6 +6,8 @@ from maa.custom_action import CustomAction
 from maa.context import Context
 
 from utils import logger
+from utils.data_store import load_data
+from utils.frame_provider import NODE_FRAME_MAX_AGE, get_frame
 from utils import ms_timestamp_diff_to_dhm
 
 from custom.reco.activity import SailingRecordBoatRecord, SailingRecordSelectTarget
@@ -34,8 +36,7 @@ class DuringAct(CustomAction):
         resource = json.loads(argv.custom_action_param)["resource"]
         DuringAct.resource = resource
 
-        with open(f"resource/data/activity/{resource}.json", encoding="utf-8") as f:
-            data = json.load(f)
+        data = load_data(f"activity/{resource}.json")
 
         now = int(time.time() * 1000)
 
@@ -103,10 +104,7 @@ class CombatActivityOverride(CustomAction):
             logger.info("主线版本且未开启复刻模式，跳过当前任务")
             return CustomAction.RunResult(success=True)
 
-        with open(
-            f"resource/data/activity/{DuringAct.resource}.json", encoding="utf-8"
-        ) as f:
-            data = json.load(f)
+        data = load_data(f"activity/{DuringAct.resource}.json")
 
         now = int(time.time() * 1000)
 
@@ -150,8 +148,7 @@ class DuringAnecdote(CustomAction):
 
         resource = json.loads(argv.custom_action_param)["resource"]
 
-        with open(f"resource/data/activity/{resource}.json", encoding="utf-8") as f:
-            data = json.load(f)
+        data = load_data(f"activity/{resource}.json")
 
         now = int(time.time() * 1000)
 
@@ -200,8 +197,7 @@ class DuringRe_release(CustomAction):
 
         resource = json.loads(argv.custom_action_param)["resource"]
 
-        with open(f"resource/data/activity/{resource}.json", encoding="utf-8") as f:
-            data = json.load(f)
+        data = load_data(f"activity/{resource}.json")
 
         now = int(time.time() * 1000)
 
@@ -254,7 +250,7 @@ class SSTaskEntryGet(CustomAction):
         argv: CustomAction.RunArg,
     ) -> CustomAction.RunResult:
 
-        screen_array = context.tasker.controller.post_screencap().wait().get()
+        screen_array = get_frame(context, NODE_FRAME_MAX_AGE)
 
         # 截取图片中 [1170,141,47,53] 区域
         x, y, w, h = 1170, 141, 47, 53
@@ -387,7 +383,7 @@ class SailingRecordBoatSelect(CustomAction):
         for i in range(3):
             flag = False
             while not flag:
-                img = context.tasker.controller.post_screencap().wait().get()
+                img = get_frame(context)
                 reco_detail = context.run_recognition(
                     "SailingRecordBoatPointRecord",
                     img,
@@ -3,20 +3,22 @@ import json
 import time
 import uuid
 import hashlib
-import warnings
-import requests
 import numpy as np
 from PIL import Image
 import os
 
-# 禁用 SSL 警告
-warnings.filterwarnings("ignore", message="Unverified HTTPS request")
-
 from maa.agent.agent_server import AgentServer
 from maa.custom_action import CustomAction
 from maa.context import Context
 
 from utils import logger
+from utils.frame_provider import NODE_FRAME_MAX_AGE, get_frame
+from utils.report_outbox import get_report_outbox
+from utils.color_filter import GrayBand, filter_rois
+from utils.frame import estimate_scroll_offset, frame_difference
+from utils.screen_wait import wait_screen
+from utils.template_bank import get_template_bank
+from utils.template_match import MultiTemplateMatcher
 
 
 @AgentServer.custom_action("SwitchCombatTimes")
@@ -68,7 +70,7 @@ class PsychubeDoubleTimes(CustomAction):
         argv: CustomAction.RunArg,
     ) -> CustomAction.RunResult:
 
-        img = context.tasker.controller.post_screencap().wait().get()
+        img = get_frame(context, NODE_FRAME_MAX_AGE)
         reco_detail = context.run_recognition(
             "PsychubeDouble",
             img,
@@ -133,7 +135,7 @@ class TeamSelect(CustomAction):
 
         team = json.loads(argv.custom_action_param)["team"]
 
-        img = context.tasker.controller.post_screencap().wait().get()
+        img = get_frame(context, NODE_FRAME_MAX_AGE)
 
         reco_off_old = context.run_recognition(
             "TeamlistOff",
@@ -173,7 +175,7 @@ class TeamSelect(CustomAction):
             flag = False
             while not flag:
 
-                img = context.tasker.controller.post_screencap().wait().get()
+                img = get_frame(context)
 
                 reco_open_old = context.run_recognition(
                     "TeamlistOpen",
@@ -191,7 +193,7 @@ class TeamSelect(CustomAction):
                 )
                 if reco_open_old and reco_open_old.hit:
                     context.tasker.controller.post_click(target[0], target[1]).wait()
-                    time.sleep(1)
+                    wait_screen(context, 1, reference=img)
                     flag = True
                 else:
                     reco_off_old = context.run_recognition(
@@ -207,7 +209,7 @@ class TeamSelect(CustomAction):
                     )
                     if reco_off_old and reco_off_old.hit:
                         context.tasker.controller.post_click(965, 650).wait()
-                        time.sleep(1)
+                        wait_screen(context, 1, reference=img)
         else:
             # 新版
             reco_off_new = context.run_recognition(
@@ -228,7 +230,7 @@ class TeamSelect(CustomAction):
             team_names, team_uses = [], {}
             while not flag:
 
-                img = context.tasker.controller.post_screencap().wait().get()
+                img = get_frame(context)
 
                 reco_open_new = context.run_recognition(
                     "TeamlistOpen",
@@ -245,9 +247,9 @@ class TeamSelect(CustomAction):
                     },
                 )
                 if reco_open_new and reco_open_new.hit:
-                    # 识别到在队伍选择界面
-                    time.sleep(2)  # 等待界面稳定
-                    img = context.tasker.controller.post_screencap().wait().get()
+                    # 识别到在队伍选择界面，等待列表展开/滑动稳定（至少约 0.3s 无变化）；
+                    # 打开列表或翻页的输入之后已等待过画面变化，这里不需要 reference
+                    img = wait_screen(context, 2, stable_frames=6).image
                     reco_result = context.run_recognition("TeamListEditRoi", img)
                     if (
                         reco_result is None
@@ -350,7 +352,7 @@ class TeamSelect(CustomAction):
                             context.tasker.controller.post_swipe(
                                 980, 630, 980, 190, 1000
                             ).wait()
-                            time.sleep(1)
+                            wait_screen(context, 1, reference=img)
                             continue
                         elif team <= len(team_names):
                             # 目标队伍在当前页，进行队伍选择
@@ -361,12 +363,7 @@ class TeamSelect(CustomAction):
                                 exit_retry = 0
                                 while exit_retry < 5:
                                     context.run_task("BackButton")
-                                    time.sleep(1)
-                                    img = (
-                                        context.tasker.controller.post_screencap()
-                                        .wait()
-                                        .get()
-                                    )
+                                    img = wait_screen(context, 1, reference=img).image
                                     reco_open_new = context.run_recognition(
                                         "TeamlistOpen",
                                         img,
@@ -399,12 +396,7 @@ class TeamSelect(CustomAction):
                                     context.tasker.controller.post_click(
                                         x + w // 2, y + h // 2
                                     ).wait()
-                                    time.sleep(1)
-                                    img = (
-                                        context.tasker.controller.post_screencap()
-                                        .wait()
-                                        .get()
-                                    )
+                                    img = wait_screen(context, 1, reference=img).image
                                     reco_detail = context.run_recognition(
                                         "ReadyForAction", img
                                     )
@@ -429,7 +421,7 @@ class TeamSelect(CustomAction):
                     if reco_off_new and reco_off_new.hit:
                         # 识别到不在队伍选择界面，点击打开
                         context.tasker.controller.post_click(965, 650).wait()
-                        time.sleep(1)
+                        wait_screen(context, 1, reference=img)
         return CustomAction.RunResult(success=True)
 
 
@@ -457,7 +449,7 @@ class CombatTargetLevel(CustomAction):
             logger.error("目标难度不存在")
             return CustomAction.RunResult(success=False)
 
-        img = context.tasker.controller.post_screencap().wait().get()
+        img = get_frame(context, NODE_FRAME_MAX_AGE)
         reco_detail = context.run_recognition("TargetLevelRec", img)
 
         best = (
@@ -525,7 +517,7 @@ class ActivityTargetLevel(CustomAction):
             logger.error("目标难度不存在")
             return CustomAction.RunResult(success=False)
 
-        img = context.tasker.controller.post_screencap().wait().get()
+        img = get_frame(context, NODE_FRAME_MAX_AGE)
         reco_detail = context.run_recognition("ActivityTargetLevelRec", img)
 
         best = (
@@ -541,6 +533,8 @@ class ActivityTargetLevel(CustomAction):
             return CustomAction.RunResult(success=False)
 
         cur_level = reco_text
+        # 难度文字区域（ActivityTargetLevelRec 的 roi）
+        level_roi = [1036, 231, 57, 26]
 
         retry = 0
 
@@ -550,24 +544,14 @@ class ActivityTargetLevel(CustomAction):
                 logger.error("切换难度失败，超过最大重试次数，请检查选择难度是否正确")
                 return CustomAction.RunResult(success=False)
             if cur_level == "故事":
-                context.tasker.controller.post_click(click[1][0], click[1][1]).wait()
-                time.sleep(0.5)
+                x, y = click[1]
             elif cur_level == "艰难":
-                context.tasker.controller.post_click(click[0][0], click[0][1]).wait()
-                time.sleep(0.5)
+                x, y = click[0]
             else:
-                if level == "故事":
-                    context.tasker.controller.post_click(
-                        click[0][0], click[0][1]
-                    ).wait()
-                    time.sleep(0.5)
-                else:
-                    context.tasker.controller.post_click(
-                        click[1][0], click[1][1]
-                    ).wait()
-                    time.sleep(0.5)
+                x, y = click[0] if level == "故事" else click[1]
+            context.tasker.controller.post_click(x, y).wait()
 
-            img = context.tasker.controller.post_screencap().wait().get()
+            img = wait_screen(context, 0.5, level_roi, reference=img).image
             reco_detail = context.run_recognition("ActivityTargetLevelRec", img)
 
             if reco_detail and reco_detail.hit:
@@ -604,7 +588,7 @@ class SelectChapter(CustomAction):
                     }
                 },
             )
-            img = context.tasker.controller.post_screencap().wait().get()
+            img = get_frame(context)
             count += 1
             # 判断是否还能匹配上大章节（位置不同/角度不同）
             rec = context.run_recognition(
@@ -756,8 +740,11 @@ def _tc_get_text_safe(context: Context, img, rec_name: str) -> str:
     return getattr(rec.best_result, "text", "0") or "0"
 
 
-def _tc_get_available_count(context: Context) -> int:
-    img = context.tasker.controller.post_screencap().wait().get()
+def _tc_get_available_count(
+    context: Context, max_age: float = NODE_FRAME_MAX_AGE
+) -> int:
+    # 刚执行过 run_task（可能以点击结束）时应传入 0，重新截图
+    img = get_frame(context, max_age)
     remaining_ap = _tc_safe_int(_tc_get_text_safe(context, img, "RecognizeRemainingAp"))
     stage_ap = _tc_safe_int(_tc_get_text_safe(context, img, "RecognizeStageAp"))
     combat_times = _tc_safe_int(_tc_get_text_safe(context, img, "RecognizeCombatTimes"))
@@ -986,7 +973,7 @@ class SSReopenReplay(CustomAction):
         context.run_task("SSToReplayIfCan")
 
         # 看看要不要吃不吃糖
-        available_count = _tc_get_available_count(context)
+        available_count = _tc_get_available_count(context, max_age=0)
         if available_count == -1:
             logger.debug("识别战斗次数失败")
             available_count = 1
@@ -995,7 +982,7 @@ class SSReopenReplay(CustomAction):
             for _ in range(2):  # 最多吃两次糖，防止吃mini糖体力不够
                 context.run_task("EatCandy")
 
-                available_count = _tc_get_available_count(context)
+                available_count = _tc_get_available_count(context, max_age=0)
                 if available_count == -1:
                     logger.debug("识别战斗次数失败")
                     available_count = 1
@@ -1092,6 +1079,14 @@ class DropRecognitionState:
     # 辅助物品ID -> 名称映射（这些物品不在items.json中）
     HELPER_ITEM_NAMES: dict = {203: "利齿子儿", 205: "微尘", 1002: "启寤Ⅰ"}
 
+    # DropRegionRec 默认参数（读取节点定义失败时使用）
+    DROP_REGION_ROI = [661, 549, 598, 68]
+    DROP_REGION_THRESHOLD = 0.15
+    # 滑动前后掉落区域的平均差值低于该值时视为未滚动（已到末尾）
+    SCROLL_STILL_DIFF = 2.0
+    _matcher: MultiTemplateMatcher | None = None  # 物品模板批量匹配器
+    _rarity_colors: dict | None = None  # 稀有度颜色参数
+
     # 稀有度 -> 颜色匹配节点名映射
     RARITY_TO_COLOR_NODE = {
         "gold": "DropRarityGold",
@@ -1126,8 +1121,10 @@ class DropRecognitionState:
             cls.drop_index = {}
 
         try:
-            with open("resource/data/combat/items.json", encoding="utf-8") as f:
-                cls.items_data = json.load(f)
+            cls.items_data = get_template_bank().items
+            if cls.items_data is None:
+                with open("resource/data/combat/items.json", encoding="utf-8") as f:
+                    cls.items_data = json.load(f)
             # 构建 id -> name 和 id -> rarity 映射
             cls.id_to_name = {}
             cls.id_to_rarity = {}
@@ -1246,34 +1243,189 @@ class DropRecognitionState:
         return str(item_id)
 
     @classmethod
-    def verify_rarity_color(cls, context, img, box, item_id: int) -> bool:
-        """验证物品边框颜色是否与稀有度匹配
+    def get_matcher(cls) -> MultiTemplateMatcher:
+        """从模板库创建物品模板匹配器（每个进程只创建一次）"""
+        if cls._matcher is None:
+            cls._matcher = MultiTemplateMatcher(get_template_bank().templates)
+        return cls._matcher
+
+    @classmethod
+    def get_region_param(cls, context) -> tuple:
+        """读取 DropRegionRec 的 roi 和 threshold"""
+        roi, threshold = cls.DROP_REGION_ROI, cls.DROP_REGION_THRESHOLD
+        node = context.get_node_data("DropRegionRec")
+        if isinstance(node, dict):
+            param = node.get("recognition", {}).get("param", {})
+            if len(param.get("roi") or []) == 4:
+                roi = param["roi"]
+            node_threshold = param.get("threshold")
+            if isinstance(node_threshold, list) and node_threshold:
+                threshold = node_threshold[0]
+            elif isinstance(node_threshold, (int, float)):
+                threshold = node_threshold
+        return roi, threshold
+
+    @classmethod
+    def get_scan_roi(cls, roi: list, offset: int) -> list:
+        """滚动 offset 像素后需要重新匹配的区域
+
+        只包含新露出的列，并向左扩展一个模板宽度，覆盖上一帧中被右边缘截断的物品。
+        """
+        x, y, w, h = roi
+        new_x = max(0, w - offset - cls.get_matcher().max_width)
+        return [x + new_x, y, w - new_x, h]
+
+    @classmethod
+    def match_items(cls, context, img, item_ids, roi: list | None = None) -> list:
+        """在掉落区域中一次性匹配所有候选物品
+
+        没有本地模板的物品回退到逐个调用 DropRegionRec。
 
         Args:
             context: MaaFramework Context
             img: numpy 图像数组
-            box: 物品的识别框 Rect(x, y, w, h)
-            item_id: 物品 ID
+            item_ids: 候选物品 ID 列表
+            roi: 匹配区域，默认为 DropRegionRec 的 roi
 
         Returns:
-            bool: 颜色是否匹配
+            [(item_id, box, score), ...]，score 越高越相似
         """
-        rarity = cls.id_to_rarity.get(item_id)
-        if not rarity or rarity not in cls.RARITY_TO_COLOR_NODE:
-            return True  # 未知稀有度，跳过验证
+        matcher = cls.get_matcher()
+        region_roi, threshold = cls.get_region_param(context)
+        roi = roi or region_roi
 
-        color_node = cls.RARITY_TO_COLOR_NODE[rarity]
+        matches = matcher.match(img, roi, item_ids, threshold)
 
-        # 使用 run_recognition 进行颜色匹配
-        # ROI 在物品正下方边框区域
-        color_roi = [box[0] - 5, box[1] + 76, box[2] + 14, box[3] - 39]
-        rec = context.run_recognition(
-            color_node,
-            img,
-            {color_node: {"roi": color_roi}},
+        for item_id in item_ids:
+            if item_id in matcher:
+                continue
+            rec = context.run_recognition(
+                "DropRegionRec",
+                img,
+                {
+                    "DropRegionRec": {
+                        "roi": roi,
+                        "template": [f"Items_processed/Item-{item_id}.png"],
+                    }
+                },
+            )
+            if rec is not None and rec.hit and getattr(rec, "box", None):
+                # DropRegionRec 使用 TM_SQDIFF_NORMED（method 1），分数越低越相似，
+                # 换算为与 matcher 相同的 1 - sqdiff
+                sqdiff = threshold
+                if rec.best_result:
+                    sqdiff = getattr(rec.best_result, "score", threshold)
+                matches.append((item_id, rec.box, 1.0 - sqdiff))
+
+        return matches
+
+    @classmethod
+    def get_rarity_colors(cls, context) -> dict:
+        """读取各稀有度的颜色匹配参数 {rarity: {"lower", "upper", "count"}}（RGB）
+
+        优先读取 DropRarity* 节点定义，失败时使用模板库中打包的参数。
+        """
+        if cls._rarity_colors is not None:
+            return cls._rarity_colors
+
+        bank_colors = get_template_bank().rarity_colors
+        colors = {}
+        for rarity, node_name in cls.RARITY_TO_COLOR_NODE.items():
+            node = context.get_node_data(node_name)
+            param = node.get("recognition", {}).get("param", {}) if node else {}
+            if not (param.get("lower") and param.get("upper")):
+                param = bank_colors.get(rarity)
+            if not param:
+                logger.warning(f"未找到稀有度颜色参数: {node_name}")
+                continue
+            # lower/upper 统一为多组范围 [[r, g, b], ...]
+            colors[rarity] = {
+                "lower": np.reshape(param["lower"], (-1, 3)).tolist(),
+                "upper": np.reshape(param["upper"], (-1, 3)).tolist(),
+                "count": param.get("count", 1),
+            }
+
+        cls._rarity_colors = colors
+        return colors
+
+    @staticmethod
+    def rarity_color_mask(img: np.ndarray, boxes: list, ranges: list) -> np.ndarray:
+        """一次性验证多个物品边框颜色
+
+        每个物品的边框区域为 [x - 5, y + 76, w + 14, h - 39]（物品正下方），
+        统计区域内 RGB 落在任一 [lower, upper] 范围内的像素数，不少于 count 即为匹配。
+
+        Args:
+            img: BGR 截图
+            boxes: 物品的识别框 [Rect(x, y, w, h), ...]
+            ranges: 与 boxes 对应的颜色参数 {"lower": [[r, g, b], ...], "upper", "count"}，
+                None 表示跳过验证
+
+        Returns:
+            np.ndarray: 布尔数组，颜色是否匹配
+        """
+        if not boxes:
+            return np.zeros(0, dtype=bool)
+
+        rois = np.array(
+            [[b[0] - 5, b[1] + 76, b[2] + 14, b[3] - 39] for b in boxes], dtype=np.int64
+        )
+        x, y, w, h = rois.T
+        height, width = img.shape[:2]
+
+        # 按最大 ROI 尺寸取出所有边框区域，超出 ROI 或图像的部分不计入
+        rows = y[:, None] + np.arange(max(h.max(), 1))[None, :]
+        cols = x[:, None] + np.arange(max(w.max(), 1))[None, :]
+        valid = ((rows >= 0) & (rows < height) & (rows < (y + h)[:, None]))[
+            :, :, None
+        ] & ((cols >= 0) & (cols < width) & (cols < (x + w)[:, None]))[:, None, :]
+        strips = img[
+            np.clip(rows, 0, height - 1)[:, :, None],
+            np.clip(cols, 0, width - 1)[:, None, :],
+            2::-1,
+        ]
+
+        # 颜色范围补齐为 (N, K, 3)，补齐的范围不匹配任何像素
+        known = np.array([r is not None for r in ranges])
+        k = max((len(r["lower"]) for r in ranges if r), default=1)
+        lower = np.full((len(ranges), k, 3), 256)
+        upper = np.full((len(ranges), k, 3), -1)
+        count = np.zeros(len(ranges))
+        for i, r in enumerate(ranges):
+            if r:
+                lower[i, : len(r["lower"])] = r["lower"]
+                upper[i, : len(r["upper"])] = r["upper"]
+                count[i] = r["count"]
+
+        pixels_rgb = strips[:, None]  # (N, 1, H, W, 3)
+        in_range = np.any(
+            np.all(
+                (pixels_rgb >= lower[:, :, None, None, :])
+                & (pixels_rgb <= upper[:, :, None, None, :]),
+                axis=4,
+            ),
+            axis=1,
         )
+        pixels = np.count_nonzero(in_range & valid, axis=(1, 2))
+        return ~known | (pixels >= count)
 
-        return rec is not None and rec.hit
+    @classmethod
+    def verify_rarity_colors(cls, context, img, matches: list) -> np.ndarray:
+        """验证所有匹配结果的边框颜色是否与稀有度一致
+
+        Args:
+            context: MaaFramework Context
+            img: numpy 图像数组
+            matches: [(item_id, box, score), ...]
+
+        Returns:
+            np.ndarray: 布尔数组，未知稀有度视为匹配
+        """
+        colors = cls.get_rarity_colors(context)
+        ranges = [
+            colors.get(cls.id_to_rarity.get(item_id)) for item_id, _, _ in matches
+        ]
+        return cls.rarity_color_mask(img, [box for _, box, _ in matches], ranges)
 
     @staticmethod
     def boxes_overlap(box1, box2, threshold: float = 0.5) -> bool:
@@ -1336,32 +1488,93 @@ class DropRecognitionState:
         return result
 
     @staticmethod
-    def filter_digit_colors(img: np.ndarray) -> np.ndarray:
-        """过滤图像，只保留数字颜色（灰白色调）
+    def get_count_roi(box) -> list:
+        """数量在物品右下角"""
+        return [box[0] + 12, box[1] + 58, box[2] - 24, box[3] - 38]
 
-        目标颜色: #D1CBCB, #CBC7C7, #938F8F, #ABA7A7 及相近颜色
-        这些都是 R≈G≈B 的灰色，范围大约在 130-220
+    @staticmethod
+    def parse_count(text) -> int:
+        """解析数量文本，清理非数字字符（如 ￥5 -> 5）"""
+        if not text:
+            raise ValueError("OCR 结果为空")
+        digits = re.sub(r"\D", "", text)
+        if not digits:
+            raise ValueError(f"OCR 结果无数字: {text}")
+        return int(digits)
+
+    @classmethod
+    def read_counts(cls, context, filtered_img, boxes: list) -> dict:
+        """对所有物品的数量区域所在的横带进行一次 OCR，按水平位置分配给各物品
+
+        OCR 结果的中心落在某个物品数量区域内时归属该物品；
+        区域内没有结果、有多个结果或结果跨越多个区域的物品不返回，由调用方单独识别。
+
+        Args:
+            context: MaaFramework Context
+            filtered_img: filter_digit_colors 处理后的图像
+            boxes: 物品的识别框 [Rect(x, y, w, h), ...]
+
+        Returns:
+            dict: {tuple(box): count}
         """
-        # 计算每个像素 R, G, B 的最大差值
-        max_channel = np.max(img, axis=2)
-        min_channel = np.min(img, axis=2)
-        channel_diff = max_channel - min_channel
+        if len(boxes) < 2:
+            return {}
+
+        rois = [cls.get_count_roi(box) for box in boxes]
+        left = min(r[0] for r in rois)
+        top = min(r[1] for r in rois)
+        right = max(r[0] + r[2] for r in rois)
+        bottom = max(r[1] + r[3] for r in rois)
+        rec = context.run_recognition(
+            "DropCountRec",
+            filtered_img,
+            {"DropCountRec": {"roi": [left, top, right - left, bottom - top]}},
+        )
+        if rec is None or not rec.hit:
+            return {}
+
+        # 数量区域 -> 落在其中的 OCR 结果
+        assigned = [[] for _ in rois]
+        for result in rec.filtered_results or []:
+            rx, ry, rw, rh = result.box
+            center_x, center_y = rx + rw / 2, ry + rh / 2
+            owners = [
+                i
+                for i, (x, y, w, h) in enumerate(rois)
+                if x <= center_x < x + w and y <= center_y < y + h
+            ]
+            spanned = [
+                i for i, (x, _, w, _) in enumerate(rois) if rx < x + w and x < rx + rw
+            ]
+            if len(owners) == 1 and len(spanned) == 1:
+                assigned[owners[0]].append(result)
 
-        # 灰色条件: R, G, B 差值小（接近灰色）
-        gray_mask = channel_diff < 50
+        counts = {}
+        for box, results in zip(boxes, assigned):
+            if len(results) != 1:
+                continue
+            try:
+                counts[tuple(box)] = cls.parse_count(results[0].text)
+            except ValueError:
+                continue
 
-        # 亮度条件: 在目标范围内 (100-240)
-        brightness = np.mean(img, axis=2)
-        brightness_mask = (brightness >= 100) & (brightness <= 240)
+        logger.debug(f"批量数量识别: {len(counts)}/{len(boxes)} 个物品")
+        return counts
 
-        # 组合条件
-        mask = gray_mask & brightness_mask
+    # 数字颜色: #D1CBCB, #CBC7C7, #938F8F, #ABA7A7 及相近颜色
+    # 这些都是 R≈G≈B 的灰色，亮度范围 100-240
+    DIGIT_COLOR_RULE = GrayBand(max_diff=50, min_brightness=100, max_brightness=240)
 
-        # 创建过滤后的图像（匹配的变黑，不匹配的变白）
-        result = np.ones_like(img) * 255  # 默认白色
-        result[mask] = 0  # 匹配的像素变黑
+    @classmethod
+    def filter_digit_colors(
+        cls, img: np.ndarray, rois: list | None = None
+    ) -> np.ndarray:
+        """过滤图像，只保留数字颜色（灰白色调）
 
-        return result
+        匹配的像素变黑，不匹配的变白；只处理 rois 内的像素（None 为整帧），
+        返回的图像为复用的缓冲区。
+        """
+        return filter_rois(img, rois, cls.DIGIT_COLOR_RULE)
 
     @classmethod
     def print_total_summary(cls):
@@ -1441,28 +1654,21 @@ class DropRecognitionState:
             "item": items,
         }
 
-        try:
-            response = requests.post(
-                cls.API_URL,
-                data=json.dumps(payload, ensure_ascii=False, separators=(",", ":")),
-                headers={
-                    "Content-Type": "application/json; charset=utf-8",
-                    "User-Agent": f"M9A/{cls.get_version()}",
-                },
-                timeout=15,
-                verify=False,  # 禁用 SSL 证书验证
+        # 写入发件箱，由后台线程发送（失败时自动重试）
+        queued = get_report_outbox().enqueue(
+            cls.API_URL,
+            payload,
+            headers={
+                "Content-Type": "application/json; charset=utf-8",
+                "User-Agent": f"M9A/{cls.get_version()}",
+            },
+            verify=False,  # 禁用 SSL 证书验证
+        )
+        if queued:
+            logger.debug(
+                f"掉落数据已加入上报队列: {cls.get_level_id()}, {total} 个物品"
             )
-            if response.status_code in (200, 201):
-                logger.debug(f"掉落上报成功: {cls.get_level_id()}, {total} 个物品")
-                return True
-            else:
-                logger.error(
-                    f"掉落上报失败: HTTP {response.status_code}, {response.text}"
-                )
-                return False
-        except requests.RequestException as e:
-            logger.error(f"掉落上报请求异常: {e}")
-            return False
+        return queued
 
 
 @AgentServer.custom_action("DropRecognition")
@@ -1497,59 +1703,84 @@ class DropRecognition(CustomAction):
         # 识别掉落物品
         recognized_ids = set()  # 已识别的物品ID，避免重复
         recognized_reportable = False  # 是否识别到待上报物品
-        max_swipe = 5  # 最大滑动次数
+        max_swipe = 5  # 最大滑动次数（兜底，滚动到底时提前结束）
         rare_drop_counts = {"gold": 0, "purple": 0}  # 高价值物品计数
         screenshot_saved = False  # 是否已保存截图
+        region_roi, _ = DropRecognitionState.get_region_param(context)
+        rx, ry, rw, rh = region_roi
+        prev_strip = None  # 上一帧的掉落区域
 
         for swipe_count in range(max_swipe + 1):
             # 1. 截图
-            img = context.tasker.controller.post_screencap().wait().get()
+            img = get_frame(context)
+            strip = img[ry : ry + rh, rx : rx + rw]
 
-            # 2. 对每个候选物品进行模板匹配
+            # 估计实际滚动距离，只匹配新露出的区域
+            scan_roi = region_roi
+            if prev_strip is not None:
+                if (
+                    frame_difference(prev_strip, strip)
+                    < DropRecognitionState.SCROLL_STILL_DIFF
+                ):
+                    logger.debug("掉落列表未滚动，已到达末尾")
+                    break
+                offset = estimate_scroll_offset(prev_strip, strip, rw // 2)
+                if offset:
+                    scan_roi = DropRecognitionState.get_scan_roi(region_roi, offset)
+                    logger.debug(f"掉落列表滚动 {offset}px，匹配区域 {scan_roi}")
+                else:
+                    # 物品按固定间距排列，滚动整数格时距离无法确定，匹配整个区域
+                    logger.debug("掉落列表滚动距离无法确定，匹配整个掉落区域")
+            prev_strip = strip
+
+            # 2. 对所有未识别的候选物品一次性进行模板匹配
+            candidates = [i for i in possible_items if i not in recognized_ids]
+            template_matches = DropRecognitionState.match_items(
+                context, img, candidates, scan_roi
+            )
+            # 一次性验证所有匹配结果的稀有度颜色
+            color_ok = DropRecognitionState.verify_rarity_colors(
+                context, img, template_matches
+            )
             raw_matches = []  # [(item_id, box, score), ...]
-            for item_id in possible_items:
-                if item_id in recognized_ids:
-                    continue  # 跳过已识别的物品
-
-                rec = context.run_recognition(
-                    "DropRegionRec",
-                    img,
-                    {
-                        "DropRegionRec": {
-                            "template": [f"Items_processed/Item-{item_id}.png"]
-                        }
-                    },
-                )
-                if rec is not None and rec.hit and getattr(rec, "box", None):
-                    box = rec.box
-                    # 获取匹配分数
-                    score = 1.0
-                    if rec.best_result:
-                        score = getattr(rec.best_result, "score", 1.0)
-
-                    # 验证稀有度颜色
-                    if not DropRecognitionState.verify_rarity_color(
-                        context, img, box, item_id
-                    ):
-                        item_name = DropRecognitionState.get_item_name(item_id)
-                        rarity = DropRecognitionState.id_to_rarity.get(item_id, "?")
-                        logger.debug(
-                            f"颜色验证失败: {item_name} ({item_id}, {rarity}) at {box}"
-                        )
-                        continue
-
+            for (item_id, box, score), ok in zip(template_matches, color_ok):
+                if not ok:
                     item_name = DropRecognitionState.get_item_name(item_id)
+                    rarity = DropRecognitionState.id_to_rarity.get(item_id, "?")
                     logger.debug(
-                        f"模板匹配: {item_name} ({item_id}) at {box}, score={score:.3f}"
+                        f"颜色验证失败: {item_name} ({item_id}, {rarity}) at {box}"
                     )
-                    raw_matches.append((item_id, box, score))
+                    continue
+
+                item_name = DropRecognitionState.get_item_name(item_id)
+                logger.debug(
+                    f"模板匹配: {item_name} ({item_id}) at {box}, score={score:.3f}"
+                )
+                raw_matches.append((item_id, box, score))
 
             # 3. 过滤重叠匹配，保留分数最高的
             matched_items = DropRecognitionState.filter_overlapping_matches(raw_matches)
 
             # 4. 识别数量
             # 过滤图像颜色，只保留数字颜色（灰白色调）
-            filtered_img = DropRecognitionState.filter_digit_colors(img)
+            filtered_img = DropRecognitionState.filter_digit_colors(
+                img,
+                [
+                    DropRecognitionState.get_count_roi(box)
+                    for _, box, _ in matched_items
+                ],
+            )
+
+            # 对所有非辅助物品的数量区域进行一次 OCR
+            batch_counts = DropRecognitionState.read_counts(
+                context,
+                filtered_img,
+                [
+                    box
+                    for item_id, box, _ in matched_items
+                    if item_id not in helper_items
+                ],
+            )
 
             for item_id, box, _ in matched_items:
                 # 判断是否为辅助识别物品
@@ -1563,34 +1794,30 @@ class DropRecognition(CustomAction):
                     recognized_ids.add(item_id)
                     continue
 
-                # 数量在物品右下角，调整 ROI
-                count_roi = [box[0] + 12, box[1] + 58, box[2] - 24, box[3] - 38]
-                rec = context.run_recognition(
-                    "DropCountRec",
-                    filtered_img,
-                    {"DropCountRec": {"roi": count_roi}},
-                )
+                count = batch_counts.get(tuple(box))
+                if count is None:
+                    # 批量 OCR 未能确定数量时单独识别
+                    count_roi = DropRecognitionState.get_count_roi(box)
+                    rec = context.run_recognition(
+                        "DropCountRec",
+                        filtered_img,
+                        {"DropCountRec": {"roi": count_roi}},
+                    )
 
-                if (
-                    rec is None
-                    or not rec.hit
-                    or getattr(rec, "best_result", None) is None
-                ):
-                    logger.warning(f"掉落识别中止: {item_name} 数量识别失败")
-                    return CustomAction.RunResult(success=True)
-
-                try:
-                    text = getattr(rec.best_result, "text", None)
-                    if not text:
-                        raise ValueError("OCR 结果为空")
-                    # 清理非数字字符（如 ￥5 -> 5）
-                    digits = re.sub(r"\D", "", text)
-                    if not digits:
-                        raise ValueError(f"OCR 结果无数字: {text}")
-                    count = int(digits)
-                except (ValueError, AttributeError) as e:
-                    logger.warning(f"掉落识别中止: {item_name} 数量解析失败 ({e})")
-                    return CustomAction.RunResult(success=True)
+                    if (
+                        rec is None
+                        or not rec.hit
+                        or getattr(rec, "best_result", None) is None
+                    ):
+                        logger.warning(f"掉落识别中止: {item_name} 数量识别失败")
+                        return CustomAction.RunResult(success=True)
+
+                    try:
+                        text = getattr(rec.best_result, "text", None)
+                        count = DropRecognitionState.parse_count(text)
+                    except (ValueError, AttributeError) as e:
+                        logger.warning(f"掉落识别中止: {item_name} 数量解析失败 ({e})")
+                        return CustomAction.RunResult(success=True)
 
                 logger.debug(f"掉落: {item_name} x{count}")
                 recognized_reportable = True
@@ -1,4 +1,3 @@
-import time
 import json
 import numpy as np
 
@@ -7,6 +6,7 @@ from maa.custom_action import CustomAction
 from maa.context import Context
 
 from utils import logger
+from utils.screen_wait import wait_screen
 
 
 @AgentServer.custom_action("CCChessboard")
@@ -381,9 +381,8 @@ class CCLevelUp(CustomAction):
         max_retries = 5
         times = 0
         while times < max_retries:
-            reco_detail = context.run_recognition(
-                "CCLevelRec", context.tasker.controller.cached_image
-            )
+            image = context.tasker.controller.cached_image
+            reco_detail = context.run_recognition("CCLevelRec", image)
             if reco_detail and reco_detail.hit:
                 # 识别到文字，判断等级
                 current_level = int(reco_detail.best_result.text)
@@ -392,7 +391,9 @@ class CCLevelUp(CustomAction):
                         f"检测到升级，从 {self.level} 升级到 {current_level}，等待中..."
                     )
                     self.level = current_level
-                    time.sleep(5)  # 等待升级动画
+                    # 等待升级动画结束：升级由之前的输入触发，这里拿不到输入前的截图，
+                    # 只等待画面稳定，窗口需跨过动画中的停顿（至少约 1s 无变化）
+                    wait_screen(context, 5, stable_frames=20)
                     break
                 elif current_level == self.level:
                     logger.debug(f"当前等级仍为 {self.level}，无需等待")
@@ -1,5 +1,4 @@
 import re
-import time
 import json
 
 from maa.agent.agent_server import AgentServer
@@ -7,6 +6,9 @@ from maa.custom_action import CustomAction
 from maa.context import Context
 
 from utils import logger
+from utils.frame_provider import NODE_FRAME_MAX_AGE, get_frame
+from utils import recognition_memo
+from utils.screen_wait import wait_screen
 
 
 @AgentServer.custom_action("LucidscapeStageSelect")
@@ -21,7 +23,7 @@ class LucidscapeStageSelect(CustomAction):
         argv: CustomAction.RunArg,
     ) -> CustomAction.RunResult:
 
-        img = context.tasker.controller.post_screencap().wait().get()
+        img = get_frame(context, NODE_FRAME_MAX_AGE)
 
         # Stage1-Stage4
         roi_list = [
@@ -68,7 +70,7 @@ class LucidscapeStageSelect(CustomAction):
         context.override_pipeline(
             {"LucidscapeStatusDetect": {"custom_action_param": {"stage": stage}}}
         )
-        time.sleep(3)
+        wait_screen(context, 3, reference=img)
 
         return CustomAction.RunResult(success=True)
 
@@ -92,11 +94,11 @@ class LucidscapeStatusDetect(CustomAction):
 
         stage = json.loads(argv.custom_action_param)["stage"]
 
-        time.sleep(3)
-        img = context.tasker.controller.post_screencap().wait().get()
+        # 进入片段的点击由上一个节点执行，这里只等待界面稳定（至少约 0.5s 无变化）
+        img = wait_screen(context, 3, stable_frames=10).image
 
         # Finish
-        reco_detail = context.run_recognition("LucidscapeFinish", img)
+        reco_detail = recognition_memo.run_recognition(context, "LucidscapeFinish", img)
         if reco_detail and reco_detail.hit:
             logger.info(f"醒梦片段·{self._int2RomanNumeral(stage)}已完成")
             logger.info("领取本层酬劳")
@@ -116,7 +118,9 @@ class LucidscapeStatusDetect(CustomAction):
         )
 
         # StageFlag02
-        reco_detail = context.run_recognition("LucidscapeStageFlag02", img)
+        reco_detail = recognition_memo.run_recognition(
+            context, "LucidscapeStageFlag02", img
+        )
         if reco_detail and reco_detail.hit:
             context.tasker.controller.post_click(990, 300).wait()
             context.override_next(
@@ -126,7 +130,9 @@ class LucidscapeStatusDetect(CustomAction):
             return CustomAction.RunResult(success=True)
 
         # StageFlag01
-        reco_detail = context.run_recognition("LucidscapeStageFlag01", img)
+        reco_detail = recognition_memo.run_recognition(
+            context, "LucidscapeStageFlag01", img
+        )
         if reco_detail and reco_detail.hit:
             context.tasker.controller.post_click(320, 445).wait()
             context.override_next(
@@ -1,4 +1,3 @@
-import time
 import json
 
 from maa.agent.agent_server import AgentServer
@@ -6,6 +5,11 @@ from maa.custom_action import CustomAction
 from maa.context import Context
 
 from utils import logger
+from utils.frame_provider import NODE_FRAME_MAX_AGE, get_frame
+from utils.screen_wait import wait_screen
+
+# 难度数字所在区域（SOD_CurrentLevel 的 roi）
+LEVEL_ROI = [587, 123, 106, 92]
 
 
 @AgentServer.custom_action("SOD_DifficultySelect")
@@ -27,7 +31,7 @@ class SOD_DifficultySelect(CustomAction):
 
         level = json.loads(argv.custom_action_param)["level"]
 
-        img = context.tasker.controller.post_screencap().wait().get()
+        img = get_frame(context, NODE_FRAME_MAX_AGE)
         reco_detail = context.run_recognition("SOD_CurrentLevel", img)
         if reco_detail is None or not reco_detail.hit:
             return CustomAction.RunResult(success=False)
@@ -45,12 +49,12 @@ class SOD_DifficultySelect(CustomAction):
                 delta = cur - level
                 for i in range(delta):
                     context.tasker.controller.post_click(20, 360).wait()
-                    time.sleep(0.5)
+                    img = wait_screen(context, 0.5, LEVEL_ROI, reference=img).image
             else:
                 delta = level - cur
                 for i in range(delta):
                     context.tasker.controller.post_click(1260, 360).wait()
-                    time.sleep(0.5)
+                    img = wait_screen(context, 0.5, LEVEL_ROI, reference=img).image
         else:
             # max
             # level 20
@@ -62,23 +66,21 @@ class SOD_DifficultySelect(CustomAction):
                 return CustomAction.RunResult(success=True)
 
             # To Locked Level
-            img = context.tasker.controller.post_screencap().wait().get()
+            img = get_frame(context)
             reco_detail = context.run_recognition("SOD_LevelLocked", img)
 
             while reco_detail is None or not reco_detail.hit:
                 context.tasker.controller.post_click(1260, 360).wait()
-                time.sleep(0.5)
-                img = context.tasker.controller.post_screencap().wait().get()
+                img = wait_screen(context, 0.5, LEVEL_ROI, reference=img).image
                 reco_detail = context.run_recognition("SOD_LevelLocked", img)
 
             # To UnLocked Level
             while reco_detail is not None and reco_detail.hit:
                 context.tasker.controller.post_click(20, 360).wait()
-                time.sleep(0.5)
-                img = context.tasker.controller.post_screencap().wait().get()
+                img = wait_screen(context, 0.5, LEVEL_ROI, reference=img).image
                 reco_detail = context.run_recognition("SOD_LevelLocked", img)
 
-        img = context.tasker.controller.post_screencap().wait().get()
+        img = get_frame(context)
         reco_detail = context.run_recognition("SOD_CurrentLevel", img)
         if reco_detail is None or not reco_detail.hit:
             return CustomAction.RunResult(success=False)
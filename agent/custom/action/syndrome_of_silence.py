@@ -4,7 +4,7 @@ import json
 import copy
 import os
 import ast
-from typing import cast
+from typing import NamedTuple, cast
 from PIL import Image
 import numpy as np
 
@@ -14,6 +14,108 @@ from maa.context import Context
 from maa.define import NeuralNetworkDetectResult, OCRResult
 
 from utils import logger
+from utils.frame_provider import NODE_FRAME_MAX_AGE, get_frame
+from utils import recognition_memo
+from utils.color_filter import ChannelRange, filter_node_roi
+from utils.data_store import get_data_store, load_data
+from utils.fuzzy_index import FuzzyIndex
+from utils.interrupt_dispatcher import get_interrupt_dispatcher
+from utils.screen_wait import wait_screen
+
+# 允许 RGB 每个通道在 0-95 范围内都认为是黑色，其他颜色都变成白色
+DARK_TEXT_RULE = ChannelRange(lower=(0, 0, 0), upper=(95, 95, 95), fill=255)
+
+# resource/data 下的数据文件
+SOS_NODES_FILE = "sos/nodes.json"
+SOS_ITEMS_FILE = "sos/items.json"
+
+
+def _expand_interrupts(interrupts: str, common: dict) -> list:
+    """
+    展开 interrupts 配置，支持 @ 引用和 + 组合
+    @common_name: 引用 common_interrupts 中的配置
+    @name1+@name2: 组合多个引用
+    """
+    result = []
+
+    # 支持 + 分割多个引用
+    parts = interrupts.split("+")
+    for part in parts:
+        part = part.strip()
+        if part.startswith("@"):
+            ref_name = part[1:]  # 去掉 @
+            if ref_name in common:
+                ref_value = common[ref_name]
+                # 如果引用的值是字符串，递归解析
+                if isinstance(ref_value, str):
+                    result.extend(_expand_interrupts(ref_value, common))
+                elif isinstance(ref_value, list):
+                    result.extend(ref_value)
+        else:
+            if part:  # 避免添加空字符串
+                result.append(part)
+
+    return result
+
+
+def _build_interrupt_index(nodes: dict) -> dict[str, tuple]:
+    """预先展开 nodes.json 中出现的所有 interrupts 字符串配置"""
+    common = nodes.get("common_interrupts", {})
+    specs = {f"@{name}" for name in common}
+    for node_info in nodes.values():
+        if not isinstance(node_info, dict):
+            continue
+        specs.add(node_info.get("interrupts"))
+        for event in (node_info.get("events") or {}).values():
+            if isinstance(event, dict):
+                specs.add(event.get("interrupts"))
+    return {
+        spec: tuple(_expand_interrupts(spec, common))
+        for spec in specs
+        if isinstance(spec, str)
+    }
+
+
+def _build_valid_names(items_data: dict) -> frozenset[str]:
+    """所有有效物品名的集合（造物+谐波）"""
+    valid_names = set()
+    for type_items in items_data["artefacts"].values():
+        valid_names.update(type_items)
+    valid_names.update(items_data["harmonics"])
+    return frozenset(valid_names)
+
+
+def _build_item_index(items_data: dict) -> FuzzyIndex:
+    """有效物品名的模糊匹配索引，用于 OCR 纠错"""
+    return FuzzyIndex(_build_valid_names(items_data))
+
+
+class ShopItem(NamedTuple):
+    """商店列表中的物品（SOSShoppingList 扫描得到）"""
+
+    name: str  # 纠错后的物品名
+    price: int
+    affordable: bool  # 价格为黑色（金雀子儿足够）
+    sold_out: bool
+    page: int  # 从列表顶部向下滑动几次后可见
+    result: dict  # 物品名的识别结果，购买时点击其 box
+
+
+def _swipe_shop_list(context: Context, down: bool, post_delay: int = 500):
+    """商店列表滑动一页，down 为 False 时向上"""
+    top, bottom = [368, 120, 30, 27], [380, 459, 24, 21]
+    context.run_task(
+        "Swipe",
+        {
+            "Swipe": {
+                "action": "Swipe",
+                "begin": bottom if down else top,
+                "end": top if down else bottom,
+                "duration": 500,
+                "post_delay": post_delay,
+            }
+        },
+    )
 
 
 __all__ = [
@@ -45,8 +147,7 @@ class SOSSelectNode(CustomAction):
 
         reco_detail = argv.reco_detail.raw_detail["best"]["detail"]
 
-        with open("resource/data/sos/nodes.json", encoding="utf-8") as f:
-            nodes = json.load(f)
+        nodes = load_data(SOS_NODES_FILE)
 
         # 检查识别结果中在期望列表中的结果，保存截图用于调试
         expected_indices = [1, 2, 3, 4, 5, 6, 8, 9, 10, 11, 12]
@@ -141,8 +242,8 @@ class SOSSelectNode(CustomAction):
                     }
                 },
             )
-            img = context.tasker.controller.post_screencap().wait().get()
-            rec = context.run_recognition("SOSGOTO", img)
+            img = get_frame(context)
+            rec = recognition_memo.run_recognition(context, "SOSGOTO", img)
             if rec and rec.hit:
                 context.run_task("SOSGOTO")
                 break
@@ -155,9 +256,12 @@ class SOSSelectNode(CustomAction):
             retry_times = 0
 
             while retry_times < 3:
-                img = context.tasker.controller.post_screencap().wait().get()
-                reco_detail = context.run_recognition(
-                    "SOSEventRec", img, {"SOSEventRec": {"roi": event_name_roi}}
+                img = get_frame(context)
+                reco_detail = recognition_memo.run_recognition(
+                    context,
+                    "SOSEventRec",
+                    img,
+                    {"SOSEventRec": {"roi": event_name_roi}},
                 )
 
                 if reco_detail and reco_detail.hit:
@@ -182,24 +286,15 @@ class SOSSelectNode(CustomAction):
                         "SOSSelectResonator",
                         "CloseTip",
                     ]
-                    popup_handled = False
-
-                    for interrupt in interrupts:
-                        rec = context.run_recognition(interrupt, img)
-                        if rec and rec.hit:
-                            logger.debug(f"检测到弹窗，执行节点: {interrupt}")
-                            context.run_task(interrupt)
-                            retry_times = 0
-                            popup_handled = True
-                            break
-
-                    if not popup_handled:
-                        # 没有检测到已知弹窗，等待一下再重试
-                        time.sleep(1)
+                    if get_interrupt_dispatcher().dispatch(context, interrupts, img):
+                        retry_times = 0
+                    else:
+                        # 没有检测到已知弹窗，等待事件名出现再重试
+                        wait_screen(context, 1, event_name_roi, reference=img)
                         retry_times += 1
             else:
                 # 事件名识别失败，检查是否是购物契机被误识别为其他节点
-                img = context.tasker.controller.post_screencap().wait().get()
+                img = get_frame(context)
                 shopping_rec = context.run_recognition("SOSShopping", img)
                 if shopping_rec and shopping_rec.hit:
                     logger.warning(
@@ -226,6 +321,8 @@ class SOSNodeProcess(CustomAction):
 
     # 跟踪 SOSTeamSelect 的运行次数
     _sos_team_select_count = 0
+    # 本节点最近一次执行输入（run_task）之前的截图，供后续动作等待画面变化
+    _input_reference: np.ndarray | None = None
 
     def run(
         self,
@@ -233,8 +330,7 @@ class SOSNodeProcess(CustomAction):
         argv: CustomAction.RunArg,
     ) -> CustomAction.RunResult:
 
-        with open("resource/data/sos/nodes.json", encoding="utf-8") as f:
-            nodes = json.load(f)
+        nodes = load_data(SOS_NODES_FILE)
 
         node_type, event_name = (
             SOSSelectNode.node_type,
@@ -275,6 +371,7 @@ class SOSNodeProcess(CustomAction):
         if context.tasker.stopping:
             logger.debug("任务即将停止，跳过节点处理")
             return CustomAction.RunResult(success=True)
+        SOSNodeProcess._input_reference = None
         for action in actions:
             if context.tasker.stopping:
                 logger.debug("任务即将停止，跳过节点处理")
@@ -285,9 +382,7 @@ class SOSNodeProcess(CustomAction):
 
     def _resolve_interrupts(self, interrupts: str | list, nodes: dict) -> list:
         """
-        解析 interrupts 配置，支持 @ 引用和 + 组合
-        @common_name: 引用 common_interrupts 中的配置
-        @name1+@name2: 组合多个引用
+        解析 interrupts 配置（展开结果随 nodes.json 缓存，见 _build_interrupt_index）
         """
         if isinstance(interrupts, list):
             return interrupts
@@ -295,27 +390,12 @@ class SOSNodeProcess(CustomAction):
         if not isinstance(interrupts, str):
             return []
 
-        result = []
-        common = nodes.get("common_interrupts", {})
-
-        # 支持 + 分割多个引用
-        parts = interrupts.split("+")
-        for part in parts:
-            part = part.strip()
-            if part.startswith("@"):
-                ref_name = part[1:]  # 去掉 @
-                if ref_name in common:
-                    ref_value = common[ref_name]
-                    # 如果引用的值是字符串，递归解析
-                    if isinstance(ref_value, str):
-                        result.extend(self._resolve_interrupts(ref_value, nodes))
-                    elif isinstance(ref_value, list):
-                        result.extend(ref_value)
-            else:
-                if part:  # 避免添加空字符串
-                    result.append(part)
-
-        return result
+        index = get_data_store().derived(
+            SOS_NODES_FILE, "interrupts", _build_interrupt_index
+        )
+        if interrupts in index:
+            return list(index[interrupts])
+        return _expand_interrupts(interrupts, nodes.get("common_interrupts", {}))
 
     def exec_main(self, context: Context, action: dict | list, interrupts: list):
         retry_times = 0
@@ -327,17 +407,17 @@ class SOSNodeProcess(CustomAction):
             if self.exec_action(context.clone(), action):
                 return True
 
-            # 尝试所有 interrupts
-            for interrupt in interrupts:
-                if context.tasker.stopping:
-                    logger.debug("任务即将停止，跳过节点处理")
-                    return False
-                img = context.tasker.controller.post_screencap().wait().get()
-                if self.exec_action(context.clone(), interrupt, img):
-                    retry_times = 0
-                    break
-
-            time.sleep(1)
+            if context.tasker.stopping:
+                logger.debug("任务即将停止，跳过节点处理")
+                return False
+            # 在同一帧上检测所有 interrupts
+            img = get_frame(context, NODE_FRAME_MAX_AGE)
+            if get_interrupt_dispatcher().dispatch(context.clone(), interrupts, img):
+                SOSNodeProcess._input_reference = img
+                retry_times = 0
+
+            # 等待画面变化后再重试
+            wait_screen(context, 1, reference=img)
             retry_times += 1
         return False
 
@@ -350,7 +430,7 @@ class SOSNodeProcess(CustomAction):
             check_img = (
                 img if img is not None else context.tasker.controller.cached_image
             )
-            rec = context.run_recognition(action, check_img)
+            rec = recognition_memo.run_recognition(context, action, check_img)
             if rec and rec.hit:
                 logger.debug(f"执行中断节点: {action}")
                 context.run_task(action)
@@ -379,8 +459,8 @@ class SOSNodeProcess(CustomAction):
                     logger.debug(f"跳过执行节点: {name}")
                     return True
 
-                img = context.tasker.controller.post_screencap().wait().get()
-                reco_detail = context.run_recognition(name, img)
+                img = get_frame(context, NODE_FRAME_MAX_AGE)
+                reco_detail = recognition_memo.run_recognition(context, name, img)
                 if (
                     reco_detail
                     and reco_detail.hit
@@ -388,6 +468,7 @@ class SOSNodeProcess(CustomAction):
                     and reco_detail.algorithm == "DirectHit"
                 ):
                     logger.debug(f"执行节点: {name}")
+                    SOSNodeProcess._input_reference = img
                     context.run_task(entry=name)
                     # 如果是 SOSTeamSelect，增加运行计数
                     if name == "SOSTeamSelect":
@@ -413,7 +494,7 @@ class SOSNodeProcess(CustomAction):
                     )
 
                     # 先识别一下是否有选项界面
-                    img = context.tasker.controller.post_screencap().wait().get()
+                    img = get_frame(context, NODE_FRAME_MAX_AGE)
                     check_reco = context.run_recognition("SOSSelectOption", img)
                     if not check_reco or not check_reco.hit:
                         return False
@@ -453,6 +534,7 @@ class SOSNodeProcess(CustomAction):
                     if context.tasker.stopping:
                         logger.debug("任务即将停止，跳过节点处理")
                         return False
+                    SOSNodeProcess._input_reference = img
                     context.run_task("SOSSelectOption", pipeline_override=pp_override)
                 elif method == "HSV":
                     order_by = action.get("order_by", "Vertical")
@@ -462,7 +544,7 @@ class SOSNodeProcess(CustomAction):
                     if context.tasker.stopping:
                         logger.debug("任务即将停止，跳过节点处理")
                         return False
-                    img = context.tasker.controller.post_screencap().wait().get()
+                    img = get_frame(context, NODE_FRAME_MAX_AGE)
                     check_reco = context.run_recognition("SOSSelectOption", img)
                     if not check_reco or not check_reco.hit:
                         return False
@@ -491,6 +573,7 @@ class SOSNodeProcess(CustomAction):
                     if context.tasker.stopping:
                         logger.debug("任务即将停止，跳过节点处理")
                         return False
+                    SOSNodeProcess._input_reference = img
                     context.run_task("SOSSelectOption", pipeline_override=pp_override)
                 else:
                     logger.error(f"未知的选项选择方法: {method}")
@@ -502,9 +585,8 @@ class SOSNodeProcess(CustomAction):
                     expected: str = action.get("expected", "")
                     order_by = action.get("order_by", "Vertical")
 
-                    # 先识别一下是否有途中偶遇选项界面
-                    time.sleep(1)
-                    img = context.tasker.controller.post_screencap().wait().get()
+                    # 等待界面变化并稳定后识别一下是否有途中偶遇选项界面
+                    img = self._wait_after_input(context, 1)
                     check_reco = context.run_recognition(
                         "SOSSelectEncounterOptionRec_Template", img
                     )
@@ -518,6 +600,7 @@ class SOSNodeProcess(CustomAction):
                     if context.tasker.stopping:
                         logger.debug("任务即将停止，跳过节点处理")
                         return False
+                    SOSNodeProcess._input_reference = img
                     context.run_task(
                         "SOSSelectEncounterOption_OCR",
                         pipeline_override={
@@ -533,12 +616,11 @@ class SOSNodeProcess(CustomAction):
                     order_by = action.get("order_by", "Vertical")
                     index = action.get("index", 0)
 
-                    # 先识别一下是否有途中偶遇选项界面
+                    # 等待界面变化并稳定后识别一下是否有途中偶遇选项界面
                     if context.tasker.stopping:
                         logger.debug("任务即将停止，跳过节点处理")
                         return False
-                    time.sleep(1)
-                    img = context.tasker.controller.post_screencap().wait().get()
+                    img = self._wait_after_input(context, 1)
                     check_reco = context.run_recognition(
                         "SOSSelectEncounterOptionRec_Template", img
                     )
@@ -552,6 +634,7 @@ class SOSNodeProcess(CustomAction):
                     if context.tasker.stopping:
                         logger.debug("任务即将停止，跳过节点处理")
                         return False
+                    SOSNodeProcess._input_reference = img
                     context.run_task(
                         "SOSSelectEncounterOption_HSV",
                         pipeline_override={
@@ -574,6 +657,20 @@ class SOSNodeProcess(CustomAction):
                 return True
         return False
 
+    def _wait_after_input(self, context: Context, timeout: float) -> np.ndarray:
+        """
+        等待本节点上一次输入引起的画面变化并稳定，返回最后一帧
+
+        节点的第一个动作之前没有本节点执行的输入（进入节点的点击由 pipeline 执行并已等待），
+        此时只等待画面稳定。选项按钮淡入需要约 0.3s 的稳定窗口。
+        """
+        reference = SOSNodeProcess._input_reference
+        if reference is not None:
+            return wait_screen(
+                context, timeout, reference=reference, stable_frames=6
+            ).image
+        return wait_screen(context, timeout, stable_frames=6).image
+
 
 @AgentServer.custom_action("SOSSelectEncounterOption_OCR")
 class SOSSelectEncounterOption_OCR(CustomAction):
@@ -641,9 +738,14 @@ class SOSSelectEncounterOption_HSV(CustomAction):
 class SOSShoppingList(CustomAction):
     """
     局外演绎：无声综合征-购物列表处理
+    逐页扫描商店列表，每页只截图一次，记录物品名、价格、是否买得起、是否售出及所在页，
+    供 SOSBuyItems 直接使用
     """
 
     shopping_items: dict[str, int] = {}  # 存储识别到的物品 {name: price}
+    shop_items: dict[str, ShopItem] = {}  # 扫描到的所有物品 {name: ShopItem}
+    first_page_results: list = []  # 列表顶部一页的识别结果，用于确认已回到顶部
+    swipe_count: int = 0  # 扫描时向下滑动的次数
 
     def run(
         self,
@@ -652,31 +754,27 @@ class SOSShoppingList(CustomAction):
     ) -> CustomAction.RunResult:
 
         SOSShoppingList.shopping_items = {}
+        SOSShoppingList.shop_items = {}
+        SOSShoppingList.first_page_results = []
+        SOSShoppingList.swipe_count = 0
 
-        # 加载物品数据用于纠错
-        with open("resource/data/sos/items.json", encoding="utf-8") as f:
-            items_data = json.load(f)
-
-        # 构建所有有效物品名的集合（造物+谐波）
-        valid_names = set()
-        for type_items in items_data["artefacts"].values():
-            valid_names.update(type_items)
-        valid_names.update(items_data["harmonics"])
+        # 所有有效物品名（造物+谐波）的模糊匹配索引，用于纠错
+        item_index = get_data_store().derived(
+            SOS_ITEMS_FILE, "item_index", _build_item_index
+        )
 
-        all_items = {}  # 存储所有识别到的物品 {name: price}
-        skipped_items = set()  # 存储所有跳过的物品名（已售出）
+        shop_items: dict[str, ShopItem] = {}
+        first_page_results = []
         last_results = []
         retry_times = 0
+        page = 0  # 从列表顶部向下滑动的次数
+        swipe_count = 0
 
         while retry_times < 5:
-            # 截图
-            img = context.tasker.controller.post_screencap().wait().get()
-            # 只保留接近黑色的像素，其他颜色都变成白色
-            # 允许 RGB 每个通道在 0-95 范围内都认为是黑色
-            mask = np.all(img <= 95, axis=-1)
-            processed_img = np.where(mask[..., None], img, 255).astype(np.uint8)
-
-            reco_detail = context.run_recognition("SOSShoppingListOCR", processed_img)
+            # 截图（原图与过滤后的图像都来自这一帧）
+            img = get_frame(context)
+
+            reco_detail = context.run_recognition("SOSShoppingListOCR", img)
             if not reco_detail or not reco_detail.hit:
                 retry_times += 1
                 continue
@@ -684,79 +782,95 @@ class SOSShoppingList(CustomAction):
             # 获取识别结果列表（已按垂直顺序排列）
             raw_detail = reco_detail.raw_detail
             current_results = raw_detail.get("filtered", []) if raw_detail else []
+            if page == 0:
+                first_page_results = current_results
 
-            # 配对物品名和价格（传入原始图像和context用于检测已售出标记）
-            items, skipped = self._pair_items_and_prices(current_results, img, context)
-
-            # 记录所有跳过的物品
-            skipped_items.update(skipped)
+            # 只保留接近黑色的像素再识别一次，红色价格（金雀子儿不足）会被过滤掉
+            affordable_names = set()
+            processed_img = filter_node_roi(
+                context, img, "SOSShoppingListOCR", DARK_TEXT_RULE
+            )
+            affordable_reco = context.run_recognition(
+                "SOSShoppingListOCR", processed_img
+            )
+            if affordable_reco and affordable_reco.hit:
+                affordable_raw = affordable_reco.raw_detail
+                affordable_results = (
+                    affordable_raw.get("filtered", []) if affordable_raw else []
+                )
+                for text in self._pair_items_and_prices(affordable_results):
+                    affordable_names.add(item_index.correct(text) or text)
+
+            # 配对物品名和价格，纠错后合并到总结果中
+            for text, (price, result) in self._pair_items_and_prices(
+                current_results
+            ).items():
+                corrected_name = self._correct_item_name(text, item_index)
+                sold_out = self._is_sold_out(context, img, result)
+                if sold_out:
+                    logger.debug(f"已售出物品: {text}")
+
+                item = shop_items.get(corrected_name)
+                if item is None:
+                    shop_items[corrected_name] = ShopItem(
+                        corrected_name,
+                        price,
+                        corrected_name in affordable_names,
+                        sold_out,
+                        page,
+                        result,
+                    )
+                    continue
 
-            # 纠错并合并到总结果中
-            for name, price in items.items():
-                corrected_name = self._correct_item_name(name, valid_names)
-                if corrected_name:
-                    # 检查纠正后的名称是否在跳过列表中
-                    if corrected_name in skipped_items:
-                        logger.debug(
-                            f"跳过已售出物品（纠错后匹配）: {name} -> {corrected_name}"
-                        )
-                        continue
-
-                    # 如果纠正后的物品名已经在结果中，说明之前已经识别过
-                    # 只保留价格更合理的那个（更小的价格，避免拼接价格）
-                    if corrected_name in all_items:
-                        # 保留价格更小的
-                        if price < all_items[corrected_name]:
-                            all_items[corrected_name] = price
-                            logger.debug(
-                                f"更新物品价格: {corrected_name} {all_items[corrected_name]} -> {price}"
-                            )
-                    else:
-                        all_items[corrected_name] = price
+                # 物品在相邻两页都出现过，保留第一次出现的位置
+                # 价格只保留更合理的那个（更小的价格，避免拼接价格）
+                if price < item.price:
+                    logger.debug(
+                        f"更新物品价格: {corrected_name} {item.price} -> {price}"
+                    )
+                shop_items[corrected_name] = item._replace(
+                    price=min(price, item.price),
+                    affordable=item.affordable or corrected_name in affordable_names,
+                    sold_out=item.sold_out or sold_out,
+                )
 
             # 向下滑动
-            context.run_task(
-                "Swipe",
-                {
-                    "Swipe": {
-                        "action": "Swipe",
-                        "begin": [380, 459, 24, 21],
-                        "end": [368, 120, 30, 27],
-                        "duration": 500,
-                        "post_delay": 800,
-                    }
-                },
-            )
+            _swipe_shop_list(context, down=True, post_delay=800)
+            swipe_count += 1
 
             # 判断是否划到底（本次识别结果和上次相同）
             if self._is_same_results(current_results, last_results):
                 break
 
             last_results = current_results
+            page += 1
 
             retry_times += 1
 
-        logger.info(f"共识别到 {len(all_items)} 个可购买物品")
-        for name, price in all_items.items():
-            logger.info(f"{name}: {price}")
-
         # 存储到类静态变量
-        SOSShoppingList.shopping_items = all_items
+        SOSShoppingList.shop_items = shop_items
+        SOSShoppingList.first_page_results = first_page_results
+        SOSShoppingList.swipe_count = swipe_count
+        SOSShoppingList.shopping_items = {
+            item.name: item.price
+            for item in shop_items.values()
+            if item.affordable and not item.sold_out
+        }
+
+        logger.info(f"共识别到 {len(SOSShoppingList.shopping_items)} 个可购买物品")
+        for name, price in SOSShoppingList.shopping_items.items():
+            logger.info(f"{name}: {price}")
 
         return CustomAction.RunResult(success=True)
 
-    def _pair_items_and_prices(
-        self, results: list, img: np.ndarray, context: Context
-    ) -> tuple[dict[str, int], set[str]]:
+    def _pair_items_and_prices(self, results: list) -> dict[str, tuple[int, dict]]:
         """
         配对物品名和价格
         结果已按垂直顺序排列，价格在物品名下方约35-45像素处
-        过滤掉已售出的物品（检测左上角"已售出"标记）
 
-        返回: (物品字典, 跳过的物品名集合)
+        返回: {物品名: (价格, 物品名的识别结果)}
         """
         items = {}
-        skipped = set()
         i = 0
         while i < len(results):
             current = results[i]
@@ -769,29 +883,6 @@ class SOSShoppingList(CustomAction):
                 i += 1
                 continue
 
-            # 检查左上角是否有"已售出"标记
-            # 使用 pipeline 识别"已售出"
-            sold_out_reco = context.run_recognition(
-                "SOSShoppingItemSoldOut",
-                img,
-                {
-                    "SOSShoppingItemSoldOut": {
-                        "roi": [
-                            current_box[0] - 145,  # x: 物品名左上角往左扩展
-                            current_box[1] - 17,  # y: 物品名左上角往上扩展
-                            62,  # width
-                            24,  # height
-                        ]
-                    }
-                },
-            )
-
-            if sold_out_reco and sold_out_reco.hit:
-                logger.debug(f"跳过已售出物品: {current_text}")
-                skipped.add(current_text)
-                i += 1
-                continue
-
             # 这是物品名，查找其对应的价格
             price = None
             if i + 1 < len(results):
@@ -809,50 +900,37 @@ class SOSShoppingList(CustomAction):
                         price = price_value
 
             if price:
-                items[current_text] = price
+                items[current_text] = (price, current)
 
             i += 1
 
-        return items, skipped
+        return items
+
+    def _is_sold_out(self, context: Context, img: np.ndarray, result: dict) -> bool:
+        """检测物品名左上角是否有"已售出"标记"""
+        box = result.get("box", [0, 0, 0, 0])
+        sold_out_reco = context.run_recognition(
+            "SOSShoppingItemSoldOut",
+            img,
+            {
+                "SOSShoppingItemSoldOut": {
+                    "roi": [
+                        box[0] - 145,  # x: 物品名左上角往左扩展
+                        box[1] - 17,  # y: 物品名左上角往上扩展
+                        62,  # width
+                        24,  # height
+                    ]
+                }
+            },
+        )
+        return bool(sold_out_reco and sold_out_reco.hit)
 
-    def _correct_item_name(self, name: str, valid_names: set) -> str:
+    def _correct_item_name(self, name: str, item_index: FuzzyIndex) -> str:
         """
         纠正识别错误的物品名
-        使用编辑距离找到最相似的有效名称
+        通过模糊匹配索引找到编辑距离最小的有效名称
         """
-        if name in valid_names:
-            return name
-
-        # 计算与所有有效名称的相似度
-        def edit_distance(s1: str, s2: str) -> int:
-            """计算编辑距离"""
-            if len(s1) < len(s2):
-                return edit_distance(s2, s1)
-            if len(s2) == 0:
-                return len(s1)
-
-            previous_row = range(len(s2) + 1)
-            for i, c1 in enumerate(s1):
-                current_row = [i + 1]
-                for j, c2 in enumerate(s2):
-                    insertions = previous_row[j + 1] + 1
-                    deletions = current_row[j] + 1
-                    substitutions = previous_row[j] + (c1 != c2)
-                    current_row.append(min(insertions, deletions, substitutions))
-                previous_row = current_row
-
-            return previous_row[-1]
-
-        # 找最相似的名称
-        min_distance = float("inf")
-        best_match = None
-
-        for valid_name in valid_names:
-            distance = edit_distance(name, valid_name)
-            # 只接受距离小于名称长度一半的匹配
-            if distance < min_distance and distance <= len(name) // 2:
-                min_distance = distance
-                best_match = valid_name
+        best_match = item_index.correct(name)
 
         if best_match:
             if best_match != name:
@@ -862,7 +940,8 @@ class SOSShoppingList(CustomAction):
         logger.warning(f"未找到匹配的物品名: {name}")
         return name  # 返回原名称
 
-    def _is_same_results(self, current: list, last: list) -> bool:
+    @staticmethod
+    def _is_same_results(current: list, last: list) -> bool:
         """
         判断两次识别结果是否相同（通过文本内容比较）
         """
@@ -904,7 +983,7 @@ class SOSBuyItems(CustomAction):
         ]
 
         # 识别右上角当前金雀子儿
-        img = context.tasker.controller.post_screencap().wait().get()
+        img = get_frame(context, NODE_FRAME_MAX_AGE)
         money_roi = [1125, 18, 88, 28]  # 右上角金雀子儿的ROI，需要根据实际调整
 
         reco_detail = context.run_recognition(
@@ -937,212 +1016,63 @@ class SOSBuyItems(CustomAction):
 
         # 加载物品优先级配置（可选）
         try:
-            with open("resource/data/sos/items.json", encoding="utf-8") as f:
-                items_data = json.load(f)
+            items_data = load_data(SOS_ITEMS_FILE)
             # 可以在这里定义优先级逻辑，暂时按价格升序排列（买便宜的，数量更多）
         except:
             pass
 
-        # 第一阶段：遍历所有页面，收集所有可购买物品及其位置信息
-
-        # 先滑动到顶部
-        for _ in range(3):
-            context.run_task(
-                "Swipe",
-                {
-                    "Swipe": {
-                        "action": "Swipe",
-                        "begin": [368, 120, 30, 27],
-                        "end": [380, 459, 24, 21],
-                        "duration": 500,
-                        "post_delay": 500,
-                    }
-                },
-            )
-
-        all_buyable_items = (
-            []
-        )  # 存储所有可购买的物品: [(item_name, item_price, page_index, result), ...]
-        last_screen_texts = set()
-        page_index = 0
-        max_scroll_times = 3
-
-        while page_index < max_scroll_times:
-            # 截图并识别当前屏幕的物品
-            img = context.tasker.controller.post_screencap().wait().get()
-            reco_detail = context.run_recognition("SOSShoppingListOCR", img)
-
-            if not reco_detail or not reco_detail.hit:
-                page_index += 1
-                context.run_task(
-                    "Swipe",
-                    {
-                        "Swipe": {
-                            "action": "Swipe",
-                            "begin": [380, 459, 24, 21],
-                            "end": [368, 120, 30, 27],
-                            "duration": 500,
-                            "post_delay": 500,
-                        }
-                    },
-                )
-                continue
-
-            raw_detail = reco_detail.raw_detail
-            current_results = raw_detail.get("filtered", []) if raw_detail else []
-
-            # 获取当前屏幕的物品文本集合
-            current_screen_texts = {
-                item.get("text", "")
-                for item in current_results
-                if not item.get("text", "").isdigit()
-            }
-
-            # 判断是否到达底部（与上一屏内容80%相同）
-            if last_screen_texts:
-                intersection = current_screen_texts & last_screen_texts
-                if (
-                    current_screen_texts
-                    and len(intersection) / len(current_screen_texts) >= 0.8
-                ):
-                    break
-
-            last_screen_texts = current_screen_texts
-
-            # 使用黑色过滤后的图像再次识别，以检查价格是否可见（红色价格会被过滤）
-            mask = np.all(img <= 95, axis=-1)
-            processed_img = np.where(mask[..., None], img, 255).astype(np.uint8)
-            price_reco_detail = context.run_recognition(
-                "SOSShoppingListOCR", processed_img
-            )
-
-            # 获取可见价格的物品名集合（金雀子儿足够的物品）
-            affordable_items = set()
-            if price_reco_detail and price_reco_detail.hit:
-                price_raw_detail = price_reco_detail.raw_detail
-                price_results = (
-                    price_raw_detail.get("filtered", []) if price_raw_detail else []
-                )
-
-                # 配对物品名和价格，只有能配对成功的说明价格可见
-                i = 0
-                while i < len(price_results):
-                    current = price_results[i]
-                    current_text = current.get("text", "")
-
-                    if current_text.isdigit():
-                        i += 1
-                        continue
-
-                    if i + 1 < len(price_results):
-                        next_item = price_results[i + 1]
-                        next_text = next_item.get("text", "")
-
-                        if next_text.isdigit():
-                            affordable_items.add(current_text)
-
-                    i += 1
-
-            # 收集当前屏幕的可购买物品
-            for result in current_results:
-                text = result.get("text", "")
-                # 检查是否是购物清单中的物品，且价格可见（买得起）
-                for item_name, item_price in shopping_items.items():
-                    if (
-                        (item_name in text or text in item_name)
-                        and item_price <= current_money
-                        and text in affordable_items
-                    ):
-                        all_buyable_items.append(
-                            (item_name, item_price, page_index, result)
-                        )
-                        break
-
-            # 向下滑动到下一页
-            page_index += 1
-            context.run_task(
-                "Swipe",
-                {
-                    "Swipe": {
-                        "action": "Swipe",
-                        "begin": [380, 459, 24, 21],
-                        "end": [368, 120, 30, 27],
-                        "duration": 500,
-                        "post_delay": 500,
-                    }
-                },
-            )
+        # 第一阶段：SOSShoppingList 已扫描过所有页面，直接取可购买物品及其位置信息
+        buyable_items = [
+            item
+            for item in SOSShoppingList.shop_items.values()
+            if item.affordable and not item.sold_out and item.price <= current_money
+        ]
 
         # 第二阶段：按价格排序，使用贪心算法决定购买哪些物品
 
-        # 去重：同一物品可能在多个页面出现，只保留第一次出现的
-        seen_items = {}
-        for item_name, item_price, page_idx, result in all_buyable_items:
-            if item_name not in seen_items:
-                seen_items[item_name] = (item_price, page_idx, result)
-
         # 按价格从低到高排序（贪心策略：买便宜的，数量更多）
-        sorted_buyable = sorted(seen_items.items(), key=lambda x: x[1][0])
+        buyable_items.sort(key=lambda item: item.price)
 
         # 计算购买方案
         purchase_plan = []
         remaining_money = current_money
-        for item_name, (item_price, page_idx, result) in sorted_buyable:
-            if item_price <= remaining_money:
-                purchase_plan.append((item_name, item_price, page_idx, result))
-                remaining_money -= item_price
+        for item in buyable_items:
+            if item.price <= remaining_money:
+                purchase_plan.append(item)
+                remaining_money -= item.price
+
+        if not purchase_plan:
+            logger.info("没有买得起的物品")
+            return CustomAction.RunResult(success=True)
 
         # 第三阶段：按页面顺序执行购买
 
-        # 先回到顶部
-        for _ in range(3):
-            context.run_task(
-                "Swipe",
-                {
-                    "Swipe": {
-                        "action": "Swipe",
-                        "begin": [368, 120, 30, 27],
-                        "end": [380, 459, 24, 21],
-                        "duration": 500,
-                        "post_delay": 500,
-                    }
-                },
-            )
+        # 扫描结束时列表在底部，先回到顶部
+        self._return_to_top(context)
 
         # 按页面索引分组
-        purchase_by_page = {}
-        for item_name, item_price, page_idx, result in purchase_plan:
-            if page_idx not in purchase_by_page:
-                purchase_by_page[page_idx] = []
-            purchase_by_page[page_idx].append((item_name, item_price, result))
+        purchase_by_page: dict[int, list[ShopItem]] = {}
+        for item in purchase_plan:
+            purchase_by_page.setdefault(item.page, []).append(item)
 
         purchased_items = []
         current_page = 0
 
         for page_idx in sorted(purchase_by_page.keys()):
-            # 滑动到目标页面
+            # 直接滑动到记录的页面
             while current_page < page_idx:
-                context.run_task(
-                    "Swipe",
-                    {
-                        "Swipe": {
-                            "action": "Swipe",
-                            "begin": [380, 459, 24, 21],
-                            "end": [368, 120, 30, 27],
-                            "duration": 500,
-                            "post_delay": 500,
-                        }
-                    },
-                )
+                _swipe_shop_list(context, down=True)
                 current_page += 1
 
             # 购买该页面的所有物品
-            for item_name, item_price, result in purchase_by_page[page_idx]:
-                if self._buy_item_on_screen(context, item_name, result, interrupts):
-                    purchased_items.append((item_name, item_price))
-                    logger.info(f"购买成功: {item_name} ({item_price})")
+            for item in purchase_by_page[page_idx]:
+                if self._buy_item_on_screen(
+                    context, item.name, item.result, interrupts
+                ):
+                    purchased_items.append((item.name, item.price))
+                    logger.info(f"购买成功: {item.name} ({item.price})")
                 else:
-                    logger.warning(f"购买失败: {item_name}")
+                    logger.warning(f"购买失败: {item.name}")
 
         total_spent = sum(price for _, price in purchased_items)
         logger.info(f"购买完成，共购买 {len(purchased_items)} 件物品")
@@ -1150,6 +1080,61 @@ class SOSBuyItems(CustomAction):
 
         return CustomAction.RunResult(success=True)
 
+    def _return_to_top(self, context: Context) -> bool:
+        """
+        向上滑动商店列表，直到识别结果与扫描时的第一页一致
+
+        最多滑动扫描时向下滑动的次数 + 1 次；仍未确认时由购买前的物品名校验兜底
+        """
+        first_page = SOSShoppingList.first_page_results
+        for _ in range(SOSShoppingList.swipe_count + 1):
+            before_swipe = get_frame(context, NODE_FRAME_MAX_AGE)
+            _swipe_shop_list(context, down=False, post_delay=0)
+            img = wait_screen(context, 1, reference=before_swipe).image
+
+            reco_detail = context.run_recognition("SOSShoppingListOCR", img)
+            raw_detail = reco_detail.raw_detail if reco_detail else None
+            results = raw_detail.get("filtered", []) if raw_detail else []
+            if SOSShoppingList._is_same_results(results, first_page):
+                return True
+
+        logger.warning("未能确认商店列表已回到顶部")
+        return False
+
+    def _is_item_at(
+        self, context: Context, img: np.ndarray, item_name: str, box: list
+    ) -> bool:
+        """只识别记录的物品名区域，确认该位置上仍是 item_name"""
+        reco_detail = context.run_recognition(
+            "OCR",
+            img,
+            {"OCR": {"recognition": "OCR", "roi": box, "only_rec": True}},
+        )
+        if not reco_detail or not reco_detail.hit:
+            return False
+
+        text = cast(OCRResult, reco_detail.best_result).text
+        item_index = get_data_store().derived(
+            SOS_ITEMS_FILE, "item_index", _build_item_index
+        )
+        return (item_index.correct(text) or text) == item_name
+
+    def _find_item_on_screen(
+        self, context: Context, img: np.ndarray, item_name: str
+    ) -> dict | None:
+        """识别当前画面上的整个商店列表，返回物品名纠错后等于 item_name 的识别结果"""
+        reco_detail = context.run_recognition("SOSShoppingListOCR", img)
+        raw_detail = reco_detail.raw_detail if reco_detail else None
+        results = raw_detail.get("filtered", []) if raw_detail else []
+        item_index = get_data_store().derived(
+            SOS_ITEMS_FILE, "item_index", _build_item_index
+        )
+        for result in results:
+            text = result.get("text", "")
+            if not text.isdigit() and (item_index.correct(text) or text) == item_name:
+                return result
+        return None
+
     def _buy_item_on_screen(
         self, context: Context, item_name: str, result: dict, interrupts: list
     ) -> bool:
@@ -1158,6 +1143,17 @@ class SOSBuyItems(CustomAction):
         interrupts: 购买后可能出现的弹窗节点列表
         """
         box = result.get("box", [0, 0, 0, 0])
+        before_click = get_frame(context, NODE_FRAME_MAX_AGE)
+
+        # 列表位置可能与扫描时不同，点击前确认记录的位置上仍是该物品，
+        # 不是时在当前画面中重新查找
+        if not self._is_item_at(context, before_click, item_name, box):
+            found = self._find_item_on_screen(context, before_click, item_name)
+            if found is None:
+                logger.warning(f"当前画面中没有该物品，跳过购买: {item_name}")
+                return False
+            logger.debug(f"物品位置与扫描时不同: {item_name} {box} -> {found['box']}")
+            box = found["box"]
 
         # 点击物品名称区域
         context.run_task(
@@ -1172,13 +1168,13 @@ class SOSBuyItems(CustomAction):
         )
 
         # 确认左侧已选中该物品
-        time.sleep(0.3)
-        img = context.tasker.controller.post_screencap().wait().get()
+        selected_roi = [box[0] - 150, box[1] - 6, 35, 100]
+        img = wait_screen(context, 0.3, selected_roi, reference=before_click).image
 
         selected_reco = context.run_recognition(
             "SOSShoppingItemSelected",
             img,
-            {"SOSShoppingItemSelected": {"roi": [box[0] - 150, box[1] - 6, 35, 100]}},
+            {"SOSShoppingItemSelected": {"roi": selected_roi}},
         )
 
         if not selected_reco or not selected_reco.hit:
@@ -1186,11 +1182,10 @@ class SOSBuyItems(CustomAction):
             return False
 
         # 点击右下角的购买按钮
-        time.sleep(0.2)
-        img = context.tasker.controller.post_screencap().wait().get()
+        bought_roi = [1114, 647, 76, 35]
+        img = wait_screen(context, 0.2, bought_roi, reference=before_click).image
 
         # 先检查是否已购买
-        bought_roi = [1114, 647, 76, 35]
         bought_reco = context.run_recognition(
             "OCR",
             img,
@@ -1214,12 +1209,9 @@ class SOSBuyItems(CustomAction):
                 context.run_task("SOSBuyButton")
 
                 # 先处理可能出现的弹窗
-                time.sleep(0.5)
-                self._handle_interrupts(context, interrupts)
+                img = self._handle_interrupts(context, interrupts, img)
 
                 # 弹窗处理完后，检查是否购买成功
-                time.sleep(0.3)
-                img = context.tasker.controller.post_screencap().wait().get()
                 confirm_reco = context.run_recognition(
                     "OCR",
                     img,
@@ -1243,30 +1235,26 @@ class SOSBuyItems(CustomAction):
             logger.warning(f"未找到购买按钮")
             return False
 
-    def _handle_interrupts(self, context: Context, interrupts: list) -> None:
+    def _handle_interrupts(
+        self, context: Context, interrupts: list, reference: np.ndarray
+    ) -> np.ndarray:
         """
         处理购买后可能出现的弹窗
         interrupts: 弹窗节点名称列表
+        reference: 点击购买前的截图
+        返回弹窗处理完、画面稳定后的截图
         """
-        if not interrupts:
-            return
-
         max_attempts = 3
         for _ in range(max_attempts):
-            time.sleep(1.5)
-            img = context.tasker.controller.post_screencap().wait().get()
-
-            # 检查每个可能的弹窗
-            for interrupt in interrupts:
-                rec = context.run_recognition(interrupt, img)
-                if rec and rec.hit:
-                    logger.debug(f"检测到弹窗，执行节点: {interrupt}")
-                    context.run_task(interrupt)
-                    # 执行后重新开始检测，可能有连续弹窗
-                    break
-            else:
+            img = wait_screen(context, 1.5, reference=reference).image
+
+            # 执行命中的弹窗后重新开始检测，可能有连续弹窗
+            if not get_interrupt_dispatcher().dispatch(context, interrupts, img):
                 # 没有检测到任何弹窗，退出
-                break
+                return img
+            reference = img
+
+        return wait_screen(context, 0.3, reference=reference).image
 
 
 @AgentServer.custom_action("SOSSelectNoise")
@@ -1290,6 +1278,7 @@ class SOSSelectNoise(CustomAction):
             return CustomAction.RunResult(success=True)
 
         # 判断当前页面
+        noise_type_roi = [343, 427, 84, 46]
         img = context.tasker.controller.cached_image
         reco_detail = context.run_recognition(
             "OCR",
@@ -1297,7 +1286,7 @@ class SOSSelectNoise(CustomAction):
             {
                 "OCR": {
                     "recognition": "OCR",
-                    "roi": [343, 427, 84, 46],
+                    "roi": noise_type_roi,
                     "expected": ".*",
                 }
             },
@@ -1324,15 +1313,14 @@ class SOSSelectNoise(CustomAction):
                     },
                 )
                 # 更新页面状态
-                time.sleep(0.5)
-                img = context.tasker.controller.post_screencap().wait().get()
+                img = wait_screen(context, 0.5, noise_type_roi, reference=img).image
                 reco_detail = context.run_recognition(
                     "OCR",
                     img,
                     {
                         "OCR": {
                             "recognition": "OCR",
-                            "roi": [343, 427, 84, 46],
+                            "roi": noise_type_roi,
                             "expected": ".*",
                         }
                     },
@@ -1354,15 +1342,14 @@ class SOSSelectNoise(CustomAction):
                     },
                 )
                 # 更新页面状态
-                time.sleep(0.5)
-                img = context.tasker.controller.post_screencap().wait().get()
+                img = wait_screen(context, 0.5, noise_type_roi, reference=img).image
                 reco_detail = context.run_recognition(
                     "OCR",
                     img,
                     {
                         "OCR": {
                             "recognition": "OCR",
-                            "roi": [343, 427, 84, 46],
+                            "roi": noise_type_roi,
                             "expected": ".*",
                         }
                     },
@@ -1,10 +1,10 @@
-import time
-
 from maa.agent.agent_server import AgentServer
 from maa.custom_action import CustomAction
 from maa.context import Context
 
 from utils import logger
+from utils.frame_provider import NODE_FRAME_MAX_AGE, get_frame
+from utils.screen_wait import wait_screen
 
 
 @AgentServer.custom_action("SummonlngSwipe")
@@ -19,7 +19,7 @@ class SummonlngSwipe(CustomAction):
         argv: CustomAction.RunArg,
     ) -> CustomAction.RunResult:
 
-        img = context.tasker.controller.post_screencap().wait().get()
+        img = get_frame(context, NODE_FRAME_MAX_AGE)
 
         reco_first = context.run_recognition("SummonlngCardFirst", img)
         reco_last = context.run_recognition("SummonlngCardLast", img)
@@ -54,7 +54,7 @@ class GoodDreamWellFishing(CustomAction):
         argv: CustomAction.RunArg,
     ) -> CustomAction.RunResult:
 
-        img = context.tasker.controller.post_screencap().wait().get()
+        img = get_frame(context, NODE_FRAME_MAX_AGE)
 
         reco_detail = context.run_recognition("GoodDreamWellOCR", img)
 
@@ -104,6 +104,6 @@ class GoodDreamWellFishing(CustomAction):
                 }
             },
         )
-        time.sleep(1)
+        wait_screen(context, 1, reference=img)
         context.run_task("BackButton")
         return CustomAction.RunResult(success=True)
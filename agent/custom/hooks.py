@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+"""
+运行时缓存的事件钩子
+
+custom/sink 为调试用的全量事件日志（默认不启用），这里只注册缓存需要的轻量监听器：
+    - controller：截图/输入动作事件，维护 FrameProvider 的截图新鲜度
+    - tasker：任务结束时输出并清理按任务统计的数据
+"""
+
+from maa.agent.agent_server import AgentServer
+from maa.controller import ControllerEventSink
+from maa.tasker import TaskerEventSink
+
+from utils.frame_provider import get_frame_provider
+from utils.recognition_memo import get_recognition_memo
+from utils.screen_wait import get_screen_waiter
+
+_TASK_FINISHED = ("Tasker.Task.Succeeded", "Tasker.Task.Failed")
+
+
+@AgentServer.controller_sink()
+class FrameFreshnessSink(ControllerEventSink):
+    def on_raw_notification(self, controller, msg: str, details: dict):
+        get_frame_provider().on_controller_notification(msg, details)
+
+
+@AgentServer.tasker_sink()
+class TaskStatsSink(TaskerEventSink):
+    def on_raw_notification(self, tasker, msg: str, details: dict):
+        if msg in _TASK_FINISHED:
+            task_id = details.get("task_id", 0)
+            get_recognition_memo().log_task_stats(task_id)
+            get_screen_waiter().log_task_stats(task_id)
+            get_frame_provider().log_stats()
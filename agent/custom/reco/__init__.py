@@ -1,22 +1,28 @@
-from .general import *
-from .bank import *
-from .activity import *
-from .combat import *
-from .syndrome_of_silence import (
-    SOSSelectEncounterOptionFindSelected,
-    SOSSelectEncounterOptionList,
-    SOSSelectNode,
-)
-from .critter_crash import *
+from ..registry import RECOGNITION, register_lazy, resolve_attr
 
-__all__ = [
-    "MultiRecognition",
-    "Count",
-    "BankShop",
-    "ActivityRe_releaseChapter",
-    "FindFirstUnplayedStageByCheckmark",
-    "StagePromotionComplete",
-    "SOSSelectEncounterOptionFindSelected",
-    "SOSSelectEncounterOptionList",
-    "SOSSelectNode",
-]
+# 模块 -> 其中注册的自定义识别名（新增识别时需同步声明，模块在首次调度时才导入）
+MODULES = {
+    "general": ["MultiRecognition", "Count", "CheckStopping"],
+    "bank": ["BankShop"],
+    "activity": [
+        "ActivityRe_releaseChapter",
+        "FindFirstUnplayedStageByCheckmark",
+        "SailingRecordSelectTarget",
+        "SailingRecordBoatRecord",
+    ],
+    "combat": ["StagePromotionComplete", "CandyPageRecord"],
+    "syndrome_of_silence": [
+        "SOSSelectEncounterOptionFindSelected",
+        "SOSSelectEncounterOptionList",
+        "SOSSelectNode",
+    ],
+    "critter_crash": ["CCBuyCard", "CCRemainMoney"],
+}
+
+__all__ = [name for names in MODULES.values() for name in names]
+
+register_lazy(__name__, RECOGNITION, MODULES)
+
+
+def __getattr__(name):
+    return resolve_attr(__name__, MODULES, name)
@@ -34,7 +34,8 @@ class BankShop(CustomRecognition):
         expected = data.get("expected")
         inverse = data.get("inverse", False)
 
-        img = context.tasker.controller.post_screencap().wait().get()
+        # 直接使用节点识别时的截图，无需重新截图
+        img = argv.image
 
         roi_list = [
             [325, 286, 93, 30],
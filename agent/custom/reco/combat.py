@@ -7,6 +7,7 @@ from maa.context import Context
 from maa.define import RectType
 
 from utils import logger
+from utils import recognition_memo
 
 
 def parse_valid_period_to_hours(text: str) -> float:
@@ -69,16 +70,16 @@ class StagePromotionComplete(CustomRecognition):
 
         cur_flag = False
         # 轶事
-        reco_detail = context.run_recognition(
-            "StagePromotionCurStageComplete", argv.image
+        reco_detail = recognition_memo.run_recognition(
+            context, "StagePromotionCurStageComplete", argv.image
         )
         # 故事模式
-        reco_detail1 = context.run_recognition(
-            "StagePromotionCurStageComplete1", argv.image
+        reco_detail1 = recognition_memo.run_recognition(
+            context, "StagePromotionCurStageComplete1", argv.image
         )
         # 探索模式
-        reco_detail2 = context.run_recognition(
-            "StagePromotionCurStageComplete2", argv.image
+        reco_detail2 = recognition_memo.run_recognition(
+            context, "StagePromotionCurStageComplete2", argv.image
         )
         if reco_detail and reco_detail.hit:
             if reco_detail.best_result:
@@ -91,8 +92,8 @@ class StagePromotionComplete(CustomRecognition):
                 cur_flag = True
 
         if cur_flag:
-            reco_detail = context.run_recognition(
-                "StagePromotionClickNextStage", argv.image
+            reco_detail = recognition_memo.run_recognition(
+                context, "StagePromotionClickNextStage", argv.image
             )
             if reco_detail and reco_detail.hit:
                 if not reco_detail.best_result:
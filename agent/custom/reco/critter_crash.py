@@ -6,9 +6,10 @@ from maa.agent.agent_server import AgentServer
 from maa.custom_recognition import CustomRecognition
 from maa.context import Context
 from maa.define import RectType, OCRResult
-import numpy as np
 
 from utils import logger
+from utils import recognition_memo
+from utils.color_filter import ChannelRange, filter_node_roi
 from custom.action.critter_crash import CCChessboard
 
 
@@ -27,12 +28,15 @@ class CCBuyCardRec(CustomRecognition):
     ) -> Union[CustomRecognition.AnalyzeResult, Optional[RectType]]:
 
         # 检查奖励框是否为空
-        reco_detail = context.run_recognition("CCBuyCardAwardEmptyRec", argv.image)
+        reco_detail = recognition_memo.run_recognition(
+            context, "CCBuyCardAwardEmptyRec", argv.image
+        )
         if reco_detail and reco_detail.hit:
             # 识别到奖励框不为空
             for chess_info in CCChessboard.chess_types:
                 card_name = chess_info["name"]
-                reco_detail1 = context.run_recognition(
+                reco_detail1 = recognition_memo.run_recognition(
+                    context,
                     "CCBuyCardAwardRec_Template",
                     argv.image,
                     {
@@ -61,7 +65,7 @@ class CCBuyCardRec(CustomRecognition):
             # 无法识别奖励框内的卡牌，默认卖掉
             # 分辨卡牌类型
             reco_detail = context.run_recognition(
-                "CCBuyCardAwardTypeRec_Template", context.tasker.controller.cached_image
+                "CCBuyCardAwardTypeRec_Template", argv.image
             )
             if reco_detail and reco_detail.hit:
                 # 识别到模板，判断不是藏品
@@ -78,7 +82,9 @@ class CCBuyCardRec(CustomRecognition):
             return CustomRecognition.AnalyzeResult(box=None, detail={})
         else:
             # 奖励框为空，检查剩余缪斯币是否足够购买
-            reco_detail = context.run_recognition("CCRemainMoney", argv.image)
+            reco_detail = recognition_memo.run_recognition(
+                context, "CCRemainMoney", argv.image
+            )
             if reco_detail and reco_detail.hit:
                 # 钱够了
                 pass
@@ -91,7 +97,8 @@ class CCBuyCardRec(CustomRecognition):
             for chess_info in CCChessboard.chess_types:
                 card_name = chess_info["name"]
                 # 动态识别当前卡牌
-                reco_detail = context.run_recognition(
+                reco_detail = recognition_memo.run_recognition(
+                    context,
                     "CCBuyCardRec_Template",
                     argv.image,
                     {
@@ -128,6 +135,10 @@ class CCBuyCardRec(CustomRecognition):
             return CustomRecognition.AnalyzeResult(box=None, detail={})
 
 
+# 剩余缪斯币数字颜色：目标颜色 [215, 241, 249]，容差 55
+REMAIN_MONEY_RULE = ChannelRange(lower=(160, 186, 194), upper=(255, 255, 255), fill=0)
+
+
 @AgentServer.custom_recognition("CCRemainMoney")
 class CCRemainMoney(CustomRecognition):
     def analyze(
@@ -136,20 +147,10 @@ class CCRemainMoney(CustomRecognition):
         argv: CustomRecognition.AnalyzeArg,
     ) -> Union[CustomRecognition.AnalyzeResult, Optional[RectType]]:
 
-        img = argv.image
-        # 定义目标颜色和颜色容差
-        target_color = np.array([215, 241, 249])
-        tolerance = 55  # 颜色容差，可以根据需要调整
-
-        # 创建颜色过滤掩码
-        lower_bound = np.maximum(target_color - tolerance, 0)
-        upper_bound = np.minimum(target_color + tolerance, 255)
-
-        # 创建掩码：保留在目标颜色范围内的像素
-        color_mask = np.all((img >= lower_bound) & (img <= upper_bound), axis=-1)
-
-        # 处理图像：保留目标颜色，其他颜色变成黑色
-        processed_img = np.where(color_mask[..., None], img, 0).astype(np.uint8)
+        # 处理图像：保留目标颜色，其他颜色变成黑色（只处理 OCR 节点的 ROI）
+        processed_img = filter_node_roi(
+            context, argv.image, "CCRemainMoney_rec", REMAIN_MONEY_RULE
+        )
 
         reco_detail = context.run_recognition("CCRemainMoney_rec", processed_img)
 
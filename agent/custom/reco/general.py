@@ -1,14 +1,99 @@
-import re
 import sys
 import json
 import random
-from typing import Any, Dict, List, Union, Optional
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 
 from maa.agent.agent_server import AgentServer
 from maa.custom_recognition import CustomRecognition
 from maa.context import Context
 from maa.define import RectType
 from utils.logger import logger
+from utils.expression import (
+    And,
+    LogicNode,
+    Or,
+    Ref,
+    RoiNode,
+    collect_refs,
+    compile_logic,
+    compile_roi,
+    evaluate_logic,
+    evaluate_roi,
+    roi_intersection,
+)
+
+
+class _MultiRecognitionPlan(NamedTuple):
+    """编译后的 MultiRecognition 参数"""
+
+    nodes: Tuple[str, ...]
+    logic: LogicNode
+    roi: Optional[RoiNode]
+    fixed_roi: Optional[Tuple[int, int, int, int]]
+    external_nodes: Tuple[str, ...]
+
+
+@lru_cache(maxsize=128)
+def _compile_plan(custom_recognition_param: str) -> _MultiRecognitionPlan:
+    """
+    解析并编译 MultiRecognition 参数（按参数字符串缓存）
+
+    Raises:
+        ValueError: 参数错误
+    """
+    params = json.loads(custom_recognition_param)
+    nodes = tuple(params.get("nodes", []))
+    logic = params.get("logic", {"type": "AND"})
+    return_value = params.get("return", None)
+
+    if not nodes:
+        raise ValueError("nodes字段不能为空或空数组")
+
+    if return_value is None or return_value == "":
+        raise ValueError("return字段不能为空")
+
+    logic_type = logic.get("type", "AND")
+    refs = tuple(Ref("index", i) for i in range(len(nodes)))
+    if logic_type == "AND":
+        logic_node = refs[0] if len(refs) == 1 else And(refs)
+    elif logic_type == "OR":
+        logic_node = refs[0] if len(refs) == 1 else Or(refs)
+    elif logic_type == "CUSTOM":
+        expression = logic.get("expression", "")
+        if expression == "":
+            raise ValueError("未提供expression")
+        try:
+            logic_node = compile_logic(expression)
+        except ValueError as e:
+            raise ValueError(f"逻辑表达式解析失败: {expression}, 错误: {e}")
+    else:
+        raise ValueError(f"不支持的logic类型: {logic_type}")
+
+    roi_node, fixed_roi = None, None
+    if isinstance(return_value, list) and len(return_value) == 4:
+        try:
+            fixed_roi = tuple(int(x) for x in return_value)
+        except (ValueError, TypeError):
+            raise ValueError(f"return坐标格式错误: {return_value}")
+    elif isinstance(return_value, str):
+        try:
+            roi_node = compile_roi(return_value)
+        except ValueError as e:
+            raise ValueError(f"ROI表达式解析失败: {return_value}, 错误: {e}")
+    else:
+        raise ValueError(f"return值类型错误，应为int[4]或string: {return_value}")
+
+    external_nodes = []
+    for ref in collect_refs(logic_node) + collect_refs(roi_node):
+        if ref.kind == "index" and ref.key >= len(nodes):
+            raise ValueError(f"引用了不存在的节点 ${ref.key}（共{len(nodes)}个节点）")
+        if ref.kind == "node" and ref.key not in external_nodes:
+            external_nodes.append(ref.key)
+
+    return _MultiRecognitionPlan(
+        nodes, logic_node, roi_node, fixed_roi, tuple(external_nodes)
+    )
 
 
 @AgentServer.custom_recognition("MultiRecognition")
@@ -46,12 +131,17 @@ class MultiRecognition(CustomRecognition):
         - 支持 INTERSECTION($0,$1): 计算交集
         - 支持 OFFSET($0,dx,dy,dw,dh): 偏移调整
         - 支持嵌套计算
+
+    参数按字符串编译为语法树并缓存（见 utils.expression），节点按需识别：
+    AND 已失败或 OR 已命中时不再识别剩余节点，每个节点每帧最多识别一次。
     """
 
     def __init__(self):
         super().__init__()
         self._context: Optional[Context] = None
         self._argv: Optional[CustomRecognition.AnalyzeArg] = None
+        self._plan: Optional[_MultiRecognitionPlan] = None
+        self._node_results: Optional[Dict[int, Optional[List[int]]]] = None
         self._external_node_cache: Optional[Dict[str, bool]] = None
         self._external_roi_cache: Optional[Dict[str, Optional[RectType]]] = None
 
@@ -61,45 +151,31 @@ class MultiRecognition(CustomRecognition):
         argv: CustomRecognition.AnalyzeArg,
     ) -> Union[CustomRecognition.AnalyzeResult, Optional[RectType]]:
         try:
+            try:
+                plan = _compile_plan(argv.custom_recognition_param)
+            except ValueError as e:
+                logger.error(f"MultiRecognition参数错误: {e}")
+                return None
+
             self._context = context
             self._argv = argv
+            self._plan = plan
             # 初始化缓存
+            self._node_results = {}
             self._external_node_cache = {}
             self._external_roi_cache = {}
 
-            params = json.loads(argv.custom_recognition_param)
-            nodes = params.get("nodes", [])
-            logic = params.get("logic", {"type": "AND"})
-            return_value = params.get("return", None)
-
-            if not nodes:
-                logger.error("nodes字段不能为空或空数组")
-                return None
-
-            if return_value is None or return_value == "":
-                logger.error("return字段不能为空")
-                return None
-
-            # 执行每个节点的识别
-            node_results = {}
-            for i, node_name in enumerate(nodes):
-                index_key = f"${i}"
-
-                reco_detail = context.run_recognition(node_name, argv.image)
-
-                if reco_detail and reco_detail.hit:
-                    # 标准化ROI，将[0,0,0,0]转换为实际全屏坐标，其它不变
-                    normalized_roi = self._normalize_roi(list(reco_detail.box))
-                    node_results[index_key] = normalized_roi
-                else:
-                    node_results[index_key] = None
-
-            # 逻辑判断
-            if not self._check_logic_condition(logic, node_results):
+            # 逻辑判断（按需识别节点）
+            if not evaluate_logic(plan.logic, self._resolve):
                 return None
 
             # ROI计算
-            final_roi = self._process_return_value(return_value, node_results)
+            if plan.fixed_roi is not None:
+                return CustomRecognition.AnalyzeResult(
+                    box=list(plan.fixed_roi), detail={}
+                )
+
+            final_roi = self._calculate_roi(plan.roi)
             if final_roi:
                 return CustomRecognition.AnalyzeResult(box=final_roi, detail={})
             else:
@@ -112,9 +188,31 @@ class MultiRecognition(CustomRecognition):
         finally:
             self._context = None
             self._argv = None
+            self._plan = None
+            self._node_results = None
             self._external_node_cache = None
             self._external_roi_cache = None
 
+    def _resolve(self, ref: Ref) -> Optional[List[int]]:
+        """
+        取得引用的识别区域（未命中为 None），$n 节点在首次引用时才识别
+        """
+        if ref.kind == "index":
+            if ref.key not in self._node_results:
+                node_name = self._plan.nodes[ref.key]
+                reco_detail = self._context.run_recognition(node_name, self._argv.image)
+                if reco_detail and reco_detail.hit:
+                    # 标准化ROI，将[0,0,0,0]转换为实际全屏坐标，其它不变
+                    self._node_results[ref.key] = self._normalize_roi(
+                        list(reco_detail.box)
+                    )
+                else:
+                    self._node_results[ref.key] = None
+            return self._node_results[ref.key]
+
+        self._ensure_external_nodes_cached(list(self._plan.external_nodes))
+        return self._external_roi_cache.get(ref.key)
+
     def _ensure_external_nodes_cached(self, node_names: List[str]) -> None:
         """
         确保指定的外部节点信息已缓存
@@ -164,372 +262,24 @@ class MultiRecognition(CustomRecognition):
             self._external_node_cache[remaining_node] = False
             self._external_roi_cache[remaining_node] = None
 
-    def _check_logic_condition(
-        self,
-        logic: Dict[str, Any],
-        node_results: Dict[str, Optional[RectType]],
-    ) -> bool:
-        """检查逻辑条件是否满足"""
-        logic_type = logic.get("type", "AND")
-
-        if logic_type == "AND":
-            for key, result in node_results.items():
-                if result is None:
-                    return False
-            return True
-
-        elif logic_type == "OR":
-            for key, result in node_results.items():
-                if result is not None:
-                    return True
-            return False
-
-        elif logic_type == "CUSTOM":
-            expression = logic.get("expression", "")
-            if expression == "":
-                logger.error("未提供expression")
-                return False
-
-            return self._evaluate_logic_expression(expression, node_results)
-
-        else:
-            logger.error(f"不支持的logic类型: {logic_type}")
-            return False
-
-    def _evaluate_logic_expression(
-        self,
-        expression: str,
-        node_results: Dict[str, Optional[RectType]],
-    ) -> bool:
-        """计算逻辑表达式"""
-        try:
-            eval_expression = expression
-
-            # 处理 {NodeName} 引用其他已执行节点
-            if "{" in eval_expression:
-                external_node_names = list(
-                    set(re.findall(r"\{([^}]+)\}", eval_expression))
-                )
-
-                if external_node_names:
-                    # 确保外部节点信息已缓存
-                    self._ensure_external_nodes_cached(external_node_names)
-
-                    # 替换外部节点引用
-                    for node_name in external_node_names:
-                        recognition_success = self._external_node_cache.get(
-                            node_name, False
-                        )
-                        bool_value = "True" if recognition_success else "False"
-                        eval_expression = eval_expression.replace(
-                            f"{{{node_name}}}", bool_value
-                        )
-
-            # 替换 $0、$1、$2... 为对应的识别结果
-            for key, result in node_results.items():
-                bool_value = "True" if result is not None else "False"
-                eval_expression = eval_expression.replace(key, bool_value)
-
-            eval_expression = eval_expression.replace("AND", "and")
-            eval_expression = eval_expression.replace("OR", "or")
-            eval_expression = eval_expression.replace("NOT", "not")
-
-            # 计算表达式
-            result = eval(eval_expression)
-
-            return bool(result)
-
-        except Exception as e:
-            logger.error(f"逻辑表达式计算失败: {expression}, 错误: {e}")
-            return False
-
-    def _process_return_value(
-        self,
-        return_value: Union[str, List[int]],
-        node_results: Dict[str, Optional[RectType]],
-    ) -> Optional[RectType]:
+    def _calculate_roi(self, roi_node: RoiNode) -> Optional[RectType]:
         """
-        处理return值，支持直接坐标和表达式计算
+        计算ROI表达式，结果与全屏ROI取交集
         """
-        try:
-            if isinstance(return_value, list) and len(return_value) == 4:
-                # 直接返回坐标数组 [x, y, w, h]
-                try:
-                    result = [int(x) for x in return_value]
-                    return result
-                except (ValueError, TypeError):
-                    logger.error(f"return坐标格式错误: {return_value}")
-                    return None
+        final_roi = [int(x) for x in evaluate_roi(roi_node, self._resolve)]
 
-            elif isinstance(return_value, str):
-                # 计算ROI表达式
-                return self._calculate_roi_expression(return_value, node_results)
+        # 统一边界处理：与全屏ROI取交集
+        screen_roi = self._normalize_roi([0, 0, 0, 0])
+        clipped_roi = roi_intersection(final_roi, screen_roi)
 
-            else:
-                logger.error(f"return值类型错误，应为int[4]或string: {return_value}")
-                return None
-
-        except Exception as e:
-            logger.error(f"处理return值失败: {return_value}, 错误: {e}")
+        if clipped_roi == [0, 0, 0, 0]:
+            logger.warning(f"ROI计算结果完全超出屏幕范围: {final_roi}")
             return None
 
-    def _calculate_roi_expression(
-        self,
-        expression: str,
-        node_results: Dict[str, Optional[RectType]],
-    ) -> Optional[RectType]:
-        """
-        计算ROI表达式
-        """
-        try:
-            eval_expression = expression.strip()
-
-            # 处理 {NodeName} 引用其他已执行节点的ROI
-            if "{" in eval_expression:
-                eval_expression = self._replace_external_node_rois(eval_expression)
-                # 检查是否有无效ROI
-                if eval_expression is None:
-                    logger.warning("外部节点ROI引用失败，ROI计算失败")
-                    return None
-
-            # 替换 $0, $1, $2... 为对应的ROI坐标
-            for key, roi in node_results.items():
-                if roi is not None:
-                    roi_str = f"[{roi[0]},{roi[1]},{roi[2]},{roi[3]}]"
-                    eval_expression = eval_expression.replace(key, roi_str)
-                else:
-                    eval_expression = eval_expression.replace(key, "[0,0,0,0]")
-
-            # 处理函数调用：UNION, INTERSECTION, OFFSET
-            result = self._evaluate_roi_functions(eval_expression)
-
-            if result and len(result) == 4:
-                final_roi = [int(x) for x in result]
-
-                # 统一边界处理：与全屏ROI取交集
-                screen_roi = self._normalize_roi([0, 0, 0, 0])
-                clipped_roi = self._calculate_intersection(final_roi, screen_roi)
-
-                if clipped_roi == [0, 0, 0, 0]:
-                    logger.warning(f"ROI计算结果完全超出屏幕范围: {final_roi}")
-                    return None
-
-                if clipped_roi != final_roi:
-                    logger.debug(f"ROI结果裁剪: {final_roi} -> {clipped_roi}")
-
-                return clipped_roi
-            else:
-                logger.error(f"ROI计算结果无效: {result}")
-                return None
-
-        except Exception as e:
-            logger.error(f"ROI表达式计算失败: {expression}, 错误: {e}")
-            return None
-
-    def _replace_external_node_rois(self, expression: str) -> Optional[str]:
-        """
-        替换表达式中的 {NodeName} 为对应的ROI坐标
-        """
-        external_node_names = re.findall(r"\{([^}]+)\}", expression)
-
-        if external_node_names:
-            # 确保外部节点信息已缓存
-            self._ensure_external_nodes_cached(external_node_names)
-
-            # 替换外部节点ROI引用
-            for node_name in external_node_names:
-                roi = self._external_roi_cache.get(node_name)
-
-                if roi is not None:
-                    roi_str = f"[{roi[0]},{roi[1]},{roi[2]},{roi[3]}]"
-                    expression = expression.replace(f"{{{node_name}}}", roi_str)
-                else:
-                    expression = expression.replace(f"{{{node_name}}}", "[0,0,0,0]")
-
-        return expression
-
-    def _evaluate_roi_functions(self, expression: str) -> Optional[List[int]]:
-        """
-        计算ROI函数表达式
-        """
-
-        # 处理嵌套函数调用，从内向外
-        while True:
-            # 查找最内层的函数调用
-            match = re.search(r"(\w+)\(([^()]*)\)", expression)
-            if not match:
-                break
-
-            func_name = match.group(1)
-            func_args = match.group(2)
-            full_match = match.group(0)
-
-            # 计算函数结果
-            func_result = self._execute_roi_function(func_name, func_args)
-            if func_result is None:
-                return None
-
-            # 替换函数调用为结果
-            result_str = (
-                f"[{func_result[0]},{func_result[1]},{func_result[2]},{func_result[3]}]"
-            )
-            expression = expression.replace(full_match, result_str, 1)
-
-        # 最终表达式应该是一个ROI数组
-        try:
-            if expression.startswith("[") and expression.endswith("]"):
-                # 解析 [x,y,w,h] 格式
-                coords = expression[1:-1].split(",")
-                return [int(x.strip()) for x in coords]
-            else:
-                logger.error(f"无法解析最终ROI表达式: {expression}")
-                return None
-        except Exception as e:
-            logger.error(f"解析最终ROI失败: {expression}, 错误: {e}")
-            return None
-
-    def _execute_roi_function(
-        self, func_name: str, func_args: str
-    ) -> Optional[List[int]]:
-        """
-        执行具体的ROI函数
-        """
-        try:
-            args = self._parse_function_args(func_args)
-
-            if func_name == "UNION":
-                if len(args) != 2:
-                    logger.error(f"UNION函数需要2个参数，得到{len(args)}个: {args}")
-                    return None
-                roi1 = self._parse_roi_arg(args[0])
-                roi2 = self._parse_roi_arg(args[1])
-                if roi1 and roi2:
-                    return self._calculate_union(roi1, roi2)
-
-            elif func_name == "INTERSECTION":
-                if len(args) != 2:
-                    logger.error(
-                        f"INTERSECTION函数需要2个参数，得到{len(args)}个: {args}"
-                    )
-                    return None
-                roi1 = self._parse_roi_arg(args[0])
-                roi2 = self._parse_roi_arg(args[1])
-                if roi1 and roi2:
-                    return self._calculate_intersection(roi1, roi2)
-
-            elif func_name == "OFFSET":
-                if len(args) != 5:
-                    logger.error(f"OFFSET函数需要5个参数，得到{len(args)}个: {args}")
-                    return None
-                roi = self._parse_roi_arg(args[0])
-                if roi:
-                    dx, dy, dw, dh = [int(x) for x in args[1:5]]
-                    return self._calculate_offset(roi, dx, dy, dw, dh)
-
-            else:
-                logger.error(f"不支持的ROI函数: {func_name}")
-                return None
-
-        except Exception as e:
-            logger.error(f"执行ROI函数失败: {func_name}({func_args}), 错误: {e}")
-            return None
-
-    def _parse_roi_arg(self, arg: str) -> Optional[List[int]]:
-        """
-        解析ROI参数 [x,y,w,h]
-        """
-        try:
-            if arg.startswith("[") and arg.endswith("]"):
-                coords = arg[1:-1].split(",")
-                roi = [int(x.strip()) for x in coords]
-                return roi
-            else:
-                logger.error(f"无效的ROI参数格式: {arg}")
-                return None
-        except Exception as e:
-            logger.error(f"解析ROI参数失败: {arg}, 错误: {e}")
-            return None
-
-    def _parse_function_args(self, args_str: str) -> List[str]:
-        """
-        智能解析函数参数，正确处理包含方括号的ROI参数
-        """
-        args = []
-        current_arg = ""
-        bracket_count = 0
-
-        for char in args_str:
-            if char == "[":
-                bracket_count += 1
-                current_arg += char
-            elif char == "]":
-                bracket_count -= 1
-                current_arg += char
-            elif char == "," and bracket_count == 0:
-                # 只有在方括号外的逗号才作为参数分隔符
-                args.append(current_arg.strip())
-                current_arg = ""
-            else:
-                current_arg += char
-
-        # 添加最后一个参数
-        if current_arg:
-            args.append(current_arg.strip())
-
-        return args
-
-    def _calculate_union(self, roi1: List[int], roi2: List[int]) -> List[int]:
-        """
-        计算两个ROI的并集
-        """
-        x1, y1, w1, h1 = roi1
-        x2, y2, w2, h2 = roi2
-
-        if w1 == 0 and h1 == 0:
-            return roi2
-        elif w2 == 0 and h2 == 0:
-            return roi1
-
-        # 计算边界
-        left = min(x1, x2)
-        top = min(y1, y2)
-        right = max(x1 + w1, x2 + w2)
-        bottom = max(y1 + h1, y2 + h2)
-
-        return [left, top, right - left, bottom - top]
-
-    def _calculate_intersection(self, roi1: List[int], roi2: List[int]) -> List[int]:
-        """
-        计算两个ROI的交集
-        """
-        x1, y1, w1, h1 = roi1
-        x2, y2, w2, h2 = roi2
-
-        # 计算交集边界
-        left = max(x1, x2)
-        top = max(y1, y2)
-        right = min(x1 + w1, x2 + w2)
-        bottom = min(y1 + h1, y2 + h2)
-
-        # 检查是否有交集
-        if left >= right or top >= bottom:
-            return [0, 0, 0, 0]
-
-        return [left, top, right - left, bottom - top]
-
-    def _calculate_offset(
-        self, roi: List[int], dx: int, dy: int, dw: int, dh: int
-    ) -> List[int]:
-        """
-        计算ROI偏移
-        """
-        x, y, w, h = roi
-        new_x = x + dx
-        new_y = y + dy
-        new_w = w + dw
-        new_h = h + dh
+        if clipped_roi != final_roi:
+            logger.debug(f"ROI结果裁剪: {final_roi} -> {clipped_roi}")
 
-        return [new_x, new_y, new_w, new_h]
+        return clipped_roi
 
     def _normalize_roi(self, roi: List[int]) -> List[int]:
         """
@@ -8,6 +8,7 @@ from maa.context import Context
 from maa.define import RectType, OCRResult
 
 from utils import logger
+from utils import recognition_memo
 
 
 @AgentServer.custom_recognition("SOSSelectEncounterOptionFindSelected")
@@ -151,9 +152,13 @@ class SOSSelectNode(CustomRecognition):
         # 如果目标在禁止区域范围内，向右滑动
         forbidden_roi = [0, 140, 348, 284]
 
-        reco_detail = context.run_recognition("SOSEntrustrRec", argv.image)
+        reco_detail = recognition_memo.run_recognition(
+            context, "SOSEntrustrRec", argv.image
+        )
         if reco_detail and reco_detail.hit:
-            reco_detail = context.run_recognition("SOSSelectNode_rec", argv.image)
+            reco_detail = recognition_memo.run_recognition(
+                context, "SOSSelectNode_rec", argv.image
+            )
             if reco_detail and reco_detail.hit:
                 # 获取识别到的节点位置
                 node_box = reco_detail.best_result.box
@@ -194,7 +199,9 @@ class SOSSelectNode(CustomRecognition):
                         box=node_box, detail=reco_detail.raw_detail
                     )
         else:
-            reco_detail = context.run_recognition("SOSSelectNode_rec", argv.image)
+            reco_detail = recognition_memo.run_recognition(
+                context, "SOSSelectNode_rec", argv.image
+            )
             if reco_detail and reco_detail.hit:
                 # 获取识别到的节点位置
                 node_box = reco_detail.best_result.box
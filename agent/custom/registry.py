@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+"""
+自定义动作/识别懒加载注册表
+
+各子包（action、reco）在 __init__ 中声明 {模块: [注册名, ...]}，启动时只为每个
+注册名注册一个轻量代理；首次调度到某个动作/识别时才导入其所在模块（连带 numpy、
+PIL 等重依赖），之后代理直接转发给模块中装饰器创建的真实实例。
+
+导入模块期间临时替换 AgentServer.custom_action / custom_recognition 装饰器，
+只收集实例而不向框架重复注册。
+"""
+
+import sys
+import time
+import threading
+import importlib
+from typing import Dict, List, Optional, Tuple
+
+from maa.agent.agent_server import AgentServer
+from maa.custom_action import CustomAction
+from maa.custom_recognition import CustomRecognition
+from maa.context import Context
+
+from utils import logger
+
+ACTION = "action"
+RECOGNITION = "recognition"
+
+_lock = threading.RLock()
+# (类型, 注册名) -> 模块中装饰器创建的实例
+_instances: Dict[Tuple[str, str], object] = {}
+# (类型, 注册名) -> 声明所在模块
+_owners: Dict[Tuple[str, str], str] = {}
+# 模块 -> 首次导入耗时（毫秒），按导入顺序
+_import_ms: Dict[str, float] = {}
+# 子包 -> 声明
+_packages: Dict[str, Tuple[str, Dict[str, List[str]]]] = {}
+
+
+def _capturing_decorator(kind: str):
+    def decorator(name: str):
+        def wrapper(cls):
+            _instances[(kind, name)] = cls()
+            return cls
+
+        return wrapper
+
+    return decorator
+
+
+def _register_now(kind: str, name: str, instance):
+    if kind == ACTION:
+        AgentServer.register_custom_action(name, instance)
+    else:
+        AgentServer.register_custom_recognition(name, instance)
+
+
+def load_module(module_name: str):
+    """导入模块并收集其中注册的实例（线程安全，只导入一次）"""
+    with _lock:
+        if module_name in _import_ms:
+            return sys.modules[module_name]
+
+        known = set(_instances)
+        origin_action = AgentServer.__dict__["custom_action"]
+        origin_recognition = AgentServer.__dict__["custom_recognition"]
+        AgentServer.custom_action = staticmethod(_capturing_decorator(ACTION))
+        AgentServer.custom_recognition = staticmethod(_capturing_decorator(RECOGNITION))
+
+        begin = time.perf_counter()
+        try:
+            module = importlib.import_module(module_name)
+        finally:
+            AgentServer.custom_action = origin_action
+            AgentServer.custom_recognition = origin_recognition
+        cost = (time.perf_counter() - begin) * 1000
+        _import_ms[module_name] = cost
+        logger.debug(f"加载模块 {module_name} 耗时 {cost:.1f}ms")
+
+        # 未在注册表中声明的实例没有代理，直接注册
+        for kind, name in set(_instances) - known:
+            if (kind, name) not in _owners:
+                logger.warning(f"{kind} {name} 未在注册表中声明，已直接注册")
+                _register_now(kind, name, _instances[(kind, name)])
+
+        return module
+
+
+def _resolve(kind: str, name: str, module_name: str) -> Optional[object]:
+    instance = _instances.get((kind, name))
+    if instance is None:
+        load_module(module_name)
+        instance = _instances.get((kind, name))
+    if instance is None:
+        logger.error(f"模块 {module_name} 中未找到 {kind} {name}")
+    return instance
+
+
+class _LazyAction(CustomAction):
+    def __init__(self, name: str, module_name: str):
+        super().__init__()
+        self._name = name
+        self._module_name = module_name
+        self._target = None
+
+    def run(
+        self, context: Context, argv: CustomAction.RunArg
+    ) -> CustomAction.RunResult | bool:
+        if self._target is None:
+            self._target = _resolve(ACTION, self._name, self._module_name)
+            if self._target is None:
+                return CustomAction.RunResult(success=False)
+        return self._target.run(context, argv)
+
+
+class _LazyRecognition(CustomRecognition):
+    def __init__(self, name: str, module_name: str):
+        super().__init__()
+        self._name = name
+        self._module_name = module_name
+        self._target = None
+
+    def analyze(self, context: Context, argv: CustomRecognition.AnalyzeArg):
+        if self._target is None:
+            self._target = _resolve(RECOGNITION, self._name, self._module_name)
+            if self._target is None:
+                return None
+        return self._target.analyze(context, argv)
+
+
+def register_lazy(package: str, kind: str, modules: Dict[str, List[str]]):
+    """
+    为子包声明的所有注册名注册代理
+
+    Args:
+        package: 子包名，如 "custom.action"
+        kind: ACTION 或 RECOGNITION
+        modules: {模块名: [注册名, ...]}
+    """
+    proxy_cls = _LazyAction if kind == ACTION else _LazyRecognition
+    _packages[package] = (kind, modules)
+    for module, names in modules.items():
+        module_name = f"{package}.{module}"
+        for name in names:
+            _owners[(kind, name)] = module_name
+            _register_now(kind, name, proxy_cls(name, module_name))
+
+
+def resolve_attr(package: str, modules: Dict[str, List[str]], name: str):
+    """子包的 __getattr__：按声明加载对应模块并返回属性"""
+    for module, names in modules.items():
+        if name in names:
+            return getattr(load_module(f"{package}.{module}"), name)
+    raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+
+def preload_all():
+    """导入所有已声明的模块并输出导入耗时报告（开发模式使用）"""
+    for package, (kind, modules) in _packages.items():
+        for module in modules:
+            load_module(f"{package}.{module}")
+
+    total = 0.0
+    lines = []
+    for module_name, cost in _import_ms.items():
+        total += cost
+        lines.append(f"  {module_name:<40} {cost:8.1f}ms  累计 {total:8.1f}ms")
+    logger.info("自定义模块导入耗时:\n" + "\n".join(lines))
+
+    for (kind, name), module_name in _owners.items():
+        if (kind, name) not in _instances:
+            logger.warning(f"{kind} {name} 已声明于 {module_name}，但模块中未注册")
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sys
 import json
+import hashlib
 import subprocess
+import importlib.metadata
 from pathlib import Path
 
 # utf-8
@@ -27,6 +30,7 @@ from utils import logger
 
 VENV_NAME = ".venv"  # 虚拟环境目录的名称
 VENV_DIR = Path(project_root_dir) / VENV_NAME
+DEPS_STAMP_PATH = Path("./config") / "deps_stamp.json"  # 依赖指纹文件
 
 ### 虚拟环境相关 ###
 
@@ -175,7 +179,12 @@ def read_hot_update_config() -> dict:
     config_dir = Path("./config")
     config_dir.mkdir(exist_ok=True)
     config_path = config_dir / "hot_update.json"
-    default_conf = {"enable_hot_update": True}
+    default_conf = {
+        "enable_hot_update": True,
+        "mode": "blocking",
+        "startup_deadline": 15,
+        "version_cache_ttl": 21600,
+    }
     if not config_path.exists():
         try:
             with open(config_path, "w", encoding="utf-8") as f:
@@ -339,6 +348,89 @@ def install_requirements(req_file="requirements.txt", pip_config=None) -> bool:
             return False
 
 
+def _parse_requirement_names(req_path: Path) -> list:
+    """从 requirements.txt 中解析依赖包名"""
+    names = []
+    with open(req_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line or line.startswith("-"):
+                continue
+            match = re.match(r"[A-Za-z0-9][A-Za-z0-9._-]*", line)
+            if match:
+                names.append(match.group(0))
+    return names
+
+
+def _compute_deps_fingerprint(req_path: Path) -> str:
+    """根据 requirements.txt、deps/*.whl 和当前解释器计算依赖指纹"""
+    sha256 = hashlib.sha256()
+    sha256.update(req_path.read_bytes())
+
+    deps_dir = Path(project_root_dir) / "deps"
+    if deps_dir.exists():
+        for whl in sorted(deps_dir.glob("*.whl")):
+            sha256.update(f"{whl.name}:{whl.stat().st_size}".encode())
+
+    sha256.update(f"{sys.executable}|{sys.version}".encode())
+    return sha256.hexdigest()
+
+
+def _get_installed_versions(names: list):
+    """查询已安装的依赖版本，任一缺失时返回 None"""
+    versions = {}
+    for name in names:
+        try:
+            versions[name] = importlib.metadata.version(name)
+        except importlib.metadata.PackageNotFoundError:
+            logger.debug(f"依赖未安装: {name}")
+            return None
+    return versions
+
+
+def _is_deps_stamp_valid(req_path: Path) -> bool:
+    """检查依赖指纹和已安装版本是否与上次成功安装时一致"""
+    if not DEPS_STAMP_PATH.exists():
+        return False
+
+    try:
+        with open(DEPS_STAMP_PATH, "r", encoding="utf-8") as f:
+            stamp = json.load(f)
+    except Exception:
+        logger.debug("读取依赖指纹失败，重新安装依赖")
+        return False
+
+    if stamp.get("fingerprint") != _compute_deps_fingerprint(req_path):
+        logger.debug("依赖指纹已变化")
+        return False
+
+    recorded = stamp.get("distributions", {})
+    installed = _get_installed_versions(list(recorded.keys()))
+    if not recorded or installed != recorded:
+        logger.debug("已安装依赖版本与指纹记录不一致")
+        return False
+
+    return True
+
+
+def _write_deps_stamp(req_path: Path):
+    """记录本次成功安装后的依赖指纹"""
+    installed = _get_installed_versions(_parse_requirement_names(req_path))
+    if installed is None:
+        return
+
+    stamp = {
+        "fingerprint": _compute_deps_fingerprint(req_path),
+        "distributions": installed,
+    }
+    try:
+        DEPS_STAMP_PATH.parent.mkdir(exist_ok=True)
+        with open(DEPS_STAMP_PATH, "w", encoding="utf-8") as f:
+            json.dump(stamp, f, indent=4, ensure_ascii=False)
+    except Exception:
+        logger.debug("无法写入依赖指纹")
+
+
 def check_and_install_dependencies():
     """检查并安装项目依赖"""
     pip_config = read_pip_config()
@@ -347,9 +439,15 @@ def check_and_install_dependencies():
     logger.debug(f"启用 pip 安装依赖: {enable_pip_install}")
 
     if enable_pip_install:
+        req_path = Path(project_root_dir) / "requirements.txt"
+        if req_path.exists() and _is_deps_stamp_valid(req_path):
+            logger.info("依赖无变化，跳过依赖安装")
+            return
+
         logger.info("开始安装/更新依赖")
         if install_requirements(pip_config=pip_config):
             logger.info("依赖检查和安装完成")
+            _write_deps_stamp(req_path)
         else:
             logger.warning("依赖安装失败，程序可能无法正常运行")
     else:
@@ -385,72 +483,31 @@ def agent(is_dev_mode=False):
             change_console_level("DEBUG")
             logger.info("开发模式：日志等级已设置为DEBUG")
 
+        startup_result = {}
         if not is_dev_mode:
-            # ========== 版本检查（始终执行） ==========
-            from utils.version_checker import check_resource_version
-
-            version_info = check_resource_version()
-            if not version_info["is_latest"]:
-                logger.warning("检测到资源有新版本!")
-                logger.warning(f"当前资源版本: {version_info['current_version']}")
-                logger.warning(f"最新资源版本: {version_info['latest_version']}")
-            elif version_info["error"]:
-                logger.debug(f"资源版本检查遇到问题: {version_info['error']}")
-
-            # ========== 热更新：基于 manifest 时间戳优化 ==========
+            # ========== 启动阶段：版本检查与热更新并发执行 ==========
+            from utils.startup import run_startup_phases, DEFAULT_STARTUP_DEADLINE
+
             hot_update_conf = read_hot_update_config()
-            if not hot_update_conf.get("enable_hot_update", True):
-                logger.info("已配置为跳过部分资源热更")
-            else:
-                from utils.manifest_checker import (
-                    check_manifest_updates,
-                    save_manifest_cache_from_result,
-                )
-
-                manifest_result = check_manifest_updates()
-
-                # 如果没有任何更新，跳过热更新
-                if manifest_result["success"] and not manifest_result["has_any_update"]:
-                    logger.debug("资源无更新，跳过热更新")
-                else:
-                    # 有更新或检查失败，执行热更新流程
-                    updated_manifests = manifest_result.get("updated_manifests", [])
-
-                    if updated_manifests or not manifest_result["success"]:
-                        from utils.resource_updater import check_and_update_resources
-
-                        # 只更新有变化的 manifest
-                        manifests = (
-                            updated_manifests if manifest_result["success"] else None
-                        )
-                        if manifests:
-                            logger.debug(f"开始更新 {len(manifests)} 个资源清单...")
-                        else:
-                            logger.debug("开始检查所有资源...")
-
-                        update_result = check_and_update_resources(
-                            resource_manifests=manifests
-                        )
-                        if update_result and update_result.get("updated_files"):
-                            pass
-                        elif update_result and update_result.get("error"):
-                            logger.debug(
-                                f"热更部分资源更新遇到问题: {update_result['error']}"
-                            )
-                        else:
-                            logger.debug("热更部分资源已是最新")
-                    else:
-                        logger.debug("所有 manifest 无更新，跳过热更新")
-
-                # 检查成功后保存 manifest 缓存（无论是否有更新）
-                save_manifest_cache_from_result(manifest_result)
-            # ========== 热更新结束 ==========
+            startup_result = run_startup_phases(
+                enable_hot_update=hot_update_conf.get("enable_hot_update", True),
+                deadline=hot_update_conf.get(
+                    "startup_deadline", DEFAULT_STARTUP_DEADLINE
+                ),
+                mode=hot_update_conf.get("mode", "blocking"),
+                version_cache_ttl=hot_update_conf.get("version_cache_ttl"),
+            )
 
         from maa.agent.agent_server import AgentServer
         from maa.toolkit import Toolkit
 
         import custom
 
+        if is_dev_mode:
+            from custom.registry import preload_all
+
+            preload_all()
+
         Toolkit.init_option("./")
 
         if len(sys.argv) < 2:
@@ -460,9 +517,30 @@ def agent(is_dev_mode=False):
         socket_id = sys.argv[-1]
         logger.debug(f"socket_id: {socket_id}")
 
+        if startup_result.get("background") or startup_result.get("timed_out"):
+            # 后台下载或超出启动期限的更新暂存后在任务间隙应用
+            from utils.hot_update import (
+                register_task_boundary_apply,
+                start_background_update,
+            )
+
+            register_task_boundary_apply()
+
         AgentServer.start_up(socket_id)
         logger.info("AgentServer启动")
+
+        if startup_result.get("background"):
+            start_background_update()
+
+        # 继续发送上次运行未完成的上报
+        from utils.report_outbox import get_report_outbox
+
+        report_outbox = get_report_outbox()
+        if report_outbox.pending():
+            report_outbox.start()
+
         AgentServer.join()
+        report_outbox.flush()
         AgentServer.shut_down()
         logger.info("AgentServer关闭")
     except ImportError as e:
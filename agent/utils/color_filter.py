@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+"""
+ROI 颜色过滤模块
+
+OCR 前的颜色预处理只对识别节点 ROI 内的像素生效。本模块只处理 ROI 内的像素，
+结果写入按 (尺寸, 背景值) 预分配、线程内复用的整帧 uint8 缓冲区，ROI 外为背景值。
+
+注意：返回的图像在同一线程下次调用时会被覆盖，只应在调用后立即用于识别。
+
+规则:
+    ChannelRange  各通道都在 [lower, upper] 内的像素保留原色，其余填充 fill（查找表）
+    GrayBand      接近灰色且亮度在范围内的像素变黑，其余变白
+"""
+
+import threading
+import numpy as np
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Roi = Sequence[int]
+
+
+@lru_cache(maxsize=32)
+def _channel_lut(lower: Tuple[int, ...], upper: Tuple[int, ...]) -> np.ndarray:
+    """每个通道一张 256 项布尔查找表，shape (C, 256)"""
+    values = np.arange(256)
+    return np.stack([(values >= lo) & (values <= hi) for lo, hi in zip(lower, upper)])
+
+
+@dataclass(frozen=True)
+class ChannelRange:
+    """各通道都在 [lower, upper] 内的像素保留原色，其余填充 fill（通道顺序与图像一致）"""
+
+    lower: Tuple[int, ...]
+    upper: Tuple[int, ...]
+    fill: int = 255
+
+    @property
+    def background(self) -> int:
+        return self.fill
+
+    def mask(self, roi: np.ndarray) -> np.ndarray:
+        lut = _channel_lut(tuple(self.lower), tuple(self.upper))
+        mask = lut[0][roi[..., 0]]
+        for channel in range(1, lut.shape[0]):
+            mask &= lut[channel][roi[..., channel]]
+        return mask
+
+    def apply(self, src: np.ndarray, dst: np.ndarray):
+        dst[...] = self.fill
+        np.copyto(dst, src, where=self.mask(src)[..., None])
+
+
+@dataclass(frozen=True)
+class GrayBand:
+    """通道最大差值小于 max_diff、平均亮度在 [min_brightness, max_brightness] 内的像素变黑，其余变白"""
+
+    max_diff: int = 50
+    min_brightness: int = 100
+    max_brightness: int = 240
+
+    @property
+    def background(self) -> int:
+        return 255
+
+    def mask(self, roi: np.ndarray) -> np.ndarray:
+        channel_diff = roi.max(axis=2) - roi.min(axis=2)
+        # 平均亮度比较改为通道和比较，避免浮点运算
+        total = roi.sum(axis=2, dtype=np.uint16)
+        return (
+            (channel_diff < self.max_diff)
+            & (total >= self.min_brightness * roi.shape[2])
+            & (total <= self.max_brightness * roi.shape[2])
+        )
+
+    def apply(self, src: np.ndarray, dst: np.ndarray):
+        dst[...] = 255
+        dst[self.mask(src)] = 0
+
+
+class _FrameBuffer:
+    """预分配的整帧缓冲区，记录上次写入的 ROI 以便复位"""
+
+    def __init__(self, shape: Tuple[int, ...], background: int):
+        self.background = background
+        self.data = np.full(shape, background, dtype=np.uint8)
+        self.dirty: List[Tuple[int, int, int, int]] = []
+
+    def reset(self):
+        for x, y, w, h in self.dirty:
+            self.data[y : y + h, x : x + w] = self.background
+        self.dirty = []
+
+
+_local = threading.local()
+
+
+def _get_buffer(shape: Tuple[int, ...], background: int) -> _FrameBuffer:
+    buffers: Dict[Tuple, _FrameBuffer] = getattr(_local, "buffers", None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    key = (shape, background)
+    buffer = buffers.get(key)
+    if buffer is None:
+        buffer = buffers[key] = _FrameBuffer(shape, background)
+    else:
+        buffer.reset()
+    return buffer
+
+
+def _clip_roi(roi: Roi, height: int, width: int) -> Optional[Tuple[int, int, int, int]]:
+    x, y, w, h = (int(v) for v in roi)
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, width), min(y + h, height)
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def filter_rois(image: np.ndarray, rois: Optional[Sequence[Roi]], rule) -> np.ndarray:
+    """
+    只对 ROI 内的像素应用颜色规则
+
+    Args:
+        image: uint8 图像 (H, W, C)
+        rois: [[x, y, w, h], ...]，None 表示整帧
+        rule: ChannelRange / GrayBand
+
+    Returns:
+        np.ndarray: 与 image 同尺寸的图像（复用的缓冲区），ROI 外为 rule.background
+    """
+    height, width = image.shape[:2]
+    if rois is None:
+        rois = [[0, 0, width, height]]
+
+    buffer = _get_buffer(image.shape, rule.background)
+    for roi in rois:
+        clipped = _clip_roi(roi, height, width)
+        if clipped is None:
+            continue
+        x, y, w, h = clipped
+        rule.apply(image[y : y + h, x : x + w], buffer.data[y : y + h, x : x + w])
+        buffer.dirty.append(clipped)
+    return buffer.data
+
+
+def node_roi(context, node_name: str) -> Optional[List[int]]:
+    """读取识别节点的固定 ROI，无法读取或 ROI 不是坐标时返回 None"""
+    node = context.get_node_data(node_name)
+    if not isinstance(node, dict):
+        return None
+    roi = node.get("recognition", {}).get("param", {}).get("roi")
+    if isinstance(roi, list) and len(roi) == 4 and roi[2] > 0 and roi[3] > 0:
+        return roi
+    return None
+
+
+def filter_node_roi(context, image: np.ndarray, node_name: str, rule) -> np.ndarray:
+    """只对识别节点 ROI 内的像素应用颜色规则（读取不到 ROI 时处理整帧）"""
+    roi = node_roi(context, node_name)
+    return filter_rois(image, [roi] if roi else None, rule)
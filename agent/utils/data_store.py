@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+"""
+resource/data 静态数据缓存
+
+resource/data 下的 JSON（SOS 节点/物品、活动时间表等）在进程内只解析一次，
+之后按文件 stat (size, mtime_ns, inode) 判断是否变化（如热更新后），变化时才重新读取。
+
+返回的数据是只读视图：FrozenDict / FrozenList 分别是 dict / list 的子类，
+可以直接用于 json.dumps、isinstance 判断和 override_pipeline，但不能原地修改；
+需要修改时先 copy.deepcopy（得到普通的 dict / list）。
+
+派生索引（如物品名集合、展开后的中断列表）通过 derived() 按文件版本缓存，
+文件变化时随数据一起失效。
+"""
+
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import logger
+
+DATA_DIR = Path("resource/data")
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} 为共享的只读数据，请先 copy.deepcopy")
+
+
+class FrozenDict(dict):
+    """只读 dict"""
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = __ior__ = _readonly
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return dict, (thaw(self),)
+
+
+class FrozenList(list):
+    """只读 list"""
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return list, (thaw(self),)
+
+
+def freeze(value: Any) -> Any:
+    """递归转换为只读视图"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """递归转换为可修改的普通 dict / list"""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+class _Entry:
+    def __init__(self, stat_key: Tuple[int, int, int], data: Any):
+        self.stat_key = stat_key
+        self.data = data
+        self.derived: Dict[str, Any] = {}
+
+
+class DataStore:
+    """按 stat 失效的 JSON 数据缓存（线程安全）"""
+
+    def __init__(self, root: Path = DATA_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+
+    def _entry(self, rel_path: str) -> _Entry:
+        path = self.root / rel_path
+        st = os.stat(path)
+        stat_key = (st.st_size, st.st_mtime_ns, st.st_ino)
+
+        with self._lock:
+            entry = self._entries.get(rel_path)
+            if entry is not None and entry.stat_key == stat_key:
+                return entry
+
+        with open(path, encoding="utf-8") as f:
+            data = freeze(json.load(f))
+
+        with self._lock:
+            if rel_path in self._entries:
+                logger.debug(f"数据文件已变化，重新加载: {rel_path}")
+            entry = self._entries[rel_path] = _Entry(stat_key, data)
+        return entry
+
+    def load(self, rel_path: str) -> Any:
+        """
+        读取 resource/data 下的 JSON 文件（只读视图）
+
+        Args:
+            rel_path: 相对 resource/data 的路径，如 "sos/nodes.json"
+
+        Raises:
+            OSError: 文件不存在或无法读取
+            json.JSONDecodeError: 文件格式错误
+        """
+        return self._entry(rel_path).data
+
+    def derived(self, rel_path: str, name: str, builder: Callable[[Any], Any]) -> Any:
+        """
+        获取由数据文件计算出的派生索引，文件未变化时只计算一次
+
+        Args:
+            rel_path: 数据文件路径（同 load）
+            name: 索引名称
+            builder: builder(data) -> 索引
+        """
+        entry = self._entry(rel_path)
+        with self._lock:
+            if name in entry.derived:
+                return entry.derived[name]
+        value = builder(entry.data)
+        with self._lock:
+            return entry.derived.setdefault(name, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_store: Optional[DataStore] = None
+_store_lock = threading.Lock()
+
+
+def get_data_store() -> DataStore:
+    """获取进程内共享的数据缓存（懒加载）"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DataStore()
+    return _store
+
+
+def load_data(rel_path: str) -> Any:
+    """get_data_store().load 的简写"""
+    return get_data_store().load(rel_path)
@@ -4,6 +4,8 @@
 自定义异常类定义
 """
 
+import requests
+
 
 class VersionCheckError(Exception):
     """版本检查基础异常"""
@@ -67,3 +69,12 @@ class APICriticalError(VersionCheckError):
         message = f"严重错误 (code={code}): {msg}，请联系 Mirror 酱的技术支持"
         super().__init__(message, code=code)
         self.api_msg = msg
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """主机熔断中，请求被直接拒绝（不等待超时）"""
+
+    def __init__(self, host: str, remaining: float):
+        self.host = host
+        self.remaining = remaining
+        super().__init__(f"{host} 网络不可用，熔断中（剩余 {remaining:.0f}s）")
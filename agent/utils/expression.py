@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+
+"""
+MultiRecognition 表达式编译模块
+
+逻辑表达式与 ROI 表达式只在首次出现时解析为语法树（按表达式字符串缓存），
+之后每帧只对语法树求值，不再做字符串替换或 eval。
+
+引用：
+    $0、$1...   nodes 数组中的节点（Ref("index", i)）
+    {NodeName}  其他已执行节点（Ref("node", name)）
+
+求值时通过 resolve(ref) 取得引用的识别区域（未命中为 None），
+只有表达式实际需要某个引用时才会调用 resolve，因此调用方可以在 resolve 中按需识别：
+    - AND 遇到 False、OR 遇到 True 时不再计算剩余操作数
+    - ROI 表达式只解析其中出现的引用
+
+逻辑表达式语法（优先级 NOT > AND > OR，与原先 eval 的行为一致）:
+    expr   := term ("OR" term)*
+    term   := factor ("AND" factor)*
+    factor := "NOT" factor | "(" expr ")" | ref
+
+ROI 表达式语法:
+    roi    := ref | "[" int "," int "," int "," int "]"
+            | "UNION(" roi "," roi ")" | "INTERSECTION(" roi "," roi ")"
+            | "OFFSET(" roi "," int "," int "," int "," int ")"
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+
+Rect = List[int]
+
+EMPTY_ROI = [0, 0, 0, 0]
+
+
+class Ref(NamedTuple):
+    kind: str  # "index" | "node"
+    key: Union[int, str]
+
+
+class Not(NamedTuple):
+    operand: "LogicNode"
+
+
+class And(NamedTuple):
+    operands: Tuple["LogicNode", ...]
+
+
+class Or(NamedTuple):
+    operands: Tuple["LogicNode", ...]
+
+
+class RoiLiteral(NamedTuple):
+    roi: Tuple[int, int, int, int]
+
+
+class RoiCall(NamedTuple):
+    func: str
+    args: Tuple
+
+
+LogicNode = Union[Ref, Not, And, Or]
+RoiNode = Union[Ref, RoiLiteral, RoiCall]
+Resolver = Callable[[Ref], Optional[Rect]]
+
+
+def roi_union(roi1: Rect, roi2: Rect) -> Rect:
+    """两个ROI的并集（空ROI不参与计算）"""
+    x1, y1, w1, h1 = roi1
+    x2, y2, w2, h2 = roi2
+
+    if w1 == 0 and h1 == 0:
+        return list(roi2)
+    elif w2 == 0 and h2 == 0:
+        return list(roi1)
+
+    left = min(x1, x2)
+    top = min(y1, y2)
+    right = max(x1 + w1, x2 + w2)
+    bottom = max(y1 + h1, y2 + h2)
+
+    return [left, top, right - left, bottom - top]
+
+
+def roi_intersection(roi1: Rect, roi2: Rect) -> Rect:
+    """两个ROI的交集，无交集时返回 [0, 0, 0, 0]"""
+    x1, y1, w1, h1 = roi1
+    x2, y2, w2, h2 = roi2
+
+    left = max(x1, x2)
+    top = max(y1, y2)
+    right = min(x1 + w1, x2 + w2)
+    bottom = min(y1 + h1, y2 + h2)
+
+    if left >= right or top >= bottom:
+        return list(EMPTY_ROI)
+
+    return [left, top, right - left, bottom - top]
+
+
+def roi_offset(roi: Rect, dx: int, dy: int, dw: int, dh: int) -> Rect:
+    """ROI偏移"""
+    x, y, w, h = roi
+    return [x + dx, y + dy, w + dw, h + dh]
+
+
+# 函数名 -> (ROI 参数个数, 整数参数个数, 实现)
+ROI_FUNCTIONS = {
+    "UNION": (2, 0, roi_union),
+    "INTERSECTION": (2, 0, roi_intersection),
+    "OFFSET": (1, 4, roi_offset),
+}
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"\$(?P<index>\d+)"
+    r"|\{(?P<node>[^{}]+)\}"
+    r"|(?P<int>-?\d+)"
+    r"|(?P<name>[A-Za-z_]\w*)"
+    r"|(?P<op>[()\[\],])"
+    r")"
+)
+
+
+def _tokenize(expression: str) -> List[Tuple[str, Union[int, str]]]:
+    tokens = []
+    pos = 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = _TOKEN_RE.match(expression, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"无法识别的字符: {expression[pos:]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind in ("index", "int"):
+            value = int(value)
+        elif kind == "node":
+            value = value.strip()
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+
+    def peek(self) -> Tuple[Optional[str], Union[int, str, None]]:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None, None
+
+    def take(self) -> Tuple[str, Union[int, str]]:
+        token = self.peek()
+        if token[0] is None:
+            raise ValueError("表达式不完整")
+        self.pos += 1
+        return token
+
+    def expect(self, op: str):
+        kind, value = self.take()
+        if kind != "op" or value != op:
+            raise ValueError(f"期望 {op!r}，得到 {value!r}")
+
+    def accept_keyword(self, keyword: str) -> bool:
+        kind, value = self.peek()
+        if kind == "name" and value.upper() == keyword:
+            self.pos += 1
+            return True
+        return False
+
+    def finish(self):
+        if self.pos != len(self.tokens):
+            raise ValueError(f"多余的内容: {self.tokens[self.pos][1]!r}")
+
+    # 逻辑表达式
+
+    def logic_or(self) -> LogicNode:
+        operands = [self.logic_and()]
+        while self.accept_keyword("OR"):
+            operands.append(self.logic_and())
+        return operands[0] if len(operands) == 1 else Or(tuple(operands))
+
+    def logic_and(self) -> LogicNode:
+        operands = [self.logic_not()]
+        while self.accept_keyword("AND"):
+            operands.append(self.logic_not())
+        return operands[0] if len(operands) == 1 else And(tuple(operands))
+
+    def logic_not(self) -> LogicNode:
+        if self.accept_keyword("NOT"):
+            return Not(self.logic_not())
+        kind, value = self.take()
+        if kind == "op" and value == "(":
+            node = self.logic_or()
+            self.expect(")")
+            return node
+        if kind == "index":
+            return Ref("index", value)
+        if kind == "node":
+            return Ref("node", value)
+        raise ValueError(f"逻辑表达式中不支持 {value!r}")
+
+    # ROI 表达式
+
+    def roi(self) -> RoiNode:
+        kind, value = self.take()
+        if kind == "index":
+            return Ref("index", value)
+        if kind == "node":
+            return Ref("node", value)
+        if kind == "op" and value == "[":
+            values = [self.integer()]
+            for _ in range(3):
+                self.expect(",")
+                values.append(self.integer())
+            self.expect("]")
+            return RoiLiteral(tuple(values))
+        if kind == "name":
+            func = value.upper()
+            if func not in ROI_FUNCTIONS:
+                raise ValueError(f"不支持的ROI函数: {value}")
+            roi_count, int_count, _ = ROI_FUNCTIONS[func]
+            self.expect("(")
+            args = [self.roi()]
+            for _ in range(roi_count - 1):
+                self.expect(",")
+                args.append(self.roi())
+            for _ in range(int_count):
+                self.expect(",")
+                args.append(self.integer())
+            kind, value = self.peek()
+            if kind == "op" and value == ",":
+                raise ValueError(
+                    f"{func}函数需要{roi_count + int_count}个参数，得到更多"
+                )
+            self.expect(")")
+            return RoiCall(func, tuple(args))
+        raise ValueError(f"ROI表达式中不支持 {value!r}")
+
+    def integer(self) -> int:
+        kind, value = self.take()
+        if kind != "int":
+            raise ValueError(f"期望整数，得到 {value!r}")
+        return value
+
+
+@lru_cache(maxsize=256)
+def compile_logic(expression: str) -> LogicNode:
+    """
+    编译逻辑表达式（按表达式字符串缓存）
+
+    Raises:
+        ValueError: 表达式语法错误
+    """
+    parser = _Parser(expression)
+    node = parser.logic_or()
+    parser.finish()
+    return node
+
+
+@lru_cache(maxsize=256)
+def compile_roi(expression: str) -> RoiNode:
+    """
+    编译ROI表达式（按表达式字符串缓存）
+
+    Raises:
+        ValueError: 表达式语法错误
+    """
+    parser = _Parser(expression)
+    node = parser.roi()
+    parser.finish()
+    return node
+
+
+def collect_refs(node) -> List[Ref]:
+    """语法树中出现的所有引用（按出现顺序）"""
+    if isinstance(node, Ref):
+        return [node]
+    if isinstance(node, Not):
+        return collect_refs(node.operand)
+    if isinstance(node, (And, Or)):
+        return [ref for operand in node.operands for ref in collect_refs(operand)]
+    if isinstance(node, RoiCall):
+        return [
+            ref
+            for arg in node.args
+            if not isinstance(arg, int)
+            for ref in collect_refs(arg)
+        ]
+    return []
+
+
+def evaluate_logic(node: LogicNode, resolve: Resolver) -> bool:
+    """短路求值逻辑表达式，引用命中（resolve 返回非 None）即为 True"""
+    if isinstance(node, Ref):
+        return resolve(node) is not None
+    if isinstance(node, Not):
+        return not evaluate_logic(node.operand, resolve)
+    if isinstance(node, And):
+        return all(evaluate_logic(operand, resolve) for operand in node.operands)
+    if isinstance(node, Or):
+        return any(evaluate_logic(operand, resolve) for operand in node.operands)
+    raise TypeError(f"未知的逻辑节点: {node!r}")
+
+
+def evaluate_roi(node: RoiNode, resolve: Resolver) -> Rect:
+    """计算ROI表达式，未命中的引用视为 [0, 0, 0, 0]"""
+    if isinstance(node, Ref):
+        roi = resolve(node)
+        return list(roi) if roi is not None else list(EMPTY_ROI)
+    if isinstance(node, RoiLiteral):
+        return list(node.roi)
+    if isinstance(node, RoiCall):
+        _, _, func = ROI_FUNCTIONS[node.func]
+        args = [
+            arg if isinstance(arg, int) else evaluate_roi(arg, resolve)
+            for arg in node.args
+        ]
+        return func(*args)
+    raise TypeError(f"未知的ROI节点: {node!r}")
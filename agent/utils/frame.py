@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+"""
+截图帧比较工具
+"""
+
+from typing import Optional
+
+import numpy as np
+
+
+def column_profile(image: np.ndarray) -> np.ndarray:
+    """图像的列投影（每列的平均亮度）"""
+    image = np.asarray(image, dtype=np.float32)
+    if image.ndim == 3:
+        return image.mean(axis=(0, 2))
+    return image.mean(axis=0)
+
+
+def estimate_scroll_offset(
+    previous: np.ndarray,
+    current: np.ndarray,
+    max_offset: int,
+    flat_std: float = 1.0,
+    min_margin: float = 0.05,
+    min_separation: int = 8,
+) -> Optional[int]:
+    """
+    用列投影互相关估计两帧之间的水平滚动距离
+
+    列表内容按固定间距重复时，滚动整数个间距的位置也会出现相近的峰值，
+    此时无法区分真实距离，返回 None（调用方应按未知处理，而不是视为未滚动）。
+
+    Args:
+        previous: 上一帧（同一 ROI 的截图区域）
+        current: 当前帧
+        max_offset: 最大滚动距离（像素）
+        flat_std: 列投影标准差低于该值时视为无内容
+        min_margin: 最高峰需比相距 min_separation 以外的其他峰高出的相关系数
+        min_separation: 视为同一个峰的偏移范围（像素）
+
+    Returns:
+        Optional[int]: 内容向左移动的像素数，0 表示未滚动；无内容或峰值不唯一时返回 None
+    """
+    prev_profile = column_profile(previous)
+    curr_profile = column_profile(current)
+    width = min(len(prev_profile), len(curr_profile))
+    max_offset = max(0, min(max_offset, width - 2))
+
+    if prev_profile[:width].std() < flat_std or curr_profile[:width].std() < flat_std:
+        return None
+
+    scores = np.full(max_offset + 1, -np.inf)
+    for offset in range(max_offset + 1):
+        # 上一帧 x 处的内容滚动后出现在当前帧 x - offset 处
+        a = prev_profile[offset:width]
+        b = curr_profile[: width - offset]
+        a = a - a.mean()
+        b = b - b.mean()
+        denominator = np.sqrt(np.dot(a, a) * np.dot(b, b))
+        if denominator <= 1e-6:
+            continue
+        scores[offset] = np.dot(a, b) / denominator
+
+    # 分数相同时取较小的偏移
+    best_offset = int(np.argmax(scores))
+    best_score = scores[best_offset]
+    if not np.isfinite(best_score):
+        return None
+
+    offsets = np.arange(max_offset + 1)
+    others = scores[np.abs(offsets - best_offset) > min_separation]
+    if others.size and others.max() > best_score - min_margin:
+        return None
+    return best_offset
+
+
+def frame_difference(
+    previous: np.ndarray, current: np.ndarray, roi=None, samples: int = 48
+) -> float:
+    """
+    两帧在 ROI 内的平均差异（降采样后逐像素比较）
+
+    Args:
+        previous: 上一帧
+        current: 当前帧
+        roi: [x, y, w, h]，None 表示整个画面
+        samples: 短边的采样点数，越小越快
+
+    Returns:
+        float: 平均每通道差值（0~255），尺寸不同时返回 inf
+    """
+    if previous.shape != current.shape:
+        return float("inf")
+    if roi is not None:
+        x, y, w, h = roi
+        x, y = max(0, x), max(0, y)
+        previous = previous[y : y + h, x : x + w]
+        current = current[y : y + h, x : x + w]
+    if previous.size == 0:
+        return 0.0
+    step = max(1, min(previous.shape[:2]) // samples)
+    a = previous[::step, ::step].astype(np.int16)
+    b = current[::step, ::step].astype(np.int16)
+    return float(np.abs(a - b).mean())
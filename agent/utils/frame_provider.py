@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+截图新鲜度缓存
+
+自定义动作开始时往往立即 post_screencap()，而 pipeline 刚为该节点的识别截过图；
+ADB 下每次截图耗时 30~150ms。FrameProvider 记录最近一次截图的时间，
+调用方给出可接受的最大帧龄 max_age，足够新时直接返回 cached_image，否则重新截图。
+
+帧是否过期由两方面判断：
+    - controller 事件（见 custom/hooks）：screencap 成功时记录截图时间，
+      点击、滑动、按键等输入动作开始时当前帧作废
+    - 帧龄：超过 max_age 的截图不复用。框架在动作连续提交时可能不发送部分事件，
+      此时只能依靠帧龄，max_age 即漏掉事件时可能复用旧帧的最长时间，应保持较小
+
+max_age 为 0（默认）时总是截图，轮询等待画面变化的地方应保持默认值。
+"""
+
+import time
+import threading
+from typing import Optional
+
+import numpy as np
+
+from . import logger
+
+# 动作开始时复用节点识别所用截图的最大帧龄（秒）
+NODE_FRAME_MAX_AGE = 0.5
+
+# 不会改变画面的 controller 动作
+_PASSIVE_ACTIONS = {"screencap", "connect", "shell"}
+
+
+class FrameProvider:
+    """按最大帧龄复用最近一次截图"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 最近一次截图的时间（time.monotonic），None 表示当前帧已作废
+        self._captured_at: Optional[float] = None
+        self.captured = 0
+        self.reused = 0
+
+    def on_controller_notification(self, msg: str, details: dict):
+        """controller 事件回调"""
+        action = details.get("action", "")
+        with self._lock:
+            if action == "screencap":
+                if msg == "Controller.Action.Succeeded":
+                    self._captured_at = time.monotonic()
+            elif action not in _PASSIVE_ACTIONS and msg == "Controller.Action.Starting":
+                self._captured_at = None
+
+    def frame_age(self) -> Optional[float]:
+        """当前帧的帧龄（秒），帧已作废或未知时返回 None"""
+        with self._lock:
+            if self._captured_at is None:
+                return None
+            return time.monotonic() - self._captured_at
+
+    def _mark_captured(self):
+        with self._lock:
+            self._captured_at = time.monotonic()
+
+    def get_frame(self, context, max_age: float = 0.0) -> np.ndarray:
+        """
+        获取截图：最近一次截图不超过 max_age 秒且未因输入动作作废时直接复用
+
+        Args:
+            context: maa Context
+            max_age: 可接受的最大帧龄（秒），0 表示总是重新截图
+
+        Returns:
+            np.ndarray: BGR 截图
+        """
+        controller = context.tasker.controller
+        age = self.frame_age() if max_age > 0 else None
+        if age is not None and age <= max_age:
+            try:
+                image = controller.cached_image
+            except RuntimeError:
+                image = None
+            if image is not None and image.size:
+                self.reused += 1
+                return image
+
+        image = controller.post_screencap().wait().get()
+        self._mark_captured()
+        self.captured += 1
+        return image
+
+    def log_stats(self):
+        """输出并清零截图复用统计"""
+        captured, reused = self.captured, self.reused
+        self.captured = self.reused = 0
+        if reused:
+            logger.debug(f"截图复用 {reused}/{captured + reused} 次")
+
+
+_provider: Optional[FrameProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_frame_provider() -> FrameProvider:
+    """获取进程内共享的截图缓存（懒加载）"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = FrameProvider()
+    return _provider
+
+
+def get_frame(context, max_age: float = 0.0) -> np.ndarray:
+    """get_frame_provider().get_frame 的简写"""
+    return get_frame_provider().get_frame(context, max_age)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""
+OCR 文本纠错用的模糊匹配索引
+
+原先纠错时对每个识别出的文本与全部有效名称逐个计算编辑距离，
+开销为 O(名称数 × 长度²)，且随版本内容增加而增长。
+
+FuzzyIndex 在构建时为名称建立字符倒排索引，查询分三步：
+    1. 长度过滤：编辑距离不超过 k 的两个字符串长度差不超过 k
+    2. 字符计数过滤：编辑距离不超过 k 时，两者共有的字符数（按多重集合计）
+       至少为 max(len(a), len(b)) - k，通过倒排索引一次累计得到
+    3. 对剩余候选计算有界编辑距离（超过当前最优值即提前终止）
+中文名称字符集大，第 2 步通常只剩个位数候选。
+查询结果保存在 LRU 缓存中，同一文本在后续页面/商店中再次出现时直接返回。
+
+用法:
+    index = FuzzyIndex(names)
+    match = index.match("识別文本")  # (名称, 距离) 或 None
+"""
+
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 默认缓存的查询数
+CACHE_SIZE = 1024
+
+
+def edit_distance(s1: str, s2: str, max_distance: Optional[int] = None) -> int:
+    """
+    计算编辑距离
+
+    Args:
+        max_distance: 距离上限，超过时提前返回 max_distance + 1
+
+    Returns:
+        int: 编辑距离（超过上限时为 max_distance + 1）
+    """
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if max_distance is not None and len(s1) - len(s2) > max_distance:
+        return max_distance + 1
+    if len(s2) == 0:
+        return len(s1)
+
+    previous_row = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        if max_distance is not None and min(current_row) > max_distance:
+            return max_distance + 1
+        previous_row = current_row
+
+    return previous_row[-1]
+
+
+def default_max_distance(text: str) -> int:
+    """默认只接受距离不超过文本长度一半的匹配"""
+    return len(text) // 2
+
+
+class FuzzyIndex:
+    """字符倒排索引 + 有界编辑距离验证的模糊匹配"""
+
+    def __init__(self, names: Iterable[str], cache_size: int = CACHE_SIZE):
+        # 排序后编号，距离相同时按名称顺序取第一个，结果与遍历顺序无关
+        self.names: Tuple[str, ...] = tuple(sorted(set(names)))
+        self._name_set = frozenset(self.names)
+        # 字符 -> [(名称编号, 该字符在名称中的个数)]
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        for name_id, name in enumerate(self.names):
+            for char, count in Counter(name).items():
+                self._postings.setdefault(char, []).append((name_id, count))
+
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, text: str) -> bool:
+        return text in self._name_set
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _candidates(self, text: str, max_distance: int) -> List[int]:
+        """通过长度和共有字符数过滤后的候选名称编号"""
+        overlaps: Dict[int, int] = {}
+        for char, count in Counter(text).items():
+            for name_id, name_count in self._postings.get(char, ()):
+                overlaps[name_id] = overlaps.get(name_id, 0) + min(count, name_count)
+
+        candidates = []
+        for name_id, overlap in overlaps.items():
+            length = len(self.names[name_id])
+            if abs(length - len(text)) > max_distance:
+                continue
+            if overlap < max(length, len(text)) - max_distance:
+                continue
+            candidates.append(name_id)
+        candidates.sort()
+        return candidates
+
+    def _search(self, text: str, max_distance: int) -> Optional[Tuple[str, int]]:
+        if text in self._name_set:
+            return text, 0
+        if max_distance <= 0:
+            return None
+
+        best: Optional[Tuple[str, int]] = None
+        bound = max_distance
+        for name_id in self._candidates(text, max_distance):
+            name = self.names[name_id]
+            distance = edit_distance(text, name, bound)
+            if distance <= bound and (best is None or distance < best[1]):
+                best = (name, distance)
+                if distance == 1:
+                    break
+                bound = distance - 1
+        return best
+
+    def match(
+        self, text: str, max_distance: Optional[int] = None
+    ) -> Optional[Tuple[str, int]]:
+        """
+        查找与 text 编辑距离最小的名称
+
+        Args:
+            text: 识别出的文本
+            max_distance: 可接受的最大编辑距离，None 时为 len(text) // 2
+
+        Returns:
+            (名称, 编辑距离)，没有距离不超过 max_distance 的名称时返回 None
+        """
+        if max_distance is None:
+            max_distance = default_max_distance(text)
+        key = (text, max_distance)
+
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        result = self._search(text, max_distance)
+
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def correct(self, text: str, max_distance: Optional[int] = None) -> Optional[str]:
+        """match 的简写，只返回名称"""
+        result = self.match(text, max_distance)
+        return result[0] if result else None
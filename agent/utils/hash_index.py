@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""
+本地文件哈希索引
+
+以相对路径为键，持久化保存 (size, mtime_ns, inode, sha256)。
+文件 stat 与索引记录一致时直接信任缓存的哈希，不一致时才重新计算，
+避免每次热更新检查都重新读取并哈希所有本地资源文件。
+"""
+
+import os
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+from . import logger
+
+HASH_INDEX_FILE = Path("./config/hash_index.db")
+
+
+def calculate_file_hash(file_path: Path) -> str:
+    """
+    Calculate SHA256 hash of a file.
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Hex string of SHA256 hash
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        # Read in chunks to handle large files
+        for chunk in iter(lambda: f.read(8192), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _stat_key(st: os.stat_result) -> tuple:
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+class HashIndex:
+    """基于 SQLite 的文件哈希索引（线程安全）"""
+
+    def __init__(self, db_path: Path = HASH_INDEX_FILE):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                str(db_path), check_same_thread=False, isolation_level=None
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+                "inode INTEGER, sha256 TEXT) WITHOUT ROWID"
+            )
+        except sqlite3.Error as e:
+            logger.debug(f"打开哈希索引失败，将直接计算哈希: {e}")
+            self._conn = None
+
+    def _lookup(self, rel_path: str) -> Optional[tuple]:
+        if self._conn is None:
+            return None
+        try:
+            with self._lock:
+                return self._conn.execute(
+                    "SELECT size, mtime_ns, inode, sha256 FROM files WHERE path = ?",
+                    (rel_path,),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug(f"读取哈希索引失败: {rel_path}: {e}")
+            return None
+
+    def _store(self, rel_path: str, st: os.stat_result, sha256: str):
+        if self._conn is None:
+            return
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                    (rel_path, *_stat_key(st), sha256),
+                )
+        except sqlite3.Error as e:
+            logger.debug(f"写入哈希索引失败: {rel_path}: {e}")
+
+    def get_hash(self, rel_path: str, file_path: Path) -> str:
+        """
+        获取文件哈希，stat 未变化时使用索引中的缓存值
+
+        Args:
+            rel_path: 相对路径（索引键）
+            file_path: 文件实际路径
+
+        Returns:
+            SHA256 十六进制字符串
+        """
+        st = file_path.stat()
+        row = self._lookup(rel_path)
+        if row is not None and tuple(row[:3]) == _stat_key(st):
+            self.hits += 1
+            return row[3]
+
+        self.misses += 1
+        sha256 = calculate_file_hash(file_path)
+        # 哈希计算期间文件被修改时不写入索引
+        if _stat_key(file_path.stat()) == _stat_key(st):
+            self._store(rel_path, st, sha256)
+        return sha256
+
+    def record(self, rel_path: str, file_path: Path, sha256: str):
+        """文件下载替换成功后记录其哈希"""
+        try:
+            st = file_path.stat()
+        except OSError:
+            return
+        self._store(rel_path, st, sha256)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_index: Optional[HashIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_hash_index() -> HashIndex:
+    """获取进程内共享的哈希索引（懒加载）"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = HashIndex()
+    return _index
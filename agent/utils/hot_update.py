@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+"""
+后台热更新模块
+
+AgentServer 启动后在后台线程中检查并下载资源更新，文件先写入暂存目录，
+在下一个任务结束（任务间隙）或下次启动时再统一应用到项目目录，
+使首个动作的响应时间不再受 CDN 延迟影响。
+
+状态写入 config/hot_update_status.json，供 UI 轮询。
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from . import logger
+
+# 暂存目录与暂存清单
+STAGING_DIR = Path("./config/hot_update_staging")
+STAGED_FILE = STAGING_DIR / "staged.json"
+# 状态文件（供 UI 轮询）
+STATUS_FILE = Path("./config/hot_update_status.json")
+
+# 热更新模式
+MODE_BLOCKING = "blocking"  # 启动时等待热更新完成（在启动期限内）
+MODE_BACKGROUND = "background"  # AgentServer 启动后在后台热更新
+
+_apply_lock = threading.Lock()
+_staged_pending = threading.Event()
+
+
+def write_status(state: str, **fields):
+    """
+    写入热更新状态文件
+
+    Args:
+        state: 状态，checking / downloading / staged / applied / up_to_date / failed
+        **fields: 其他字段，如 staged_files、applied_files、error
+    """
+    status = {"state": state, "updated_at": int(time.time()), "error": ""}
+    status.update(fields)
+    try:
+        STATUS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f".{STATUS_FILE.name}.", suffix=".tmp", dir=STATUS_FILE.parent
+        )
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(status, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, STATUS_FILE)
+    except Exception as e:
+        logger.debug(f"写入热更新状态失败: {e}")
+
+
+def _load_staged() -> Optional[Dict]:
+    if not STAGED_FILE.exists():
+        return None
+    try:
+        with open(STAGED_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.debug(f"读取暂存清单失败: {e}")
+        return None
+
+
+def stage_files(staged_files: Dict[str, str], manifest_result: Dict):
+    """
+    记录已下载到暂存目录的文件，等待任务间隙或下次启动时应用
+
+    已有未应用的暂存清单时合并，manifest 结果以本次为准。
+
+    Args:
+        staged_files: 暂存的文件路径 -> SHA256
+        manifest_result: manifest 检查结果，应用完成后保存为缓存
+    """
+    with _apply_lock:
+        staged = _load_staged() or {}
+        files = staged.get("files", {})
+        files.update(staged_files)
+        STAGING_DIR.mkdir(parents=True, exist_ok=True)
+        with open(STAGED_FILE, "w", encoding="utf-8") as f:
+            json.dump(
+                {"files": files, "manifest_result": manifest_result},
+                f,
+                ensure_ascii=False,
+            )
+        _staged_pending.set()
+
+
+def has_staged_update() -> bool:
+    """是否有待应用的暂存更新"""
+    return _staged_pending.is_set() or STAGED_FILE.exists()
+
+
+def apply_staged_update() -> Dict:
+    """
+    将暂存目录中的文件逐个以 os.replace 移入项目目录，并保存 manifest 缓存
+
+    应用中断时暂存清单保留，下次调用会跳过已移走的文件继续应用。
+
+    Returns:
+        dict: {
+            "applied_files": List[str],  # 已应用的文件列表
+            "error": str,  # 错误信息
+        }
+    """
+    result = {"applied_files": [], "error": ""}
+
+    with _apply_lock:
+        staged = _load_staged()
+        if staged is None:
+            _staged_pending.clear()
+            return result
+
+        from .hash_index import get_hash_index
+        from .manifest_checker import save_manifest_cache_from_result
+
+        project_root = Path.cwd()
+        hash_index = get_hash_index()
+
+        try:
+            for file_path_str, file_hash in staged.get("files", {}).items():
+                src = STAGING_DIR / file_path_str
+                if not src.exists():
+                    # 上次应用中断时已移走
+                    continue
+                dst = project_root / file_path_str
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(src, dst)
+                hash_index.record(file_path_str, dst, file_hash)
+                result["applied_files"].append(file_path_str)
+
+            save_manifest_cache_from_result(staged.get("manifest_result", {}))
+            STAGED_FILE.unlink()
+            shutil.rmtree(STAGING_DIR, ignore_errors=True)
+            _staged_pending.clear()
+        except Exception as e:
+            result["error"] = f"应用暂存更新失败: {e}"
+            logger.warning(result["error"])
+            write_status("failed", error=result["error"])
+            return result
+
+    if result["applied_files"]:
+        logger.info(f"已应用后台热更新，共更新 {len(result['applied_files'])} 个文件")
+    write_status("applied", applied_files=len(result["applied_files"]))
+    return result
+
+
+def _background_update():
+    """后台热更新线程：检查 manifest，下载到暂存目录"""
+    from .manifest_checker import (
+        check_manifest_updates,
+        save_manifest_cache_from_result,
+    )
+    from .resource_updater import check_and_update_resources
+
+    write_status("checking")
+    manifest_result = check_manifest_updates()
+
+    if manifest_result["success"] and not manifest_result["has_any_update"]:
+        logger.debug("资源无更新，跳过后台热更新")
+        save_manifest_cache_from_result(manifest_result)
+        write_status("up_to_date")
+        return
+
+    write_status("downloading")
+    manifests = (
+        manifest_result.get("updated_manifests") if manifest_result["success"] else None
+    )
+    update_result = check_and_update_resources(
+        resource_manifests=manifests or None, staging_dir=STAGING_DIR
+    )
+    staged_files = update_result.get("staged_files", {})
+
+    if not staged_files:
+        if update_result.get("error"):
+            write_status("failed", error=update_result["error"])
+        else:
+            save_manifest_cache_from_result(manifest_result)
+            write_status("up_to_date")
+        return
+
+    stage_files(staged_files, manifest_result)
+    write_status(
+        "staged",
+        staged_files=len(staged_files),
+        error=update_result.get("error", ""),
+    )
+
+
+def start_background_update() -> Optional[threading.Thread]:
+    """启动后台热更新线程（已有未应用的暂存更新时跳过）"""
+    if has_staged_update():
+        logger.debug("存在未应用的暂存更新，跳过本次后台热更新")
+        return None
+
+    def runner():
+        try:
+            _background_update()
+        except Exception as e:
+            logger.exception("后台热更新发生异常")
+            write_status("failed", error=str(e))
+
+    thread = threading.Thread(target=runner, name="hot-update", daemon=True)
+    thread.start()
+    return thread
+
+
+def register_task_boundary_apply():
+    """注册任务器事件监听：每个任务结束时应用已暂存的更新"""
+    from maa.agent.agent_server import AgentServer
+    from maa.event_sink import NotificationType
+    from maa.tasker import TaskerEventSink
+
+    class StagedUpdateSink(TaskerEventSink):
+        def on_tasker_task(self, tasker, noti_type, detail):
+            if noti_type not in (NotificationType.Succeeded, NotificationType.Failed):
+                return
+            # 重启后内存中的标记为空，以暂存清单文件为准
+            if has_staged_update():
+                logger.debug(f"任务 {detail.entry} 结束，应用暂存的热更新")
+                apply_staged_update()
+
+    AgentServer.add_tasker_sink(StagedUpdateSink())
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+"""
+共享 HTTP 会话模块
+
+agent 内所有 HTTP 请求（版本检查、manifest 检查、资源热更新、掉落上报）
+共用带连接池的 requests.Session，避免每次请求都重新建立 TCP/TLS 连接。
+
+离线处理：
+    - 按主机熔断：某主机首次出现连接失败/连接超时后，冷却期内对该主机的请求
+      直接抛出 CircuitOpenError（继承自 requests ConnectionError），不再逐个等待超时。
+      读取超时说明主机可达（只是响应慢），不触发熔断，交给调用方按文件重试。
+    - 快速连通性探测：probe() 以短超时尝试 TCP 连接，失败同样触发熔断。
+"""
+
+import time
+import socket
+import threading
+import requests
+from typing import Dict
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.request import ACCEPT_ENCODING
+from . import logger
+from .exceptions import CircuitOpenError
+
+# 连接池大小（与并发线程数保持一致）
+POOL_SIZE = 8
+
+# 熔断冷却时间（秒）
+CIRCUIT_COOLDOWN = 60
+# 连通性探测超时（秒）
+PROBE_TIMEOUT = 1.5
+
+
+class CircuitBreaker:
+    """按主机记录连接失败，冷却期内直接拒绝请求"""
+
+    def __init__(self, cooldown: float = CIRCUIT_COOLDOWN):
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._open_until: Dict[str, float] = {}
+        self._reachable_at: Dict[str, float] = {}
+
+    def check(self, host: str):
+        """熔断中时抛出 CircuitOpenError"""
+        with self._lock:
+            open_until = self._open_until.get(host)
+        if open_until is not None:
+            remaining = open_until - time.monotonic()
+            if remaining > 0:
+                raise CircuitOpenError(host, remaining)
+
+    def is_open(self, host: str) -> bool:
+        try:
+            self.check(host)
+            return False
+        except CircuitOpenError:
+            return True
+
+    def record_failure(self, host: str, error: Exception):
+        with self._lock:
+            already_open = self._open_until.get(host, 0) > time.monotonic()
+            self._open_until[host] = time.monotonic() + self.cooldown
+            self._reachable_at.pop(host, None)
+        if not already_open:
+            logger.debug(
+                f"连接 {host} 失败，{self.cooldown}s 内跳过对该主机的请求: {error}"
+            )
+
+    def record_success(self, host: str):
+        with self._lock:
+            self._open_until.pop(host, None)
+            self._reachable_at[host] = time.monotonic()
+
+    def recently_reachable(self, host: str) -> bool:
+        with self._lock:
+            reachable_at = self._reachable_at.get(host)
+        return (
+            reachable_at is not None and time.monotonic() - reachable_at < self.cooldown
+        )
+
+
+circuit_breaker = CircuitBreaker()
+
+
+def _host_of(url: str) -> str:
+    return urlsplit(url).netloc
+
+
+def _is_connect_failure(error: requests.exceptions.RequestException) -> bool:
+    """
+    是否为连接失败（包括 ConnectTimeout，它同时继承 ConnectionError）
+
+    ReadTimeout 不继承 ConnectionError；读取响应体时的超时会被 requests
+    包装为 ConnectionError(ReadTimeoutError)，同样排除。
+    """
+    if not isinstance(error, requests.exceptions.ConnectionError):
+        return False
+    return not (error.args and isinstance(error.args[0], ReadTimeoutError))
+
+
+class _CircuitBreakerSession(requests.Session):
+    """请求前检查熔断状态，连接失败/连接超时时触发熔断"""
+
+    def request(self, method, url, *args, **kwargs):
+        host = _host_of(url)
+        circuit_breaker.check(host)
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if _is_connect_failure(e):
+                circuit_breaker.record_failure(host, e)
+            raise
+        circuit_breaker.record_success(host)
+        return response
+
+
+_sessions: Dict[bool, requests.Session] = {}
+_session_lock = threading.Lock()
+
+
+def _create_session(use_proxy: bool) -> requests.Session:
+    session = _CircuitBreakerSession()
+    # 默认不使用系统代理（国内服务器直连更快）
+    session.trust_env = use_proxy
+    # 声明本地可解码的压缩格式（gzip/deflate，安装 zstandard/brotli 时包含 zstd/br）
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(use_proxy: bool = False) -> requests.Session:
+    """
+    获取进程内共享的 Session（线程安全，懒加载）
+
+    Args:
+        use_proxy: 是否使用系统代理设置（环境变量等）
+    """
+    session = _sessions.get(use_proxy)
+    if session is None:
+        with _session_lock:
+            session = _sessions.get(use_proxy)
+            if session is None:
+                session = _sessions[use_proxy] = _create_session(use_proxy)
+                logger.debug(
+                    f"已创建共享 HTTP 会话，连接池大小: {POOL_SIZE}，"
+                    f"使用系统代理: {use_proxy}，Accept-Encoding: {ACCEPT_ENCODING}"
+                )
+    return session
+
+
+def probe(url: str, timeout: float = PROBE_TIMEOUT) -> bool:
+    """
+    快速探测主机是否可连接（TCP 连接，短超时）
+
+    熔断中直接返回 False；冷却期内探测或请求成功过则直接返回 True。
+    """
+    parts = urlsplit(url)
+    host = parts.netloc
+    if circuit_breaker.is_open(host):
+        return False
+    if circuit_breaker.recently_reachable(host):
+        return True
+
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        with socket.create_connection((parts.hostname, port), timeout=timeout):
+            pass
+    except OSError as e:
+        circuit_breaker.record_failure(host, e)
+        return False
+    circuit_breaker.record_success(host)
+    return True
+
+
+def ensure_reachable(url: str, timeout: float = PROBE_TIMEOUT):
+    """探测失败时抛出 CircuitOpenError"""
+    if not probe(url, timeout):
+        raise CircuitOpenError(_host_of(url), circuit_breaker.cooldown)
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""
+弹窗中断分发
+
+原先处理弹窗时对每个中断节点各截一次图、各识别一次，无弹窗时
+（最常见的情况）约 12 种弹窗就要 12 次截图加 12 次识别。
+
+InterruptDispatcher 只取一帧（可复用节点识别所用的截图），在这一帧上按配置顺序
+逐个识别，返回第一个命中的节点，保持原先"列表靠前者优先"的语义。
+识别结果经 recognition_memo 缓存，同一帧上重复检查（如重试循环中）不再重复识别。
+
+不使用 Or 识别合并判断：MaaFW 5.3 的 Python 绑定无法解析 Or 的识别详情
+（AlgorithmEnum 中没有 Or，context.run_recognition 抛出 ValueError）。
+"""
+
+import threading
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import logger
+from . import recognition_memo
+from .frame_provider import get_frame
+
+
+class InterruptDispatcher:
+    """单帧弹窗检测与执行"""
+
+    def find(
+        self,
+        context,
+        interrupts: Sequence[str],
+        image: Optional[np.ndarray] = None,
+        max_age: float = 0.0,
+    ) -> Optional[Tuple[str, object]]:
+        """
+        在一帧上检测中断节点
+
+        Args:
+            interrupts: 中断节点名（按优先级排列）
+            image: 使用的截图，None 时通过 get_frame(context, max_age) 获取
+
+        Returns:
+            (节点名, 识别详情)，没有命中时返回 None
+        """
+        if not interrupts:
+            return None
+        if image is None:
+            image = get_frame(context, max_age)
+
+        for name in interrupts:
+            reco_detail = recognition_memo.run_recognition(context, name, image)
+            if reco_detail and reco_detail.hit:
+                return name, reco_detail
+        return None
+
+    def dispatch(
+        self,
+        context,
+        interrupts: Sequence[str],
+        image: Optional[np.ndarray] = None,
+        max_age: float = 0.0,
+    ) -> Optional[str]:
+        """
+        检测中断节点并执行第一个命中的节点
+
+        Returns:
+            执行的节点名，没有命中时返回 None
+        """
+        found = self.find(context, interrupts, image, max_age)
+        if found is None:
+            return None
+        name, _ = found
+        logger.debug(f"检测到弹窗，执行节点: {name}")
+        context.run_task(name)
+        return name
+
+
+_dispatcher: Optional[InterruptDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_interrupt_dispatcher() -> InterruptDispatcher:
+    """获取进程内共享的中断分发器（懒加载）"""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = InterruptDispatcher()
+    return _dispatcher
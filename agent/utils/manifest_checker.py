@@ -11,16 +11,22 @@ import json
 import requests
 from pathlib import Path
 from typing import Dict, List, Optional, Set
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from . import logger
+from .http_client import get_session, ensure_reachable
 
 # 配置
 MANIFEST_URL = "https://api.1999.fan/api/manifest.json"
 API_BASE_URL = "https://api.1999.fan/api"
 CACHE_FILE = Path("./config/manifest_cache.json")
+ROOT_MANIFEST = "manifest.json"
 REQUEST_TIMEOUT = 5
 
-# 不使用系统代理（国内服务器直连更快）
-NO_PROXY = {"http": "", "https": ""}
+# manifest 树遍历的最大并发数
+MAX_WORKERS = 8
+
+# HTTP 缓存中每个 manifest 保存的字段
+HTTP_CACHE_FIELDS = ("updated", "has_files", "directories", "etag", "last_modified")
 
 # 忽略的目录（不需要热更新）
 IGNORED_DIRS = {"images"}
@@ -37,10 +43,20 @@ def _load_cache() -> Dict:
                 "manifest.json": int,
                 "resource/manifest.json": int,
                 ...
+            },
+            "http": {
+                "resource/manifest.json": {
+                    "updated": int,
+                    "has_files": bool,
+                    "directories": List[str],
+                    "etag": str,
+                    "last_modified": str,
+                },
+                ...
             }
         }
     """
-    default = {"root_updated": 0, "manifests": {}}
+    default = {"root_updated": 0, "manifests": {}, "http": {}}
     if not CACHE_FILE.exists():
         return default
     try:
@@ -49,6 +65,7 @@ def _load_cache() -> Dict:
             # 兼容旧格式
             if "manifests" not in data:
                 return default
+            data.setdefault("http", {})
             return data
     except Exception:
         return default
@@ -75,78 +92,172 @@ def _is_ignored_path(manifest_path: str) -> bool:
     return False
 
 
+def _manifest_summary(manifest: Dict, is_root: bool = False) -> Dict:
+    """提取 manifest 中增量检查所需的字段（用于缓存，304 时复用）"""
+    directories = []
+    for dir_info in manifest.get("directories", []):
+        sub_manifest = dir_info.get("manifest", "")
+        if not sub_manifest:
+            continue
+        if is_root and dir_info.get("name") in IGNORED_DIRS:
+            logger.debug(f"跳过忽略的目录: {dir_info.get('name')}")
+            continue
+        directories.append(sub_manifest)
+
+    return {
+        "updated": manifest.get("updated", 0),
+        "has_files": bool(manifest.get("files")),
+        "directories": directories,
+    }
+
+
+def _fetch_manifest(manifest_path: str, http_cache: Dict[str, Dict]) -> Dict:
+    """
+    使用条件请求获取 manifest 摘要
+
+    本地缓存有 ETag/Last-Modified 时携带 If-None-Match/If-Modified-Since，
+    服务器返回 304 时直接复用缓存的摘要。
+
+    Returns:
+        dict: {
+            "updated": int,
+            "has_files": bool,
+            "directories": List[str],
+            "etag": str,
+            "last_modified": str,
+            "not_modified": bool,
+        }
+    """
+    if manifest_path == ROOT_MANIFEST:
+        url = MANIFEST_URL
+    else:
+        url = f"{API_BASE_URL}/{manifest_path}"
+
+    cached = http_cache.get(manifest_path)
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    response = get_session().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 304 and cached:
+        return dict(cached, not_modified=True)
+    response.raise_for_status()
+
+    entry = _manifest_summary(response.json(), is_root=manifest_path == ROOT_MANIFEST)
+    entry["etag"] = response.headers.get("ETag", "")
+    entry["last_modified"] = response.headers.get("Last-Modified", "")
+    entry["not_modified"] = False
+    return entry
+
+
+def _to_http_cache_entry(entry: Dict) -> Dict:
+    return {key: entry[key] for key in HTTP_CACHE_FIELDS}
+
+
+def _carry_unchanged_subtree(
+    entry: Dict,
+    local_manifests: Dict[str, int],
+    http_cache: Dict[str, Dict],
+    collected_manifests: Dict[str, int],
+    collected_http: Dict[str, Dict],
+):
+    """
+    manifest 无更新时，沿用其整棵子树的本地时间戳与 HTTP 缓存（不再发请求）
+    """
+    stack = list(entry.get("directories", []))
+    while stack:
+        sub_manifest = stack.pop()
+        if _is_ignored_path(sub_manifest) or sub_manifest not in local_manifests:
+            continue
+        collected_manifests[sub_manifest] = local_manifests[sub_manifest]
+        cached = http_cache.get(sub_manifest)
+        if cached:
+            collected_http[sub_manifest] = cached
+            stack.extend(cached.get("directories", []))
+
+
 def _collect_updated_manifests(
-    manifest_path: str,
+    manifest_paths: List[str],
     local_manifests: Dict[str, int],
+    http_cache: Dict[str, Dict],
     collected_manifests: Dict[str, int],
+    collected_http: Dict[str, Dict],
     updated_manifests: List[str],
-) -> bool:
+):
     """
-    递归检查 manifest 是否需要更新
+    并发遍历 manifest 树，收集需要更新的 manifest
+
+    同一层及不同子树的请求并发进行（最多 MAX_WORKERS 个），
+    仅对时间戳变化的 manifest 继续展开子目录。
 
     Args:
-        manifest_path: manifest 路径
+        manifest_paths: 起始 manifest 路径列表
         local_manifests: 本地缓存的 manifest 时间戳
+        http_cache: 本地缓存的 manifest 摘要与 ETag/Last-Modified
         collected_manifests: 收集到的远程 manifest 时间戳
+        collected_http: 收集到的 manifest 摘要与 ETag/Last-Modified
         updated_manifests: 需要更新的 manifest 路径列表
-
-    Returns:
-        bool: 是否成功
     """
-    # 跳过忽略的目录
-    if _is_ignored_path(manifest_path):
-        logger.debug(f"跳过忽略的 manifest: {manifest_path}")
-        return True
-
-    try:
-        url = f"{API_BASE_URL}/{manifest_path}"
-        response = requests.get(url, timeout=REQUEST_TIMEOUT, proxies=NO_PROXY)
-        response.raise_for_status()
-        manifest = response.json()
-
-        remote_updated = manifest.get("updated", 0)
-        local_updated = local_manifests.get(manifest_path, 0)
-        collected_manifests[manifest_path] = remote_updated
-
-        # 检查是否需要更新
-        if remote_updated > local_updated:
-            # 如果这个 manifest 包含文件，则需要更新
-            if manifest.get("files"):
-                updated_manifests.append(manifest_path)
-                logger.debug(
-                    f"manifest 需要更新: {manifest_path} ({local_updated} → {remote_updated})"
-                )
-
-            # 递归检查子目录
-            for dir_info in manifest.get("directories", []):
-                sub_manifest = dir_info.get("manifest", "")
-                if sub_manifest:
-                    _collect_updated_manifests(
-                        sub_manifest,
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        pending = {}
+
+        def submit(manifest_path: str):
+            # 跳过忽略的目录
+            if _is_ignored_path(manifest_path):
+                logger.debug(f"跳过忽略的 manifest: {manifest_path}")
+                return
+            future = executor.submit(_fetch_manifest, manifest_path, http_cache)
+            pending[future] = manifest_path
+
+        for manifest_path in manifest_paths:
+            submit(manifest_path)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                manifest_path = pending.pop(future)
+                try:
+                    entry = future.result()
+                except requests.exceptions.RequestException as e:
+                    logger.debug(f"获取 manifest 失败: {manifest_path}: {e}")
+                    continue
+                except Exception as e:
+                    logger.debug(f"处理 manifest 异常: {manifest_path}: {e}")
+                    continue
+
+                remote_updated = entry["updated"]
+                local_updated = local_manifests.get(manifest_path, 0)
+                collected_manifests[manifest_path] = remote_updated
+                collected_http[manifest_path] = _to_http_cache_entry(entry)
+
+                # 检查是否需要更新
+                if remote_updated > local_updated:
+                    # 如果这个 manifest 包含文件，则需要更新
+                    if entry["has_files"]:
+                        updated_manifests.append(manifest_path)
+                        logger.debug(
+                            f"manifest 需要更新: {manifest_path} ({local_updated} → {remote_updated})"
+                        )
+
+                    # 展开子目录
+                    for sub_manifest in entry["directories"]:
+                        submit(sub_manifest)
+                else:
+                    logger.debug(
+                        f"manifest 无更新: {manifest_path} (updated={remote_updated}"
+                        f"{', 304' if entry['not_modified'] else ''})"
+                    )
+                    # 即使没更新，也要收集子 manifest 的时间戳（用于保存缓存）
+                    _carry_unchanged_subtree(
+                        entry,
                         local_manifests,
+                        http_cache,
                         collected_manifests,
-                        updated_manifests,
+                        collected_http,
                     )
-        else:
-            logger.debug(f"manifest 无更新: {manifest_path} (updated={remote_updated})")
-            # 即使没更新，也要收集子 manifest 的时间戳（用于保存缓存）
-            for dir_info in manifest.get("directories", []):
-                sub_manifest = dir_info.get("manifest", "")
-                if sub_manifest and not _is_ignored_path(sub_manifest):
-                    # 使用本地缓存的时间戳
-                    if sub_manifest in local_manifests:
-                        collected_manifests[sub_manifest] = local_manifests[
-                            sub_manifest
-                        ]
-
-        return True
-
-    except requests.exceptions.RequestException as e:
-        logger.debug(f"获取 manifest 失败: {manifest_path}: {e}")
-        return False
-    except Exception as e:
-        logger.debug(f"处理 manifest 异常: {manifest_path}: {e}")
-        return False
 
 
 def check_manifest_updates() -> Dict:
@@ -159,6 +270,7 @@ def check_manifest_updates() -> Dict:
             "has_any_update": bool,
             "updated_manifests": List[str],  # 需要更新的 manifest 路径列表
             "collected_manifests": Dict[str, int],  # 收集到的所有 manifest 时间戳
+            "collected_http": Dict[str, Dict],  # 收集到的 manifest 摘要与 ETag/Last-Modified
             "error": str,
         }
     """
@@ -167,23 +279,26 @@ def check_manifest_updates() -> Dict:
         "has_any_update": False,
         "updated_manifests": [],
         "collected_manifests": {},
+        "collected_http": {},
         "error": "",
     }
 
     # 加载本地缓存
     local_cache = _load_cache()
     local_manifests = local_cache.get("manifests", {})
+    http_cache = local_cache.get("http", {})
 
     try:
+        # 快速探测连通性，离线时立即失败而不是等待请求超时
+        ensure_reachable(MANIFEST_URL)
+
         # 请求远程根 manifest
-        response = requests.get(MANIFEST_URL, timeout=REQUEST_TIMEOUT, proxies=NO_PROXY)
-        response.raise_for_status()
-        root_manifest = response.json()
+        root_entry = _fetch_manifest(ROOT_MANIFEST, http_cache)
 
-        remote_root_updated = root_manifest.get("updated", 0)
+        remote_root_updated = root_entry["updated"]
         local_root_updated = local_cache.get("root_updated", 0)
 
-        result["collected_manifests"]["manifest.json"] = remote_root_updated
+        result["collected_manifests"][ROOT_MANIFEST] = remote_root_updated
 
         # 快速路径：根时间戳相同，所有目录都不需要更新
         if remote_root_updated == local_root_updated and local_root_updated > 0:
@@ -192,25 +307,23 @@ def check_manifest_updates() -> Dict:
             )
             result["success"] = True
             result["collected_manifests"] = local_manifests.copy()
-            result["collected_manifests"]["manifest.json"] = remote_root_updated
+            result["collected_manifests"][ROOT_MANIFEST] = remote_root_updated
+            result["collected_http"] = http_cache.copy()
+            result["collected_http"][ROOT_MANIFEST] = _to_http_cache_entry(root_entry)
             return result
 
-        # 递归检查各子目录
-        for dir_info in root_manifest.get("directories", []):
-            dir_name = dir_info["name"]
-            sub_manifest = dir_info.get("manifest", "")
-
-            if dir_name in IGNORED_DIRS:
-                logger.debug(f"跳过忽略的目录: {dir_name}")
-                continue
+        result["collected_http"][ROOT_MANIFEST] = _to_http_cache_entry(root_entry)
 
-            if sub_manifest:
-                _collect_updated_manifests(
-                    sub_manifest,
-                    local_manifests,
-                    result["collected_manifests"],
-                    result["updated_manifests"],
-                )
+        # 并发检查各子目录
+        _collect_updated_manifests(
+            root_entry["directories"],
+            local_manifests,
+            http_cache,
+            result["collected_manifests"],
+            result["collected_http"],
+            result["updated_manifests"],
+        )
+        result["updated_manifests"].sort()
 
         result["success"] = True
         result["has_any_update"] = len(result["updated_manifests"]) > 0
@@ -255,8 +368,9 @@ def save_manifest_cache_from_result(check_result: Dict):
         return
 
     cache = {
-        "root_updated": collected.get("manifest.json", 0),
+        "root_updated": collected.get(ROOT_MANIFEST, 0),
         "manifests": collected,
+        "http": check_result.get("collected_http", {}),
     }
 
     _save_cache(cache)
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+"""
+单帧识别结果缓存
+
+自定义识别/动作经常在同一张截图上重复识别同一个节点（例如先由一个自定义识别判断，
+随后的动作或中断检查再识别一次）。RecognitionMemo 包装 context.run_recognition，
+按 (节点名, 规范化后的 pipeline_override) 缓存当前帧的识别结果。
+
+帧的判定按内容而不是对象：每次截图/cached_image 都会得到新的数组对象，
+内容相同的帧识别结果必然相同。传入的图像与当前帧内容不同（即有了新截图）时，
+旧帧的缓存自动失效。比较开销约 0.5ms（720p），远小于一次识别。
+
+注意：
+    - 只缓存识别结果本身，不适用于依赖 context.override_pipeline 等运行时修改的节点，
+      修改节点后需调用 invalidate()
+    - 自定义识别可能有状态或副作用（计数、滑动等），除 PURE_CUSTOM_RECOGNITIONS 外不缓存；
+      And / Or 组合识别中含有这类自定义识别时同样不缓存
+    - 每个任务的命中次数在任务结束时输出并清除（见 custom/hooks），用于评估节省的识别量；
+      最多保留 MAX_TASK_STATS 个任务的统计，避免结束事件丢失时无限增长
+"""
+
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import logger
+
+# 每帧最多缓存的识别结果数
+MAX_ENTRIES = 128
+# 快速比较帧内容时的采样步长
+_SAMPLE_STEP = (37, 41)
+# 结果只取决于截图内容的自定义识别（其他自定义识别节点不缓存）
+PURE_CUSTOM_RECOGNITIONS = {"CCRemainMoney"}
+# 最多保留统计的任务数
+MAX_TASK_STATS = 16
+# 组合识别的类型及其子识别列表的参数名
+_COMPOSITE_RECOGNITIONS = {"And": "all_of", "Or": "any_of"}
+
+
+def _override_key(pipeline_override: Optional[dict]) -> str:
+    if not pipeline_override:
+        return ""
+    return json.dumps(
+        pipeline_override, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+
+
+def _task_id(context) -> int:
+    try:
+        return context.get_task_job().job_id
+    except Exception:
+        return 0
+
+
+class RecognitionMemo:
+    """当前帧的识别结果缓存与按任务统计的命中计数"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._frame: Optional[np.ndarray] = None
+        self._generation = 0
+        self._entries: Dict[Tuple[str, str], object] = {}
+        # 节点名 -> 是否可缓存
+        self._cacheable: Dict[str, bool] = {}
+        # task_id -> 节点名 -> [命中, 未命中]
+        self._stats: Dict[int, Dict[str, List[int]]] = {}
+
+    def _is_current_frame(self, image: np.ndarray) -> bool:
+        frame = self._frame
+        if frame is None or frame.shape != image.shape or frame.dtype != image.dtype:
+            return False
+        step_y, step_x = _SAMPLE_STEP
+        if not np.array_equal(frame[::step_y, ::step_x], image[::step_y, ::step_x]):
+            return False
+        return np.array_equal(frame, image)
+
+    def _switch_frame(self, image: np.ndarray):
+        """切换到新帧（保存副本，避免调用方复用缓冲区后内容被改写）"""
+        if self._frame is not None and self._frame.shape == image.shape:
+            np.copyto(self._frame, image)
+        else:
+            self._frame = np.array(image, copy=True)
+        self._generation += 1
+        self._entries.clear()
+
+    def invalidate(self):
+        """清空当前帧的缓存"""
+        with self._lock:
+            self._frame = None
+            self._generation += 1
+            self._entries.clear()
+            self._cacheable.clear()
+
+    def _is_pure(self, context, recognition, visiting: set) -> bool:
+        """
+        识别结果是否只取决于截图内容
+
+        recognition: 节点的 recognition 配置（{"type": ..., "param": ...}），
+            或组合识别中的子识别（节点名或内联的识别配置）
+        """
+        if isinstance(recognition, str):
+            # 引用其他节点
+            if recognition in visiting:
+                return False
+            visiting.add(recognition)
+            node_data = context.get_node_data(recognition) or {}
+            pure = self._is_pure(context, node_data.get("recognition", {}), visiting)
+            visiting.discard(recognition)
+            return pure
+        if not isinstance(recognition, dict):
+            return False
+        if "recognition" in recognition:
+            # 内联子识别可能写成完整的节点形式
+            return self._is_pure(context, recognition["recognition"], visiting)
+
+        recognition_type = recognition.get("type")
+        param = recognition.get("param") or {}
+        if recognition_type == "Custom":
+            return param.get("custom_recognition") in PURE_CUSTOM_RECOGNITIONS
+        if recognition_type in _COMPOSITE_RECOGNITIONS:
+            children = param.get(_COMPOSITE_RECOGNITIONS[recognition_type], [])
+            return all(self._is_pure(context, child, visiting) for child in children)
+        return True
+
+    def _is_cacheable(self, context, node: str) -> bool:
+        cacheable = self._cacheable.get(node)
+        if cacheable is None:
+            cacheable = self._is_pure(context, node, set())
+            self._cacheable[node] = cacheable
+        return cacheable
+
+    def _count(self, task_id: int, node: str, hit: bool):
+        if task_id not in self._stats and len(self._stats) >= MAX_TASK_STATS:
+            # 丢弃最早的任务（结束事件可能未收到）
+            self._stats.pop(next(iter(self._stats)))
+        counter = self._stats.setdefault(task_id, {}).setdefault(node, [0, 0])
+        counter[0 if hit else 1] += 1
+
+    def run_recognition(
+        self,
+        context,
+        node: str,
+        image: np.ndarray,
+        pipeline_override: Optional[dict] = None,
+    ):
+        """
+        与 context.run_recognition 相同，同一帧上的重复识别直接返回缓存结果
+
+        Returns:
+            RecognitionDetail | None: 识别详情（缓存的结果为共享对象，不要修改）
+        """
+        if not self._is_cacheable(context, node):
+            return context.run_recognition(node, image, pipeline_override or {})
+
+        key = (node, _override_key(pipeline_override))
+        task_id = _task_id(context)
+
+        with self._lock:
+            if self._is_current_frame(image):
+                if key in self._entries:
+                    self._count(task_id, node, True)
+                    return self._entries[key]
+            else:
+                self._switch_frame(image)
+            generation = self._generation
+
+        reco_detail = context.run_recognition(node, image, pipeline_override or {})
+
+        with self._lock:
+            self._count(task_id, node, False)
+            # 识别期间可能已切换到其他帧，此时结果不再缓存
+            if reco_detail is not None and self._generation == generation:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[key] = reco_detail
+        return reco_detail
+
+    def pop_stats(self, task_id: int) -> Dict[str, List[int]]:
+        """取出并清除某个任务的统计 {节点名: [命中, 未命中]}"""
+        with self._lock:
+            return self._stats.pop(task_id, {})
+
+    def log_task_stats(self, task_id: int):
+        """输出某个任务的命中统计"""
+        stats = self.pop_stats(task_id)
+        hits = sum(counter[0] for counter in stats.values())
+        total = hits + sum(counter[1] for counter in stats.values())
+        if not hits:
+            return
+        top = sorted(stats.items(), key=lambda item: item[1][0], reverse=True)[:5]
+        detail = ", ".join(
+            f"{node} {counter[0]}/{sum(counter)}" for node, counter in top
+        )
+        logger.debug(
+            f"任务 {task_id} 识别缓存命中 {hits}/{total} 次"
+            f"（节省 {hits / total:.0%} 识别）: {detail}"
+        )
+
+
+_memo: Optional[RecognitionMemo] = None
+_memo_lock = threading.Lock()
+
+
+def get_recognition_memo() -> RecognitionMemo:
+    """获取进程内共享的识别结果缓存（懒加载）"""
+    global _memo
+    if _memo is None:
+        with _memo_lock:
+            if _memo is None:
+                _memo = RecognitionMemo()
+    return _memo
+
+
+def run_recognition(context, node: str, image: np.ndarray, pipeline_override=None):
+    """get_recognition_memo().run_recognition 的简写"""
+    return get_recognition_memo().run_recognition(
+        context, node, image, pipeline_override
+    )
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+"""
+数据上报发件箱
+
+上报请求先追加到 config/report_outbox.db（SQLite），由后台线程发送，
+调用方只需承担一次本地写入的开销，不再因上报接口缓慢或不可达阻塞任务。
+
+    - 发送失败（网络异常、408/429/5xx）按指数退避重试，超过最大次数后丢弃
+    - 其他 4xx 视为请求本身无效，直接丢弃
+    - 接口支持批量上报时（BATCH_ENDPOINTS），同一接口的多条记录合并为一个 JSON 数组发送
+    - agent 退出前调用 flush() 尽量发送剩余记录，未发送的记录保留到下次启动
+
+无法打开数据库文件时退化为内存数据库（本次运行内仍可异步发送与重试）。
+"""
+
+import json
+import time
+import random
+import sqlite3
+import warnings
+import threading
+import requests
+from pathlib import Path
+from typing import Dict, List, Optional
+from . import logger
+from .http_client import get_session
+
+# 禁用 SSL 警告（部分上报接口不验证证书）
+warnings.filterwarnings("ignore", message="Unverified HTTPS request")
+
+OUTBOX_FILE = Path("./config/report_outbox.db")
+
+# 单次请求超时（秒）
+REQUEST_TIMEOUT = 15
+# 重试退避：BACKOFF_BASE * 2^attempts，上限 BACKOFF_MAX（秒）
+BACKOFF_BASE = 30
+BACKOFF_MAX = 3600
+MAX_ATTEMPTS = 24
+# 每次批量发送的最大记录数
+BATCH_SIZE = 20
+# 单条上报接口 -> 批量上报接口（接受 JSON 数组）。
+# 目前的上报接口都未声明支持批量上报，因此为空，记录逐条发送（复用连接池）
+BATCH_ENDPOINTS: Dict[str, str] = {}
+# 可重试的 HTTP 状态码（其余 4xx 直接丢弃）
+RETRY_STATUS = {408, 425, 429}
+
+
+class ReportOutbox:
+    """持久化发件箱与后台发送线程"""
+
+    def __init__(self, db_path: Path = OUTBOX_FILE):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._conn = self._open(db_path)
+
+    @staticmethod
+    def _open(db_path: Path) -> sqlite3.Connection:
+        schema = (
+            "CREATE TABLE IF NOT EXISTS reports ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT, body TEXT, "
+            "headers TEXT, verify INTEGER, created_at REAL, "
+            "attempts INTEGER DEFAULT 0, next_attempt_at REAL DEFAULT 0)"
+        )
+        try:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(db_path), check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(schema)
+            return conn
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"打开上报发件箱失败，本次运行仅在内存中暂存: {e}")
+            conn = sqlite3.connect(
+                ":memory:", check_same_thread=False, isolation_level=None
+            )
+            conn.execute(schema)
+            return conn
+
+    def _execute(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def enqueue(
+        self, url: str, payload: dict, headers: dict = None, verify: bool = True
+    ) -> bool:
+        """
+        追加一条上报记录并唤醒后台线程
+
+        Returns:
+            bool: 是否写入成功
+        """
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        try:
+            self._execute(
+                "INSERT INTO reports (url, body, headers, verify, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, body, json.dumps(headers or {}), int(verify), time.time()),
+            )
+        except sqlite3.Error as e:
+            logger.error(f"写入上报发件箱失败: {e}")
+            return False
+        self.start()
+        self._wake.set()
+        return True
+
+    def pending(self) -> int:
+        """待发送的记录数"""
+        return self._execute("SELECT COUNT(*) FROM reports")[0][0]
+
+    def _due_batch(self, ignore_backoff: bool, after_id: int = 0) -> List[tuple]:
+        """取出最早到期的一批记录（同一接口，id 大于 after_id）"""
+        now = float("inf") if ignore_backoff else time.time()
+        first = self._execute(
+            "SELECT url FROM reports WHERE next_attempt_at <= ? AND id > ? "
+            "ORDER BY id LIMIT 1",
+            (now, after_id),
+        )
+        if not first:
+            return []
+        url = first[0][0]
+        limit = BATCH_SIZE if url in BATCH_ENDPOINTS else 1
+        return self._execute(
+            "SELECT id, url, body, headers, verify, attempts FROM reports "
+            "WHERE url = ? AND next_attempt_at <= ? AND id > ? ORDER BY id LIMIT ?",
+            (url, now, after_id, limit),
+        )
+
+    def _next_due_in(self) -> Optional[float]:
+        row = self._execute("SELECT MIN(next_attempt_at) FROM reports")
+        if not row or row[0][0] is None:
+            return None
+        return max(0.0, row[0][0] - time.time())
+
+    def _post(self, rows: List[tuple], timeout: float) -> Optional[int]:
+        """发送一批记录，返回 HTTP 状态码；网络异常返回 None"""
+        _, url, body, headers, verify, _ = rows[0]
+        if len(rows) > 1:
+            url = BATCH_ENDPOINTS[url]
+            body = "[" + ",".join(row[2] for row in rows) + "]"
+        try:
+            response = get_session(use_proxy=True).post(
+                url,
+                data=body.encode("utf-8"),
+                headers=json.loads(headers),
+                timeout=timeout,
+                verify=bool(verify),
+            )
+        except requests.RequestException as e:
+            logger.debug(f"上报请求异常: {e}")
+            return None
+        if response.status_code not in (200, 201):
+            logger.debug(
+                f"上报失败: HTTP {response.status_code}, {response.text[:200]}"
+            )
+        return response.status_code
+
+    def _send_batch(self, rows: List[tuple], timeout: float = REQUEST_TIMEOUT) -> bool:
+        """发送并更新记录状态，返回是否发送成功"""
+        ids = [row[0] for row in rows]
+        placeholders = ",".join("?" * len(ids))
+        status = self._post(rows, timeout)
+
+        if status in (200, 201):
+            self._execute(f"DELETE FROM reports WHERE id IN ({placeholders})", ids)
+            logger.debug(f"上报成功: {rows[0][1]}, {len(rows)} 条")
+            return True
+
+        if status is not None and 400 <= status < 500 and status not in RETRY_STATUS:
+            self._execute(f"DELETE FROM reports WHERE id IN ({placeholders})", ids)
+            logger.error(f"上报被拒绝 (HTTP {status})，已丢弃 {len(rows)} 条记录")
+            return False
+
+        attempts = rows[0][5] + 1
+        if attempts >= MAX_ATTEMPTS:
+            self._execute(f"DELETE FROM reports WHERE id IN ({placeholders})", ids)
+            logger.error(f"上报重试 {attempts} 次仍失败，已丢弃 {len(rows)} 条记录")
+            return False
+
+        delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+        delay *= random.uniform(0.8, 1.2)
+        self._execute(
+            f"UPDATE reports SET attempts = ?, next_attempt_at = ? "
+            f"WHERE id IN ({placeholders})",
+            [attempts, time.time() + delay, *ids],
+        )
+        logger.debug(f"上报失败，{delay:.0f}s 后第 {attempts + 1} 次重试")
+        return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                rows = self._due_batch(ignore_backoff=False)
+                if rows:
+                    self._send_batch(rows)
+                    continue
+                wait = self._next_due_in()
+            except sqlite3.Error as e:
+                logger.warning(f"读取上报发件箱失败: {e}")
+                wait = BACKOFF_BASE
+            self._wake.wait(timeout=wait)
+            self._wake.clear()
+
+    def start(self):
+        """启动后台发送线程（已启动时忽略）"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="report-outbox", daemon=True
+            )
+            self._thread.start()
+
+    def flush(self, timeout: float = 5.0) -> int:
+        """
+        停止后台线程，并在 timeout 内忽略退避尝试发送剩余记录
+
+        Returns:
+            int: 仍未发送的记录数（保留到下次启动）
+        """
+        deadline = time.monotonic() + timeout
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                # 后台线程仍在发送中，避免重复上报
+                return self.pending()
+
+        last_id = 0
+        while time.monotonic() < deadline:
+            rows = self._due_batch(ignore_backoff=True, after_id=last_id)
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            remaining = deadline - time.monotonic()
+            self._send_batch(rows, timeout=max(0.5, min(REQUEST_TIMEOUT, remaining)))
+
+        left = self.pending()
+        if left:
+            logger.info(f"还有 {left} 条上报未发送，将在下次启动时继续发送")
+        return left
+
+
+_outbox: Optional[ReportOutbox] = None
+_outbox_lock = threading.Lock()
+
+
+def get_report_outbox() -> ReportOutbox:
+    """获取进程内共享的发件箱（懒加载）"""
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                _outbox = ReportOutbox()
+    return _outbox
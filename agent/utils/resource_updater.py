@@ -6,38 +6,39 @@
 支持基于 manifest 的增量更新，可按目录选择性更新资源。
 """
 
+import os
 import json
+import time
 import hashlib
+import tarfile
+import tempfile
+import threading
 import requests
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from . import logger
+from .http_client import get_session
+from .hash_index import calculate_file_hash, get_hash_index
 
 # 默认配置
 DEFAULT_API_BASE_URL = "https://api.1999.fan/api"
 DEFAULT_TIMEOUT = 5  # 缩短超时时间
 
-# 不使用系统代理（国内服务器直连更快）
-NO_PROXY = {"http": "", "https": ""}
+# 并行下载线程数
+DOWNLOAD_WORKERS = 8
+# 流式下载分块大小
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 
+# 批量下载接口（POST {"paths": [...]}，返回 tar 流）
+BULK_ENDPOINT = "bulk"
+# 需要更新的文件数达到该值时才尝试批量下载
+BULK_MIN_FILES = 2
+# 服务器返回这些状态码时视为不支持批量下载
+BULK_UNSUPPORTED_STATUS = {404, 405, 501}
 
-def calculate_file_hash(file_path: Path) -> str:
-    """
-    Calculate SHA256 hash of a file.
-
-    Args:
-        file_path: Path to the file
-
-    Returns:
-        Hex string of SHA256 hash
-    """
-    sha256 = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        # Read in chunks to handle large files
-        for chunk in iter(lambda: f.read(8192), b""):
-            sha256.update(chunk)
-    return sha256.hexdigest()
+# 本进程内已确认不支持批量下载的 API 地址
+_bulk_unsupported: Set[str] = set()
 
 
 def get_all_manifests(api_base_url: str, manifest_path: str, timeout: int) -> List[str]:
@@ -55,7 +56,7 @@ def get_all_manifests(api_base_url: str, manifest_path: str, timeout: int) -> Li
     manifest_url = f"{api_base_url}/{manifest_path}"
 
     try:
-        response = requests.get(manifest_url, timeout=timeout, proxies=NO_PROXY)
+        response = get_session().get(manifest_url, timeout=timeout)
         response.raise_for_status()
         manifest = response.json()
 
@@ -93,10 +94,240 @@ def get_all_manifests(api_base_url: str, manifest_path: str, timeout: int) -> Li
         return []
 
 
+class UpdateTarget:
+    """
+    下载文件的写入位置
+
+    默认替换项目文件；redirect 之后完成的文件改为写入暂存目录。
+    替换在锁内进行，redirect 返回后不会再有文件被替换到项目目录。
+    """
+
+    def __init__(self, project_root: Path, staging_dir: Optional[Path] = None):
+        self.project_root = project_root
+        self._staging_dir = staging_dir
+        self._lock = threading.Lock()
+
+    def redirect(self, staging_dir: Path):
+        """之后完成的文件写入 staging_dir"""
+        with self._lock:
+            self._staging_dir = staging_dir
+
+    def _resolve(self, file_path_str: str) -> Tuple[Path, bool]:
+        if self._staging_dir is not None:
+            return self._staging_dir / file_path_str, True
+        return self.project_root / file_path_str, False
+
+    def path(self, file_path_str: str) -> Path:
+        """当前的目标路径（用于放置临时文件）"""
+        with self._lock:
+            return self._resolve(file_path_str)[0]
+
+    def replace(self, tmp_path: str, file_path_str: str) -> bool:
+        """
+        将校验过的临时文件移到目标位置
+
+        Returns:
+            bool: 是否写入了暂存目录
+        """
+        with self._lock:
+            file_path, staged = self._resolve(file_path_str)
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, file_path)
+        return staged
+
+
+def _new_file_stats() -> Dict:
+    """
+    单个文件的下载统计
+
+    Returns:
+        dict: {
+            "ok": bool,  # 是否下载并替换成功
+            "staged": bool,  # 是否写入了暂存目录
+            "hash_mismatch": bool,  # 是否因哈希校验失败
+            "bytes": int,  # 下载字节数（解压后）
+            "seconds": float,  # 耗时（秒）
+            "error": str,  # 错误信息
+        }
+    """
+    return {
+        "ok": False,
+        "staged": False,
+        "hash_mismatch": False,
+        "bytes": 0,
+        "seconds": 0.0,
+        "error": "",
+    }
+
+
+def _write_verified(
+    chunks: Iterable[bytes],
+    target: UpdateTarget,
+    file_path_str: str,
+    expected_hash: str,
+    stats: Dict,
+):
+    """
+    将数据块流式写入同目录临时文件并计算 SHA256，
+    校验通过后以 os.replace 原子替换目标文件（写入时的目标位置见 UpdateTarget）。
+    """
+    file_path = target.path(file_path_str)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    sha256 = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f".{file_path.name}.", suffix=".tmp", dir=file_path.parent
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                sha256.update(chunk)
+                f.write(chunk)
+                stats["bytes"] += len(chunk)
+
+        # 验证下载的文件哈希
+        if sha256.hexdigest() != expected_hash:
+            stats["hash_mismatch"] = True
+            stats["error"] = "哈希验证失败"
+            return
+
+        # 下载期间可能已切换到暂存目录
+        stats["staged"] = target.replace(tmp_path, file_path_str)
+        tmp_path = None
+        stats["ok"] = True
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+def _download_file(
+    url: str,
+    target: UpdateTarget,
+    file_path_str: str,
+    expected_hash: str,
+    timeout: int,
+) -> Dict:
+    """
+    流式下载单个文件（协商 gzip/zstd 压缩），校验后原子替换
+
+    Returns:
+        dict: 见 _new_file_stats
+    """
+    stats = _new_file_stats()
+    begin = time.perf_counter()
+    try:
+        with get_session().get(url, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            _write_verified(
+                response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE),
+                target,
+                file_path_str,
+                expected_hash,
+                stats,
+            )
+    except requests.exceptions.RequestException as e:
+        stats["error"] = f"网络错误 - {str(e)}"
+    except OSError as e:
+        stats["error"] = f"写入失败 - {str(e)}"
+    finally:
+        stats["seconds"] = time.perf_counter() - begin
+    return stats
+
+
+def _bulk_download(
+    api_base_url: str, file_infos: List[Dict], target: UpdateTarget, timeout: int
+) -> Optional[Dict[str, Dict]]:
+    """
+    批量下载：一次 POST 请求所有文件路径，服务器返回 tar 流（可压缩），边接收边解包
+
+    只接受请求列表中的常规文件，每个文件同样校验哈希并原子替换。
+
+    Returns:
+        Dict[str, Dict]: 收到的文件路径 -> 下载统计；服务器不支持批量接口时返回 None
+    """
+    wanted = {file_info["path"]: file_info for file_info in file_infos}
+    results = {}
+
+    with get_session().post(
+        f"{api_base_url}/{BULK_ENDPOINT}",
+        json={"paths": list(wanted)},
+        timeout=timeout,
+        stream=True,
+    ) as response:
+        if response.status_code in BULK_UNSUPPORTED_STATUS:
+            return None
+        response.raise_for_status()
+        # 由 urllib3 透明解码 Content-Encoding（gzip/zstd）
+        response.raw.decode_content = True
+
+        with tarfile.open(fileobj=response.raw, mode="r|*") as tar:
+            for member in tar:
+                file_info = wanted.get(member.name)
+                if file_info is None or not member.isfile() or member.name in results:
+                    continue
+
+                stats = _new_file_stats()
+                begin = time.perf_counter()
+                fileobj = tar.extractfile(member)
+                _write_verified(
+                    iter(lambda: fileobj.read(DOWNLOAD_CHUNK_SIZE), b""),
+                    target,
+                    member.name,
+                    file_info["hash"],
+                    stats,
+                )
+                stats["seconds"] = time.perf_counter() - begin
+                results[member.name] = stats
+
+    return results
+
+
+def _collect_outdated_files(
+    api_base_url: str, manifest_path: str, project_root: Path, timeout: int
+) -> List[Dict]:
+    """获取远程 manifest，返回本地缺失或哈希不匹配的文件信息"""
+    manifest_url = f"{api_base_url}/{manifest_path}"
+    logger.debug(f"获取资源清单: {manifest_url}")
+
+    response = get_session().get(manifest_url, timeout=timeout)
+    response.raise_for_status()
+    manifest = response.json()
+
+    hash_index = get_hash_index()
+    outdated = []
+    for file_info in manifest.get("files", []):
+        file_path_str = file_info["path"]
+        remote_hash = file_info["hash"]
+        # 使用 manifest 中的完整路径
+        file_path = project_root / file_path_str
+
+        # 检查本地文件是否需要更新
+        if not file_path.exists():
+            logger.debug(f"本地文件不存在: {file_path_str}")
+            outdated.append(file_info)
+            continue
+
+        local_hash = hash_index.get_hash(file_path_str, file_path)
+        if local_hash != remote_hash:
+            logger.debug(f"文件哈希不匹配: {file_path_str}")
+            logger.debug(f"  本地 hash: {local_hash}")
+            logger.debug(f"  远程 hash: {remote_hash}")
+            logger.debug(f"  文件大小: {file_path.stat().st_size} bytes")
+            outdated.append(file_info)
+        else:
+            logger.debug(f"文件已是最新: {file_path_str}")
+
+    return outdated
+
+
 def check_and_update_resources(
     api_base_url: str = DEFAULT_API_BASE_URL,
     resource_manifests: Optional[List[str]] = None,
     timeout: int = DEFAULT_TIMEOUT,
+    staging_dir: Optional[Path] = None,
+    target: Optional[UpdateTarget] = None,
 ) -> dict:
     """
     检查并更新资源文件
@@ -105,13 +336,24 @@ def check_and_update_resources(
         api_base_url: API 基础 URL
         resource_manifests: 需要更新的 manifest 路径列表，如果为 None 则从 API 递归获取
         timeout: 请求超时时间（秒）
+        staging_dir: 暂存目录；指定时下载的文件写入该目录而不替换项目文件，
+            由调用方稍后应用（见 hot_update.apply_staged_update）
+        target: 写入位置，可在下载过程中由其他线程切换到暂存目录；
+            指定时忽略 staging_dir
 
     Returns:
         dict: {
             "success": bool,  # 是否成功
             "updated_files": List[str],  # 已更新的文件列表
             "failed_files": List[str],  # 更新失败的文件列表
-            "error": str  # 错误信息
+            "error": str,  # 错误信息
+            "stats": {
+                "files": Dict[str, {"bytes": int, "seconds": float}],  # 每个下载文件的统计
+                "total_bytes": int,  # 下载总字节数
+                "total_seconds": float,  # 下载阶段总耗时（秒）
+                "bulk_files": int,  # 通过批量接口下载的文件数（尝试批量下载时）
+            },
+            "staged_files": Dict[str, str],  # 已暂存的文件路径 -> SHA256（写入暂存目录时）
         }
     """
     result = {
@@ -119,10 +361,14 @@ def check_and_update_resources(
         "updated_files": [],
         "failed_files": [],
         "error": "",
+        "stats": {"files": {}, "total_bytes": 0, "total_seconds": 0.0},
+        "staged_files": {},
     }
 
     try:
         project_root = Path.cwd()
+        if target is None:
+            target = UpdateTarget(project_root, staging_dir)
 
         # 如果未指定 manifest 列表，则从 API 递归获取所有
         if resource_manifests is None:
@@ -148,85 +394,132 @@ def check_and_update_resources(
         else:
             logger.debug(f"使用指定的 {len(resource_manifests)} 个资源清单")
 
-        for manifest_path in resource_manifests:
-            try:
-                # 获取远程 manifest
-                manifest_url = f"{api_base_url}/{manifest_path}"
-                logger.debug(f"获取资源清单: {manifest_url}")
-
-                response = requests.get(manifest_url, timeout=timeout, proxies=NO_PROXY)
-                response.raise_for_status()
-                manifest = response.json()
-
-                # 检查并更新每个文件
-                for file_info in manifest.get("files", []):
-                    file_name = file_info["name"]
-                    file_path_str = file_info["path"]
-                    remote_hash = file_info["hash"]
-                    # 使用 manifest 中的完整路径
-                    file_path = project_root / file_path_str
-
-                    # 检查本地文件是否需要更新
-                    need_update = False
-                    if not file_path.exists():
-                        logger.debug(f"本地文件不存在: {file_path_str}")
-                        need_update = True
-                    else:
-                        local_hash = calculate_file_hash(file_path)
-                        if local_hash != remote_hash:
-                            logger.debug(f"文件哈希不匹配: {file_path_str}")
-                            logger.debug(f"  本地 hash: {local_hash}")
-                            logger.debug(f"  远程 hash: {remote_hash}")
-                            logger.debug(
-                                f"  文件大小: {file_path.stat().st_size} bytes"
-                            )
-                            need_update = True
-
-                    if need_update:
-                        # 下载文件
-                        file_url = f"{api_base_url}/{file_path_str}"
-                        logger.debug(f"下载文件: {file_url}")
-
-                        file_response = requests.get(
-                            file_url, timeout=timeout, proxies=NO_PROXY
-                        )
-                        file_response.raise_for_status()
-
-                        # 验证下载的文件哈希
-                        downloaded_hash = hashlib.sha256(
-                            file_response.content
-                        ).hexdigest()
-                        if downloaded_hash != remote_hash:
-                            logger.warning(f"文件哈希验证失败: {file_path_str}")
-                            result["failed_files"].append(file_path_str)
-                            continue
-
-                        # 确保目录存在
-                        file_path.parent.mkdir(parents=True, exist_ok=True)
-
-                        # 保存文件
-                        with open(file_path, "wb") as f:
-                            f.write(file_response.content)
-
-                        # logger.info(
-                        #     f"已更新: {file_path_str} ({file_info['size']} bytes)"
-                        # )
-                        result["updated_files"].append(file_path_str)
-                    else:
-                        logger.debug(f"文件已是最新: {file_path_str}")
+        # 并行获取各 manifest 并找出需要更新的文件
+        outdated_files = []
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+            futures = {
+                executor.submit(
+                    _collect_outdated_files,
+                    api_base_url,
+                    manifest_path,
+                    project_root,
+                    timeout,
+                ): manifest_path
+                for manifest_path in resource_manifests
+            }
+            for future in as_completed(futures):
+                manifest_path = futures[future]
+                try:
+                    outdated_files.extend(future.result())
+                except requests.exceptions.RequestException as e:
+                    error_msg = f"更新 {manifest_path} 资源失败: 网络错误 - {str(e)}"
+                    logger.warning(error_msg)
+                    result["error"] = error_msg
+                    result["success"] = False
+                except Exception as e:
+                    error_msg = f"更新 {manifest_path} 资源失败: {str(e)}"
+                    logger.warning(error_msg)
+                    result["error"] = error_msg
+                    result["success"] = False
 
-            except requests.exceptions.RequestException as e:
-                error_msg = f"更新 {manifest_path} 资源失败: 网络错误 - {str(e)}"
-                logger.warning(error_msg)
-                result["error"] = error_msg
-                result["success"] = False
-            except Exception as e:
-                error_msg = f"更新 {manifest_path} 资源失败: {str(e)}"
-                logger.warning(error_msg)
-                result["error"] = error_msg
+        # 下载需要更新的文件：文件较多时优先批量下载，其余逐个并行流式下载
+        hash_index = get_hash_index()
+
+        def apply_file_stats(file_info: Dict, file_stats: Dict):
+            file_path_str = file_info["path"]
+            result["stats"]["files"][file_path_str] = {
+                "bytes": file_stats["bytes"],
+                "seconds": file_stats["seconds"],
+            }
+            result["stats"]["total_bytes"] += file_stats["bytes"]
+
+            if file_stats["ok"]:
+                if file_stats["staged"]:
+                    result["staged_files"][file_path_str] = file_info["hash"]
+                else:
+                    hash_index.record(
+                        file_path_str, project_root / file_path_str, file_info["hash"]
+                    )
+                result["updated_files"].append(file_path_str)
+                return
+
+            result["failed_files"].append(file_path_str)
+            if file_stats["hash_mismatch"]:
+                logger.warning(f"文件哈希验证失败: {file_path_str}")
+            else:
+                logger.warning(f"下载 {file_path_str} 失败: {file_stats['error']}")
+                result["error"] = f"下载 {file_path_str} 失败: {file_stats['error']}"
                 result["success"] = False
 
-        if result["updated_files"]:
+        if outdated_files:
+            logger.debug(f"需要下载 {len(outdated_files)} 个文件")
+            begin = time.perf_counter()
+            remaining_files = outdated_files
+
+            if (
+                len(outdated_files) >= BULK_MIN_FILES
+                and api_base_url not in _bulk_unsupported
+            ):
+                try:
+                    bulk_results = _bulk_download(
+                        api_base_url, outdated_files, target, timeout
+                    )
+                except (
+                    requests.exceptions.RequestException,
+                    tarfile.TarError,
+                    OSError,
+                ) as e:
+                    logger.debug(f"批量下载失败，回退到逐个下载: {e}")
+                    bulk_results = {}
+
+                if bulk_results is None:
+                    logger.debug("服务器不支持批量下载，回退到逐个下载")
+                    _bulk_unsupported.add(api_base_url)
+                    bulk_results = {}
+
+                remaining_files = []
+                for file_info in outdated_files:
+                    file_stats = bulk_results.get(file_info["path"])
+                    if file_stats and file_stats["ok"]:
+                        apply_file_stats(file_info, file_stats)
+                    else:
+                        # 批量结果中缺失或校验失败的文件逐个重试
+                        remaining_files.append(file_info)
+                result["stats"]["bulk_files"] = len(outdated_files) - len(
+                    remaining_files
+                )
+
+            with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+                futures = {
+                    executor.submit(
+                        _download_file,
+                        f"{api_base_url}/{file_info['path']}",
+                        target,
+                        file_info["path"],
+                        file_info["hash"],
+                        timeout,
+                    ): file_info
+                    for file_info in remaining_files
+                }
+                for future in as_completed(futures):
+                    apply_file_stats(futures[future], future.result())
+
+            result["stats"]["total_seconds"] = time.perf_counter() - begin
+            logger.debug(
+                f"下载完成: {len(result['updated_files'])} 个文件, "
+                f"{result['stats']['total_bytes']} bytes, "
+                f"耗时 {result['stats']['total_seconds']:.2f}s"
+            )
+
+        logger.debug(
+            f"哈希索引命中 {hash_index.hits} 次，重新计算 {hash_index.misses} 次"
+        )
+
+        if result["staged_files"]:
+            logger.info(
+                f"已在后台下载 {len(result['staged_files'])} 个资源文件，将在任务间隙或下次启动时应用"
+            )
+        elif result["updated_files"]:
             logger.info(
                 f"部分资源热更新完成，共更新 {len(result['updated_files'])} 个文件\n如前面有提示新资源版本还请更新"
             )
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+画面稳定等待
+
+自定义动作在点击/滑动后常用固定的 time.sleep 等待界面变化，快的设备上白白等待，
+慢的设备上又可能不够。wait_screen 以短间隔截图，比较降采样后的 ROI 差异：
+    - 给出 reference（动作前的截图）时，先等待画面相对 reference 出现变化，再等待稳定
+    - 不给 reference 时，只等待画面稳定（连续 STABLE_FRAMES 次比较差异都不超过阈值）
+满足条件立即返回，最长等待 timeout 秒。返回的截图就是最后一帧，调用方可直接用于识别，
+不必再截图。
+
+reference 必须是引起变化的那次输入之前的截图：输入后画面可能还没开始变化，
+只等待稳定会在约 0.1s 后就以变化前的画面返回。输入之后才取的截图不能作为 reference，
+画面已经变化完时会一直等到 timeout，仍在变化时又会以变化中的画面返回。
+动作开始时（输入由上一个节点执行，pipeline 已按 post_delay 等待过）拿不到输入前的截图，
+这时不传 reference，只等待画面稳定。
+
+稳定窗口至少为 stable_frames × POLL_INTERVAL（另加每次截图耗时），默认约 0.1s，
+只适合输入后画面立即切换的场合；等待过场、升级等持续动画时应按动画中可能的停顿加大 stable_frames。
+
+timeout 取原先固定等待的时长，最坏情况与原先一致；
+每次等待比 timeout 提前返回的时间按任务累计，在任务结束时输出并清除（见 custom/hooks），
+最多保留 MAX_TASK_STATS 个任务的统计。
+"""
+
+import time
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from . import logger
+from .frame import frame_difference
+from .frame_provider import get_frame
+
+# 判定为"无变化"的平均差值上限（0~255）
+DIFF_THRESHOLD = 2.0
+# 连续多少次比较无变化视为稳定
+STABLE_FRAMES = 2
+# 两次截图之间的最小间隔（秒）
+POLL_INTERVAL = 0.05
+# 最多保留统计的任务数
+MAX_TASK_STATS = 16
+
+
+class WaitResult(NamedTuple):
+    image: np.ndarray  # 最后一帧截图
+    changed: bool  # 相对 reference 出现过变化（无 reference 时为 True）
+    stable: bool  # 画面已稳定（False 表示等待超时）
+    elapsed: float
+
+
+def _task_id(context) -> int:
+    try:
+        return context.get_task_job().job_id
+    except Exception:
+        return 0
+
+
+class ScreenWaiter:
+    """画面稳定等待与按任务统计的节省时间"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # task_id -> [等待次数, 节省的秒数]
+        self._stats: Dict[int, List[float]] = {}
+
+    def wait(
+        self,
+        context,
+        timeout: float,
+        roi=None,
+        reference: Optional[np.ndarray] = None,
+        threshold: float = DIFF_THRESHOLD,
+        stable_frames: int = STABLE_FRAMES,
+    ) -> WaitResult:
+        """
+        等待画面（ROI 内）变化并稳定
+
+        Args:
+            timeout: 最长等待时间（秒），取原先固定等待的时长
+            roi: [x, y, w, h]，只比较该区域，None 表示整个画面
+            reference: 输入动作前的截图，给出时先等待画面相对它发生变化；
+                跟在输入之后的等待必须给出
+            threshold: 平均差值不超过该值视为无变化
+            stable_frames: 连续多少次无变化视为稳定
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        changed = reference is None
+        previous = None
+        stable_count = 0
+
+        while True:
+            image = get_frame(context)
+            if not changed:
+                changed = frame_difference(reference, image, roi) > threshold
+            elif (
+                previous is not None
+                and frame_difference(previous, image, roi) <= threshold
+            ):
+                stable_count += 1
+            else:
+                stable_count = 0
+
+            stable = changed and stable_count >= stable_frames
+            now = time.monotonic()
+            if stable or now >= deadline or context.tasker.stopping:
+                break
+            previous = image
+            time.sleep(min(POLL_INTERVAL, deadline - now))
+
+        elapsed = now - start
+        self._record(_task_id(context), timeout - elapsed)
+        return WaitResult(image, changed, stable, elapsed)
+
+    def _record(self, task_id: int, saved: float):
+        with self._lock:
+            if task_id not in self._stats and len(self._stats) >= MAX_TASK_STATS:
+                # 丢弃最早的任务（结束事件可能未收到）
+                self._stats.pop(next(iter(self._stats)))
+            counter = self._stats.setdefault(task_id, [0, 0.0])
+            counter[0] += 1
+            counter[1] += saved
+
+    def log_task_stats(self, task_id: int):
+        """输出并清除某个任务的等待统计"""
+        with self._lock:
+            counter = self._stats.pop(task_id, None)
+        if counter:
+            count, saved = counter
+            logger.debug(
+                f"任务 {task_id} 画面等待 {count} 次，比固定等待节省 {saved:.1f}s"
+            )
+
+
+_waiter: Optional[ScreenWaiter] = None
+_waiter_lock = threading.Lock()
+
+
+def get_screen_waiter() -> ScreenWaiter:
+    """获取进程内共享的画面等待器（懒加载）"""
+    global _waiter
+    if _waiter is None:
+        with _waiter_lock:
+            if _waiter is None:
+                _waiter = ScreenWaiter()
+    return _waiter
+
+
+def wait_screen(
+    context,
+    timeout: float,
+    roi=None,
+    reference: Optional[np.ndarray] = None,
+    **kwargs,
+) -> WaitResult:
+    """get_screen_waiter().wait 的简写"""
+    return get_screen_waiter().wait(context, timeout, roi, reference, **kwargs)
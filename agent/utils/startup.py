@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+
+"""
+Agent 启动编排模块
+
+并发执行资源版本检查与 manifest 检查/热更新，在统一的启动期限内尽快放行 AgentServer。
+版本检查只用于提示，不阻塞启动；热更新完成（或超出期限）即放行。
+超出期限时热更新线程中尚未完成的文件改为写入暂存目录，在任务间隙或下次启动时
+（开始检查之前）应用，不会在 AgentServer 运行期间替换正在使用的资源文件。
+后台模式下启动时只应用上次暂存的更新，检查与下载在 AgentServer 启动后进行（见 hot_update）。
+"""
+
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from . import logger
+from .hot_update import (
+    MODE_BLOCKING,
+    MODE_BACKGROUND,
+    STAGING_DIR,
+    apply_staged_update,
+    has_staged_update,
+    stage_files,
+)
+from .resource_updater import UpdateTarget
+
+# 默认启动期限（秒）
+DEFAULT_STARTUP_DEADLINE = 15
+
+
+class _PhaseTimer:
+    """记录各启动阶段耗时（秒）"""
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self.timings: Dict[str, float] = {}
+
+    def record(self, phase: str, begin: float):
+        cost = time.perf_counter() - begin
+        with self._lock:
+            self.timings[phase] = cost
+        logger.debug(f"启动阶段 {phase} 耗时 {cost:.2f}s")
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def summary(self) -> str:
+        with self._lock:
+            parts = [f"{name}={cost:.2f}s" for name, cost in self.timings.items()]
+        return ", ".join(parts) if parts else "无"
+
+
+def _version_check_phase(timer: _PhaseTimer, cache_ttl: Optional[float] = None):
+    """版本检查阶段，仅输出提示"""
+    begin = time.perf_counter()
+    try:
+        from .version_checker import check_resource_version, DEFAULT_CACHE_TTL
+
+        version_info = check_resource_version(
+            cache_ttl=DEFAULT_CACHE_TTL if cache_ttl is None else cache_ttl
+        )
+        if not version_info["is_latest"]:
+            logger.warning("检测到资源有新版本!")
+            logger.warning(f"当前资源版本: {version_info['current_version']}")
+            logger.warning(f"最新资源版本: {version_info['latest_version']}")
+        elif version_info["error"]:
+            logger.debug(f"资源版本检查遇到问题: {version_info['error']}")
+    except Exception as e:
+        logger.debug(f"资源版本检查异常: {e}")
+    finally:
+        timer.record("version_check", begin)
+
+
+def _hot_update_phase(timer: _PhaseTimer, target: UpdateTarget):
+    """manifest 检查 + 热更新阶段，target 在超出启动期限后切换到暂存目录"""
+    from .manifest_checker import (
+        check_manifest_updates,
+        save_manifest_cache_from_result,
+    )
+
+    begin = time.perf_counter()
+    manifest_result = check_manifest_updates()
+    timer.record("manifest_check", begin)
+
+    # 如果没有任何更新，跳过热更新
+    if manifest_result["success"] and not manifest_result["has_any_update"]:
+        logger.debug("资源无更新，跳过热更新")
+    else:
+        # 有更新或检查失败，执行热更新流程
+        updated_manifests = manifest_result.get("updated_manifests", [])
+
+        if updated_manifests or not manifest_result["success"]:
+            from .resource_updater import check_and_update_resources
+
+            # 只更新有变化的 manifest
+            manifests = updated_manifests if manifest_result["success"] else None
+            if manifests:
+                logger.debug(f"开始更新 {len(manifests)} 个资源清单...")
+            else:
+                logger.debug("开始检查所有资源...")
+
+            begin = time.perf_counter()
+            update_result = check_and_update_resources(
+                resource_manifests=manifests, target=target
+            )
+            timer.record("resource_update", begin)
+
+            if update_result and update_result.get("staged_files"):
+                # 超出启动期限后完成的文件已暂存，manifest 缓存在应用后保存
+                stage_files(update_result["staged_files"], manifest_result)
+                return
+            elif update_result and update_result.get("updated_files"):
+                pass
+            elif update_result and update_result.get("error"):
+                logger.debug(f"热更部分资源更新遇到问题: {update_result['error']}")
+            else:
+                logger.debug("热更部分资源已是最新")
+        else:
+            logger.debug("所有 manifest 无更新，跳过热更新")
+
+    # 检查成功后保存 manifest 缓存（无论是否有更新）
+    save_manifest_cache_from_result(manifest_result)
+
+
+def _run_phase(name: str, target, timer: _PhaseTimer) -> threading.Thread:
+    def runner():
+        try:
+            target(timer)
+        except Exception:
+            logger.exception(f"启动阶段 {name} 发生异常")
+
+    thread = threading.Thread(target=runner, name=f"startup-{name}", daemon=True)
+    thread.start()
+    return thread
+
+
+def run_startup_phases(
+    enable_hot_update: bool = True,
+    deadline: float = DEFAULT_STARTUP_DEADLINE,
+    mode: str = MODE_BLOCKING,
+    version_cache_ttl: Optional[float] = None,
+) -> dict:
+    """
+    并发执行启动阶段，在期限内等待资源就绪
+
+    Args:
+        enable_hot_update: 是否执行 manifest 检查与热更新
+        deadline: 启动期限（秒），超时后不再等待热更新
+        mode: 热更新模式，blocking 或 background
+        version_cache_ttl: 版本检查结果缓存有效期（秒），None 使用默认值
+
+    Returns:
+        dict: {
+            "resources_ready": bool,  # 热更新是否已在期限内完成
+            "timed_out": bool,  # 是否超出启动期限（需注册任务间隙应用，见 hot_update）
+            "background": bool,  # 是否需要在 AgentServer 启动后开始后台热更新
+            "timings": Dict[str, float],  # 已完成阶段的耗时（秒）
+        }
+    """
+    timer = _PhaseTimer()
+    result = {
+        "resources_ready": True,
+        "timed_out": False,
+        "background": False,
+        "timings": {},
+    }
+
+    version_thread = _run_phase(
+        "version_check",
+        lambda t: _version_check_phase(t, version_cache_ttl),
+        timer,
+    )
+
+    if enable_hot_update and mode == MODE_BACKGROUND:
+        # 应用上次后台下载的暂存更新，本次检查推迟到 AgentServer 启动后
+        begin = time.perf_counter()
+        apply_staged_update()
+        timer.record("apply_staged", begin)
+        result["background"] = True
+    elif enable_hot_update:
+        if has_staged_update():
+            # 上次启动超出期限时暂存的更新，先应用再检查，避免之后覆盖较新的文件
+            begin = time.perf_counter()
+            apply_staged_update()
+            timer.record("apply_staged", begin)
+
+        target = UpdateTarget(Path.cwd())
+        update_thread = _run_phase(
+            "hot_update", lambda t: _hot_update_phase(t, target), timer
+        )
+        update_thread.join(timeout=max(deadline, 0))
+
+        if update_thread.is_alive():
+            # 之后完成的文件写入暂存目录，由任务间隙应用
+            target.redirect(STAGING_DIR)
+            result["resources_ready"] = False
+            result["timed_out"] = True
+            logger.warning(
+                f"热更新未在 {deadline} 秒内完成，先行启动 AgentServer，"
+                "剩余更新将在后台下载并于任务间隙应用"
+            )
+    else:
+        logger.info("已配置为跳过部分资源热更")
+
+    # 版本检查只做提示，不等待其完成
+    if version_thread.is_alive():
+        logger.debug("资源版本检查仍在后台进行")
+
+    result["timings"] = dict(timer.timings)
+    logger.debug(f"启动阶段耗时: {timer.summary()}，启动等待 {timer.elapsed():.2f}s")
+    return result
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""
+掉落识别模板库
+
+读取打包时由 tools/ci/build_template_bank.py 生成的 item_templates.npz，
+一次性得到所有物品模板、稀有度颜色参数和物品数据，每个进程只加载一次。
+
+源文件哈希（经 hash_index 缓存）与模板库记录不一致的条目（如被热更新修改过），
+以及模板库不存在时，回退到直接读取源文件。
+"""
+
+import json
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional
+from PIL import Image
+from . import logger
+from .hash_index import get_hash_index
+
+BANK_VERSION = 2
+BANK_FILE = Path("resource/data/combat/item_templates.npz")
+ITEM_TEMPLATE_DIR = Path("resource/base/image/Items_processed")
+ITEMS_FILE = Path("resource/data/combat/items.json")
+
+
+def read_item_template(path: Path) -> np.ndarray:
+    """读取模板图片为 BGR 数组（与截图一致）"""
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))[:, :, ::-1]
+
+
+class TemplateBank:
+    """
+    物品模板库
+
+    Attributes:
+        templates: {item_id: BGR 模板}
+        items: items.json 内容，模板库中的数据已过期时为 None
+        rarity_colors: {rarity: {"lower", "upper", "count"}}，RGB，
+            lower/upper 为多组范围 [[r, g, b], ...]
+    """
+
+    def __init__(self):
+        self.templates: Dict[int, np.ndarray] = {}
+        self.items: Optional[dict] = None
+        self.rarity_colors: Dict[str, dict] = {}
+
+
+def _is_fresh(rel_path: str, sources: dict) -> bool:
+    path = Path(rel_path)
+    if rel_path not in sources or not path.exists():
+        return False
+    try:
+        return get_hash_index().get_hash(rel_path, path) == sources[rel_path]
+    except OSError:
+        return False
+
+
+def _load_bank_file(bank: TemplateBank) -> Dict[str, str]:
+    """读取模板库文件，返回有效（源文件未变化）的模板路径"""
+    with np.load(BANK_FILE) as data:
+        meta = json.loads(str(data["meta"]))
+        if meta.get("version") != BANK_VERSION:
+            raise ValueError(f"模板库版本不匹配: {meta.get('version')}")
+        sources = meta.get("sources", {})
+
+        used = {}
+        templates = data["templates"]
+        for item_id, (h, w), template in zip(data["ids"], data["sizes"], templates):
+            rel_path = (ITEM_TEMPLATE_DIR / f"Item-{item_id}.png").as_posix()
+            if _is_fresh(rel_path, sources):
+                bank.templates[int(item_id)] = np.ascontiguousarray(template[:h, :w])
+                used[rel_path] = sources[rel_path]
+
+        if _is_fresh(ITEMS_FILE.as_posix(), sources):
+            bank.items = meta.get("items")
+
+        pipeline_fresh = all(
+            _is_fresh(rel_path, sources)
+            for rel_path in sources
+            if "/pipeline/" in rel_path
+        )
+        if pipeline_fresh:
+            # lower/upper 为 (R, N, 3)，每个稀有度取前 rarity_ranges 组
+            for rarity, lower, upper, ranges, count in zip(
+                data["rarity_names"],
+                data["rarity_lower"],
+                data["rarity_upper"],
+                data["rarity_ranges"],
+                data["rarity_count"],
+            ):
+                bank.rarity_colors[str(rarity)] = {
+                    "lower": lower[:ranges].tolist(),
+                    "upper": upper[:ranges].tolist(),
+                    "count": int(count),
+                }
+    return used
+
+
+def _load_template_bank() -> TemplateBank:
+    bank = TemplateBank()
+
+    used = {}
+    if BANK_FILE.exists():
+        try:
+            used = _load_bank_file(bank)
+        except Exception as e:
+            logger.warning(f"读取模板库失败，改为读取模板图片: {e}")
+            bank = TemplateBank()
+
+    # 模板库中没有或已过期的模板直接读取图片
+    decoded = 0
+    if ITEM_TEMPLATE_DIR.exists():
+        for path in sorted(ITEM_TEMPLATE_DIR.glob("Item-*.png")):
+            if path.as_posix() in used:
+                continue
+            try:
+                item_id = int(path.stem.split("-", 1)[1])
+                bank.templates[item_id] = read_item_template(path)
+                decoded += 1
+            except Exception as e:
+                logger.warning(f"读取物品模板失败: {path}: {e}")
+
+    logger.debug(
+        f"已加载物品模板，共 {len(bank.templates)} 个（模板库 {len(used)} 个，"
+        f"图片 {decoded} 个）"
+    )
+    return bank
+
+
+_bank: Optional[TemplateBank] = None
+_bank_lock = threading.Lock()
+
+
+def get_template_bank() -> TemplateBank:
+    """获取进程内共享的模板库（懒加载）"""
+    global _bank
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None:
+                _bank = _load_template_bank()
+    return _bank
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""
+批量模板匹配模块
+
+对同一块 ROI 一次性匹配多张模板，替代逐模板调用 context.run_recognition。
+算法与 MaaFramework TemplateMatch（method 1，TM_SQDIFF_NORMED + green_mask）一致：
+
+    sqdiff = Σ M·(T - I)² / sqrt(Σ M·T² · Σ M·I²)
+
+其中 M 为模板中非纯绿 (0, 255, 0) 像素的掩码，三个通道合并计算。
+展开后各项均为互相关，用 FFT 对所有模板批量计算。
+
+返回的分数为 1 - sqdiff（越高越相似），sqdiff <= threshold 视为命中。
+"""
+
+import numpy as np
+from typing import Dict, Hashable, List, Sequence, Tuple
+
+# 掩码颜色（BGR）
+GREEN_MASK_COLOR = (0, 255, 0)
+
+
+def green_mask(template: np.ndarray) -> np.ndarray:
+    """模板中非纯绿像素为 1，纯绿像素为 0"""
+    return np.any(template != GREEN_MASK_COLOR, axis=2).astype(np.float32)
+
+
+class MultiTemplateMatcher:
+    """
+    多模板匹配器
+
+    Args:
+        templates: {key: BGR 模板图像 (h, w, 3) uint8}
+    """
+
+    def __init__(self, templates: Dict[Hashable, np.ndarray]):
+        self._templates: Dict[Hashable, Tuple[np.ndarray, np.ndarray, float]] = {}
+        # (key, ROI 尺寸) -> 模板频谱缓存
+        self._spectra: Dict[Tuple[Hashable, Tuple[int, int]], Tuple] = {}
+        for key, template in templates.items():
+            template = np.asarray(template, dtype=np.float32)[:, :, :3]
+            mask = green_mask(template)
+            masked = template * mask[:, :, None]
+            self._templates[key] = (masked, mask, float(np.sum(masked * masked)))
+
+    def __contains__(self, key) -> bool:
+        return key in self._templates
+
+    @property
+    def max_width(self) -> int:
+        """最宽模板的宽度"""
+        return max(
+            (mask.shape[1] for _, mask, _ in self._templates.values()), default=0
+        )
+
+    def _spectrum(self, key, shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """模板与掩码补零到 ROI 尺寸后的频谱（补零区域掩码为 0，不影响有效位置）"""
+        spectrum = self._spectra.get((key, shape))
+        if spectrum is None:
+            masked, mask, _ = self._templates[key]
+            th, tw = mask.shape
+            padded = np.zeros((3,) + shape, dtype=np.float32)
+            padded[:, :th, :tw] = masked.transpose(2, 0, 1)
+            padded_mask = np.zeros(shape, dtype=np.float32)
+            padded_mask[:th, :tw] = mask
+            spectrum = (np.fft.rfft2(padded), np.fft.rfft2(padded_mask))
+            self._spectra[(key, shape)] = spectrum
+        return spectrum
+
+    def match(
+        self,
+        image: np.ndarray,
+        roi: Sequence[int],
+        keys: Sequence[Hashable],
+        threshold: float,
+    ) -> List[Tuple[Hashable, List[int], float]]:
+        """
+        在 ROI 内匹配多张模板，每张模板取最佳位置
+
+        Args:
+            image: BGR 截图
+            roi: [x, y, w, h]
+            keys: 参与匹配的模板
+            threshold: sqdiff 阈值（与 pipeline 中 method 1 的 threshold 含义相同）
+
+        Returns:
+            [(key, [x, y, w, h], score), ...]，仅包含命中的模板，box 为整图坐标
+        """
+        x, y, w, h = roi
+        strip = np.asarray(image[y : y + h, x : x + w, :3], dtype=np.float32)
+        height, width = strip.shape[:2]
+
+        keys = [
+            key
+            for key in keys
+            if key in self._templates
+            and self._templates[key][1].shape[0] <= height
+            and self._templates[key][1].shape[1] <= width
+        ]
+        if not keys:
+            return []
+
+        shape = (height, width)
+        spectra = [self._spectrum(key, shape) for key in keys]
+        template_fft = np.stack([spectrum[0] for spectrum in spectra])
+        mask_fft = np.stack([spectrum[1] for spectrum in spectra])
+
+        # 互相关：corr(I, M·T) 与 corr(Σ I², M)
+        image_fft = np.fft.rfft2(strip.transpose(2, 0, 1))
+        square_fft = np.fft.rfft2(np.sum(strip * strip, axis=2))
+        cross = np.fft.irfft2(
+            np.einsum("chw,kchw->khw", image_fft, np.conj(template_fft)), s=shape
+        )
+        window = np.fft.irfft2(square_fft[None] * np.conj(mask_fft), s=shape)
+
+        matches = []
+        for i, key in enumerate(keys):
+            _, mask, template_energy = self._templates[key]
+            th, tw = mask.shape
+            valid_cross = cross[i, : height - th + 1, : width - tw + 1]
+            valid_window = np.maximum(window[i, : height - th + 1, : width - tw + 1], 0)
+
+            denominator = np.sqrt(template_energy * valid_window)
+            numerator = np.maximum(template_energy - 2 * valid_cross + valid_window, 0)
+            sqdiff = np.divide(
+                numerator,
+                denominator,
+                out=np.ones_like(numerator),
+                where=denominator > 1e-6,
+            )
+
+            best = np.unravel_index(np.argmin(sqdiff), sqdiff.shape)
+            value = float(sqdiff[best])
+            if value <= threshold:
+                matches.append(
+                    (key, [x + int(best[1]), y + int(best[0]), tw, th], 1.0 - value)
+                )
+
+        return matches
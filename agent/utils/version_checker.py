@@ -2,10 +2,14 @@
 
 import json
 import sys
+import time
 import platform
+import threading
 import requests
 from pathlib import Path
+from typing import Dict
 from . import logger
+from .http_client import get_session
 from .exceptions import (
     ResourceNotFoundError,
     InvalidOSError,
@@ -16,6 +20,14 @@ from .exceptions import (
     VersionCheckError,
 )
 
+CACHE_FILE = Path("./config/version_cache.json")
+# 默认缓存有效期（秒）
+DEFAULT_CACHE_TTL = 6 * 60 * 60
+# 过期缓存最多继续使用的时间（秒），后台刷新一直失败时超过该时间即视为未命中
+MAX_STALE_AGE = 24 * 60 * 60
+
+_cache_lock = threading.Lock()
+
 
 def _infer_channel_from_version(version: str) -> str:
     """
@@ -36,12 +48,115 @@ def _infer_channel_from_version(version: str) -> str:
         return "stable"
 
 
-def check_resource_version(interface_file_path: str = "./interface.json") -> dict:
+def _load_cache() -> Dict[str, Dict]:
+    """
+    加载版本缓存
+
+    Returns:
+        dict: {"<rid>|<channel>|<os>|<arch>": {
+            "latest_version": str,
+            "current_version": str,  # 写入缓存时的本地版本
+            "fetched_at": float,
+        }}
+    """
+    if not CACHE_FILE.exists():
+        return {}
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _update_cache(cache_key: str, latest_version: str, current_version: str):
+    """写入单个缓存项"""
+    with _cache_lock:
+        cache = _load_cache()
+        cache[cache_key] = {
+            "latest_version": latest_version,
+            "current_version": current_version,
+            "fetched_at": time.time(),
+        }
+        try:
+            CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(CACHE_FILE, "w", encoding="utf-8") as f:
+                json.dump(cache, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            logger.debug(f"保存版本缓存失败: {e}")
+
+
+def _fetch_latest_version(rid: str, os_type: str, machine: str, channel: str) -> str:
+    """
+    调用 mirrorchyan API 获取最新版本号
+
+    Raises:
+        VersionCheckError: API 返回错误码
+        requests.exceptions.RequestException: 网络请求失败
+    """
+    api_url = f"https://mirrorchyan.com/api/resources/{rid}/latest/?os={os_type}&arch={machine}&channel={channel}&user_agent=M9A-Agent"
+    logger.debug(f"正在检查资源版本: {api_url}")
+
+    response = get_session(use_proxy=True).get(api_url, timeout=10)
+    response.raise_for_status()
+
+    latest_data = response.json()
+
+    # 检查API返回的错误码
+    code = latest_data.get("code", 0)
+    if code != 0:
+        msg = latest_data.get("msg", "未知错误")
+
+        # 根据错误码抛出对应的异常
+        if code == 8001:
+            raise ResourceNotFoundError(os_type, machine)
+        elif code == 8002:
+            raise InvalidOSError(os_type)
+        elif code == 8003:
+            raise InvalidArchError(machine)
+        elif code == 8004:
+            channel = latest_data.get("channel", "unknown")
+            raise InvalidChannelError(channel)
+        elif code > 0:
+            raise APIBusinessError(code, msg)
+        else:
+            raise APICriticalError(code, msg)
+
+    # 从 data 字段中获取版本信息
+    data = latest_data.get("data", {})
+    return data.get("version_name", "unknown")
+
+
+def _refresh_cache(
+    cache_key: str,
+    current_version: str,
+    rid: str,
+    os_type: str,
+    machine: str,
+    channel: str,
+):
+    """后台刷新过期的版本缓存"""
+    try:
+        latest_version = _fetch_latest_version(rid, os_type, machine, channel)
+        _update_cache(cache_key, latest_version, current_version)
+        logger.debug(f"版本缓存已刷新: {latest_version}")
+    except Exception as e:
+        logger.debug(f"后台刷新版本缓存失败: {e}")
+
+
+def check_resource_version(
+    interface_file_path: str = "./interface.json",
+    cache_ttl: float = DEFAULT_CACHE_TTL,
+) -> dict:
     """
     检查资源版本是否为最新
 
+    结果按 (rid, channel, os, arch) 缓存在 config/version_cache.json：
+    有效期内不发起网络请求；过期后先返回旧结果，并在后台刷新。
+    本地版本与写入缓存时不同（资源已更新），或过期超过 MAX_STALE_AGE 时视为未命中。
+
     Args:
         interface_file_path: interface.json文件路径
+        cache_ttl: 缓存有效期（秒）
 
     Returns:
         dict: {
@@ -122,38 +237,36 @@ def check_resource_version(interface_file_path: str = "./interface.json") -> dic
         os_type = platform.system().lower()
         machine = platform.machine().lower()
 
-        # 调用API检查最新版本
-        api_url = f"https://mirrorchyan.com/api/resources/{rid}/latest/?os={os_type}&arch={machine}&channel={channel}&user_agent=M9A-Agent"
-        logger.debug(f"正在检查资源版本: {api_url}")
-
-        response = requests.get(api_url, timeout=10)
-        response.raise_for_status()
-
-        latest_data = response.json()
-
-        # 检查API返回的错误码
-        code = latest_data.get("code", 0)
-        if code != 0:
-            msg = latest_data.get("msg", "未知错误")
-
-            # 根据错误码抛出对应的异常
-            if code == 8001:
-                raise ResourceNotFoundError(os_type, machine)
-            elif code == 8002:
-                raise InvalidOSError(os_type)
-            elif code == 8003:
-                raise InvalidArchError(machine)
-            elif code == 8004:
-                channel = latest_data.get("channel", "unknown")
-                raise InvalidChannelError(channel)
-            elif code > 0:
-                raise APIBusinessError(code, msg)
-            else:
-                raise APICriticalError(code, msg)
+        cache_key = f"{rid}|{channel}|{os_type}|{machine}"
+        cached = _load_cache().get(cache_key)
+        if cached and cached.get("current_version") != current_version:
+            # 本地资源版本已变化，旧的比较结果不再适用
+            logger.debug(f"本地版本已变化，忽略版本缓存: {cache_key}")
+            cached = None
+        cache_age = time.time() - cached.get("fetched_at", 0) if cached else None
+        if cached and cache_age >= cache_ttl + MAX_STALE_AGE:
+            # 后台刷新长期失败，不再使用过旧的结果
+            logger.debug(f"版本缓存过旧（{int(cache_age)}s），重新获取: {cache_key}")
+            cached = None
+
+        if cached and cache_age < cache_ttl:
+            # 缓存有效期内，不发起网络请求
+            latest_version = cached["latest_version"]
+            logger.debug(f"使用缓存的最新版本: {latest_version} ({int(cache_age)}s 前)")
+        elif cached:
+            # 缓存已过期：先返回旧结果，后台刷新
+            latest_version = cached["latest_version"]
+            logger.debug(f"版本缓存已过期，后台刷新: {cache_key}")
+            threading.Thread(
+                target=_refresh_cache,
+                args=(cache_key, current_version, rid, os_type, machine, channel),
+                name="version-check-refresh",
+                daemon=True,
+            ).start()
+        else:
+            latest_version = _fetch_latest_version(rid, os_type, machine, channel)
+            _update_cache(cache_key, latest_version, current_version)
 
-        # 从 data 字段中获取版本信息
-        data = latest_data.get("data", {})
-        latest_version = data.get("version_name", "unknown")
         result["latest_version"] = latest_version
 
         # 比较版本
@@ -1,8 +1,12 @@
 import shutil
 import os
+import sys
 import json
 from pathlib import Path
 
+sys.path.append(str(Path("tools") / "ci"))
+from build_template_bank import build_template_bank
+
 os.makedirs("build", exist_ok=True)
 shutil.copytree("agent", "build/agent")
 shutil.copytree("assets/resource","build/resource")
@@ -26,4 +30,6 @@ shutil.copytree(
     Path("assets") / "MaaCommonAssets" / "OCR" / "ppocr_v4" / "zh_cn",
     Path("build") / "resource" / "base" / "model" / "ocr",
     dirs_exist_ok=True,
-)
\ No newline at end of file
+)
+
+build_template_bank(Path("build") / "resource")
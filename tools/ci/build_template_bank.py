@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+"""
+打包掉落识别模板库
+
+将 image/Items_processed 下的物品模板、掉落稀有度颜色参数（DropRarity* 节点）
+和 data/combat/items.json 打包为一个未压缩的 .npz 文件，
+agent 每个进程只需读取一次，无需逐个解码 PNG。
+
+文件内容:
+    ids            (K,)            物品 ID
+    sizes          (K, 2)          模板尺寸 (h, w)
+    templates      (K, H, W, 3)    BGR 模板，补齐部分填充纯绿（匹配时被掩码忽略）
+    rarity_names   (R,)            稀有度
+    rarity_lower   (R, N, 3)       颜色下界（RGB），每个稀有度最多 N 组范围，补齐部分为 0
+    rarity_upper   (R, N, 3)       颜色上界（RGB）
+    rarity_ranges  (R,)            每个稀有度的有效范围组数
+    rarity_count   (R,)            最少像素数
+    meta           ()              JSON: {"version", "items", "sources": {相对路径: sha256}}
+
+agent 加载时按 sources 中的哈希校验源文件，热更新修改过的文件会回退到直接读取源文件。
+
+用法:
+    python tools/ci/build_template_bank.py [resource 目录] [输出文件]
+"""
+
+import sys
+import json
+import hashlib
+from pathlib import Path
+
+BANK_VERSION = 2
+BANK_PATH = Path("data") / "combat" / "item_templates.npz"
+TEMPLATE_DIR = Path("base") / "image" / "Items_processed"
+ITEMS_PATH = Path("data") / "combat" / "items.json"
+PIPELINE_DIR = Path("base") / "pipeline"
+
+# 稀有度 -> 颜色匹配节点名（与 DropRecognitionState.RARITY_TO_COLOR_NODE 一致）
+RARITY_TO_COLOR_NODE = {
+    "gold": "DropRarityGold",
+    "yellow": "DropRarityYellow",
+    "purple": "DropRarityPurple",
+    "blue": "DropRarityBlue",
+    "green": "DropRarityGreen",
+}
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _source_key(resource_dir: Path, path: Path) -> str:
+    """与 agent 运行目录一致的相对路径（resource/...）"""
+    return (Path("resource") / path.relative_to(resource_dir)).as_posix()
+
+
+def _find_rarity_nodes(resource_dir: Path) -> dict:
+    """在 pipeline 中查找 DropRarity* 节点，兼容新旧两种节点格式"""
+    wanted = set(RARITY_TO_COLOR_NODE.values())
+    nodes = {}
+    for path in sorted((resource_dir / PIPELINE_DIR).rglob("*.json")):
+        text = path.read_text(encoding="utf-8")
+        # 部分 pipeline 含注释，只解析包含目标节点的文件
+        if not any(name in text for name in wanted):
+            continue
+        pipeline = json.loads(text)
+        for name in wanted & pipeline.keys():
+            node = pipeline[name]
+            recognition = node.get("recognition")
+            param = (
+                recognition.get("param", {}) if isinstance(recognition, dict) else node
+            )
+            nodes[name] = (param, path)
+    return nodes
+
+
+def build_template_bank(resource_dir: Path, output: Path = None) -> bool:
+    """
+    生成模板库
+
+    Args:
+        resource_dir: resource 目录（assets/resource 或安装目录下的 resource）
+        output: 输出文件，默认为 resource/data/combat/item_templates.npz
+
+    Returns:
+        bool: 是否生成成功
+    """
+    try:
+        import numpy as np
+        from PIL import Image
+    except ImportError as e:
+        print(f"Warning: skip building template bank ({e})")
+        return False
+
+    resource_dir = Path(resource_dir)
+    output = Path(output) if output else resource_dir / BANK_PATH
+    sources = {}
+
+    ids, images = [], []
+    for path in sorted((resource_dir / TEMPLATE_DIR).glob("Item-*.png")):
+        try:
+            item_id = int(path.stem.split("-", 1)[1])
+        except ValueError:
+            continue
+        with Image.open(path) as image:
+            images.append(np.asarray(image.convert("RGB"))[:, :, ::-1])
+        ids.append(item_id)
+        sources[_source_key(resource_dir, path)] = _sha256(path)
+
+    if not images:
+        print(f"Warning: no item templates found in {resource_dir / TEMPLATE_DIR}")
+        return False
+
+    height = max(image.shape[0] for image in images)
+    width = max(image.shape[1] for image in images)
+    templates = np.zeros((len(images), height, width, 3), dtype=np.uint8)
+    templates[:, :, :, 1] = 255
+    for i, image in enumerate(images):
+        templates[i, : image.shape[0], : image.shape[1]] = image
+
+    rarity_nodes = _find_rarity_nodes(resource_dir)
+    rarity_names = [
+        r for r, node in RARITY_TO_COLOR_NODE.items() if node in rarity_nodes
+    ]
+    # 节点可以有多组范围（lower/upper 为 [[r, g, b], ...]），按稀有度分别补齐
+    rarity_params = [rarity_nodes[RARITY_TO_COLOR_NODE[r]][0] for r in rarity_names]
+    lowers = [np.reshape(p["lower"], (-1, 3)) for p in rarity_params]
+    uppers = [np.reshape(p["upper"], (-1, 3)) for p in rarity_params]
+    for rarity, lower, upper in zip(rarity_names, lowers, uppers):
+        if lower.shape != upper.shape:
+            print(
+                f"Error: {RARITY_TO_COLOR_NODE[rarity]} has mismatched lower/upper ranges"
+            )
+            return False
+    range_counts = [len(lower) for lower in lowers]
+    max_ranges = max(range_counts, default=1)
+    rarity_lower = np.zeros((len(rarity_names), max_ranges, 3), dtype=np.int32)
+    rarity_upper = np.zeros((len(rarity_names), max_ranges, 3), dtype=np.int32)
+    for i, (lower, upper) in enumerate(zip(lowers, uppers)):
+        rarity_lower[i, : len(lower)] = lower
+        rarity_upper[i, : len(upper)] = upper
+    for rarity in rarity_names:
+        param, path = rarity_nodes[RARITY_TO_COLOR_NODE[rarity]]
+        sources[_source_key(resource_dir, path)] = _sha256(path)
+
+    items_path = resource_dir / ITEMS_PATH
+    with open(items_path, encoding="utf-8") as f:
+        items = json.load(f)
+    sources[_source_key(resource_dir, items_path)] = _sha256(items_path)
+
+    meta = {"version": BANK_VERSION, "items": items, "sources": sources}
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(
+        output,
+        ids=np.array(ids, dtype=np.int64),
+        sizes=np.array([image.shape[:2] for image in images], dtype=np.int32),
+        templates=templates,
+        rarity_names=np.array(rarity_names, dtype=str),
+        rarity_lower=rarity_lower,
+        rarity_upper=rarity_upper,
+        rarity_ranges=np.array(range_counts, dtype=np.int32),
+        rarity_count=np.array(
+            [p.get("count", 1) for p in rarity_params], dtype=np.int32
+        ),
+        meta=np.array(json.dumps(meta, ensure_ascii=False)),
+    )
+    print(
+        f"Template bank written to {output}: {len(ids)} templates, "
+        f"{len(rarity_names)} rarity colors, {output.stat().st_size} bytes"
+    )
+    return True
+
+
+if __name__ == "__main__":
+    working_dir = Path(__file__).parent.parent.parent
+    resource_dir = (
+        Path(sys.argv[1]) if len(sys.argv) > 1 else working_dir / "assets" / "resource"
+    )
+    output = Path(sys.argv[2]) if len(sys.argv) > 2 else None
+    sys.exit(0 if build_template_bank(resource_dir, output) else 1)
@@ -10,6 +10,7 @@ sys.path.append(script_dir)
 
 from configure import configure_ocr_model
 from generate_manifest_cache import generate_manifest_cache
+from build_template_bank import build_template_bank
 
 working_dir = Path(__file__).parent.parent.parent
 install_path = working_dir / Path("install")
@@ -106,6 +107,12 @@ def install_agent():
         json.dump(interface, f, ensure_ascii=False, indent=4)
 
 
+def install_template_bank():
+    """打包掉落识别模板库，避免 agent 每次启动逐个解码模板图片"""
+    if not build_template_bank(install_path / "resource"):
+        print("Warning: Template bank not generated, agent will decode templates at runtime.")
+
+
 def install_manifest_cache():
     """生成初始 manifest 缓存，加速用户首次启动"""
     config_dir = install_path / "config"
@@ -121,6 +128,7 @@ def install_manifest_cache():
 if __name__ == "__main__":
     install_deps(platform_tag)
     install_resource()
+    install_template_bank()
     install_chores()
     install_agent()
     install_manifest_cache()
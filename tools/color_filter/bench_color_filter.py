@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+"""
+ROI 颜色过滤基准测试
+
+对比 agent/utils/color_filter 与原先整帧处理的实现，并校验 ROI 内结果一致：
+    1. 掉落数量数字过滤（DropRecognitionState.filter_digit_colors，ROI 为各物品数量区域）
+    2. 静谧症候群购物清单黑色文字过滤（ROI 为 SOSShoppingListOCR）
+    3. 缪斯币数字颜色过滤（CCRemainMoney，ROI 为 CCRemainMoney_rec）
+
+用法:
+    python tools/color_filter/bench_color_filter.py --repeat 200
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+AGENT_DIR = SCRIPT_DIR.parent.parent / "agent"
+sys.path.insert(0, str(AGENT_DIR))
+
+from utils.color_filter import ChannelRange, GrayBand, filter_rois
+
+# 节点 ROI（与 pipeline 一致）
+SOS_SHOPPING_ROI = [160, 62, 244, 627]
+CC_REMAIN_MONEY_ROI = [669, 29, 36, 25]
+# 6 个掉落物品的数量区域
+DROP_COUNT_ROIS = [[x + 12, 613, 58, 19] for x in range(661, 1259, 100)]
+
+
+def legacy_digit_colors(img):
+    max_channel = np.max(img, axis=2)
+    min_channel = np.min(img, axis=2)
+    gray_mask = (max_channel - min_channel) < 50
+    brightness = np.mean(img, axis=2)
+    mask = gray_mask & (brightness >= 100) & (brightness <= 240)
+    result = np.ones_like(img) * 255
+    result[mask] = 0
+    return result
+
+
+def legacy_dark_text(img):
+    mask = np.all(img <= 95, axis=-1)
+    return np.where(mask[..., None], img, 255).astype(np.uint8)
+
+
+def legacy_remain_money(img):
+    target_color = np.array([215, 241, 249])
+    tolerance = 55
+    lower_bound = np.maximum(target_color - tolerance, 0)
+    upper_bound = np.minimum(target_color + tolerance, 255)
+    color_mask = np.all((img >= lower_bound) & (img <= upper_bound), axis=-1)
+    return np.where(color_mask[..., None], img, 0).astype(np.uint8)
+
+
+CASES = [
+    (
+        "drop digit colors",
+        legacy_digit_colors,
+        DROP_COUNT_ROIS,
+        GrayBand(max_diff=50, min_brightness=100, max_brightness=240),
+    ),
+    (
+        "sos dark text",
+        legacy_dark_text,
+        [SOS_SHOPPING_ROI],
+        ChannelRange(lower=(0, 0, 0), upper=(95, 95, 95), fill=255),
+    ),
+    (
+        "cc remain money",
+        legacy_remain_money,
+        [CC_REMAIN_MONEY_ROI],
+        ChannelRange(lower=(160, 186, 194), upper=(255, 255, 255), fill=0),
+    ),
+]
+
+
+def timeit(func, repeat: int) -> float:
+    func()
+    begin = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - begin) / repeat * 1000
+
+
+def make_image(seed: int = 0) -> np.ndarray:
+    """随机 720p 截图，叠加灰色/暗色/亮色块，保证各规则都有命中像素"""
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+    gray = rng.integers(0, 256, (720, 1280, 1), dtype=np.uint8)
+    img[::2] = np.repeat(gray[::2], 3, axis=2)
+    img[::3, ::3] //= 3
+    return img
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ROI 颜色过滤基准测试")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    img = make_image()
+    failures = 0
+    for name, legacy, rois, rule in CASES:
+        expected = legacy(img)
+        result = filter_rois(img, rois, rule)
+        for x, y, w, h in rois:
+            if not np.array_equal(
+                result[y : y + h, x : x + w], expected[y : y + h, x : x + w]
+            ):
+                failures += 1
+                print(f"{name}: ROI {[x, y, w, h]} 结果不一致")
+
+        legacy_ms = timeit(lambda: legacy(img), args.repeat)
+        roi_ms = timeit(lambda: filter_rois(img, rois, rule), args.repeat)
+        full_ms = timeit(lambda: filter_rois(img, None, rule), args.repeat)
+        print(
+            f"{name:<20} legacy {legacy_ms:8.3f} ms   roi {roi_ms:8.3f} ms"
+            f"   full-frame {full_ms:8.3f} ms   x{legacy_ms / roi_ms:6.1f}"
+        )
+
+    print("OK" if not failures else f"{failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+"""
+掉落稀有度颜色验证的一致性测试
+
+检查 DropRecognitionState.rarity_color_mask 的结果与 golden.json 中的期望稀有度一致：
+每个物品框对期望的稀有度应匹配，对其余稀有度都不应匹配
+（期望为 null 表示没有可识别的色条，全部不匹配）。
+
+默认使用 tools/drop_recognition/fixtures 中的合成截图：由 make_fixtures.py 用游戏物品模板拼成，
+色条颜色取自 pipeline 中同一组 DropRarity* 范围，golden.json 与生成布局对应。
+因此这组截图不能证明颜色范围与游戏实际色条相符（颜色来源与被测范围相同），
+只用于检查物品框下方色条区域的位置、边缘裁剪与 count 阈值。
+加 --maafw 时另外用 Tasker.post_recognition 对每个物品框执行与 DropRarity* 节点相同的
+ColorMatch，检查向量化实现与 MaaFW 的结果一致（不需要设备）。
+仓库中没有实际的战斗结算截图，要验证颜色范围本身，需要指定人工标注的实际截图目录
+（如 debug/rare_drops，见下方 --record）。
+
+截图说明：agent 保存截图时直接将 BGR 数组写入 PNG，
+因此这里读取 PNG 得到的数组即为原始 BGR 截图，无需转换通道。
+
+golden.json 格式:
+    {
+        "xxx.png": [
+            {"box": [x, y, w, h], "rarity": "gold"},
+            {"box": [x, y, w, h], "rarity": null},
+            ...
+        ]
+    }
+
+用法:
+    python tools/drop_recognition/check_rarity.py [截图目录] [--maafw]
+    python tools/drop_recognition/check_rarity.py debug/rare_drops --record
+        # 为目录中的截图生成空的 golden.json，人工标注后再运行
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPT_DIR.parent.parent
+sys.path.insert(0, str(ROOT_DIR / "agent"))
+sys.path.insert(0, str(ROOT_DIR / "tools" / "ci"))
+FIXTURE_DIR = SCRIPT_DIR / "fixtures"
+
+from build_template_bank import RARITY_TO_COLOR_NODE, _find_rarity_nodes
+
+
+def load_rarity_colors() -> dict:
+    nodes = _find_rarity_nodes(ROOT_DIR / "assets" / "resource")
+    colors = {}
+    for rarity, node_name in RARITY_TO_COLOR_NODE.items():
+        param, _ = nodes[node_name]
+        colors[rarity] = {
+            "lower": np.reshape(param["lower"], (-1, 3)).tolist(),
+            "upper": np.reshape(param["upper"], (-1, 3)).tolist(),
+            "count": param.get("count", 1),
+        }
+    return colors
+
+
+def maafw_color_match(golden: dict, directory: Path, colors: dict) -> dict:
+    """用 MaaFW ColorMatch 识别每个物品框的各稀有度色条 {截图名: [bool, ...]}
+
+    顺序与 check_cases 一致。必须在导入 custom（会导入 maa.agent，把框架切换为
+    AgentServer 模式）之前调用。
+    """
+    from maa.resource import Resource
+    from maa.tasker import Tasker
+    from maa.pipeline import JRecognitionType, JColorMatch
+
+    sys.path.insert(0, str(ROOT_DIR / "tools" / "frame_provider"))
+    from check_frame_reuse import FakeDevice
+
+    device = FakeDevice()
+    device.post_connection().wait()
+    tasker = Tasker()
+    tasker.bind(Resource(), device)
+
+    results = {}
+    for filename, cases in golden.items():
+        img = np.asarray(Image.open(directory / filename).convert("RGB"))
+        hits = []
+        for case in cases:
+            x, y, w, h = case["box"]
+            # 与 DropRecognitionState.rarity_color_mask 相同的色条区域
+            roi = (x - 5, y + 76, w + 14, h - 39)
+            for color in colors.values():
+                param = JColorMatch(
+                    lower=color["lower"],
+                    upper=color["upper"],
+                    roi=roi,
+                    count=color["count"],
+                )
+                detail = (
+                    tasker.post_recognition(JRecognitionType.ColorMatch, param, img)
+                    .wait()
+                    .get()
+                )
+                hits.append(bool(detail and detail.nodes[0].recognition.hit))
+        results[filename] = hits
+    return results
+
+
+def check_cases(img, cases, colors, maafw_hits=None) -> int:
+    """每个物品框与所有稀有度交叉验证，给出 maafw_hits 时同时与 MaaFW 的结果比较"""
+    from custom.action.combat import DropRecognitionState
+
+    boxes, ranges, expected = [], [], []
+    for case in cases:
+        for rarity, color in colors.items():
+            boxes.append(case["box"])
+            ranges.append(color)
+            expected.append(rarity == case["rarity"])
+    mask = DropRecognitionState.rarity_color_mask(img, boxes, ranges)
+
+    failures = 0
+    for i, (result, want) in enumerate(zip(mask, expected)):
+        case = cases[i // len(colors)]
+        rarity = list(colors)[i % len(colors)]
+        if bool(result) != want:
+            failures += 1
+            print(
+                f"  FAIL box={case['box']} expected={case['rarity']} "
+                f"checked={rarity} result={bool(result)}"
+            )
+        if maafw_hits is not None and bool(result) != maafw_hits[i]:
+            failures += 1
+            print(
+                f"  FAIL box={case['box']} checked={rarity} "
+                f"result={bool(result)} maafw={maafw_hits[i]}"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="掉落稀有度颜色验证一致性测试")
+    parser.add_argument(
+        "directory", nargs="?", help="截图目录（包含 golden.json），默认使用 fixtures"
+    )
+    parser.add_argument(
+        "--record", action="store_true", help="生成待标注的 golden.json"
+    )
+    parser.add_argument(
+        "--maafw", action="store_true", help="同时与 MaaFW ColorMatch 的结果比较"
+    )
+    args = parser.parse_args()
+
+    colors = load_rarity_colors()
+    directory = Path(args.directory) if args.directory else FIXTURE_DIR
+    golden_file = directory / "golden.json"
+
+    if args.record:
+        golden = {}
+        for path in sorted(directory.glob("*.png")):
+            golden[path.name] = []
+        with open(golden_file, "w", encoding="utf-8") as f:
+            json.dump(golden, f, indent=2, ensure_ascii=False)
+        print(f"已生成 {golden_file}，请为每张截图填写物品 box 与 rarity 后重新运行")
+        return 0
+
+    with open(golden_file, encoding="utf-8") as f:
+        golden = json.load(f)
+
+    maafw_results = maafw_color_match(golden, directory, colors) if args.maafw else {}
+    total = failures = 0
+    for filename, cases in golden.items():
+        img = np.asarray(Image.open(directory / filename).convert("RGB"))
+        file_failures = check_cases(img, cases, colors, maafw_results.get(filename))
+        print(f"{filename}: {len(cases)} cases, {file_failures} failures")
+        total += len(cases)
+        failures += file_failures
+
+    print(f"total: {total} cases, {failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
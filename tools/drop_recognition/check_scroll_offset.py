@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+"""
+掉落列表滚动距离估计检查
+
+检查 utils.frame.estimate_scroll_offset 在物品按固定间距排列时不会把滚动整数格
+误判为其他距离（尤其是 0，会导致 DropRecognition 提前结束、漏掉后面的物品）：
+结果必须等于真实距离（±2px），或为 None（DropRecognition 退回匹配整个区域）。
+
+默认用游戏物品模板（Items_processed）按掉落行间距拼出一条长列表，
+在不同滚动距离下截取 DropRegionRec 宽度的帧对（包括整数格、DropRecognition 的滑动距离
+以及到达末尾时的未滚动），并用同一模板排成的列表检查间距造成的歧义。
+超出搜索范围（max_offset）的滚动不在检查范围内。仓库中没有保存的实际滑动前后截图，
+有实际截图时可指定目录，目录中 pairs.json 格式:
+    {
+        "name": {"previous": "a.png", "current": "b.png", "offset": 234}
+    }
+offset 为人工测得的真实滚动距离，截图为 agent 保存的 BGR PNG，取 DropRegionRec 的 roi。
+
+用法:
+    python tools/drop_recognition/check_scroll_offset.py [帧对目录]
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPT_DIR.parent.parent
+sys.path.insert(0, str(ROOT_DIR / "agent"))
+
+from utils.frame import estimate_scroll_offset, frame_difference
+
+ITEM_DIR = ROOT_DIR / "assets" / "resource" / "base" / "image" / "Items_processed"
+# DropRegionRec 的 roi
+REGION = [661, 549, 598, 68]
+# DropRecognition 的最大搜索距离与判断未滚动的差值（与 combat.py 一致）
+MAX_OFFSET = REGION[2] // 2
+SCROLL_STILL_DIFF = 2.0
+TOLERANCE = 2
+
+
+def build_row(pitch: int, count: int, seed: int = 0, same: bool = False) -> np.ndarray:
+    """按固定间距排列物品模板的长列表（BGR），same 为 True 时全部使用同一个模板"""
+    rng = np.random.default_rng(seed)
+    paths = sorted(ITEM_DIR.glob("Item-1*.png"))
+    if same:
+        paths = paths[:1]
+    height = REGION[3]
+    row = np.full((height, pitch * count + REGION[2], 3), 30, dtype=np.uint8)
+    for i in range(count):
+        path = paths[rng.integers(len(paths))]
+        icon = np.asarray(Image.open(path).convert("RGB"))[:, :, ::-1]
+        h, w = icon.shape[:2]
+        row[4 : 4 + h, i * pitch : i * pitch + w] = icon[: height - 4]
+    return row
+
+
+def synthetic_pairs():
+    """(名称, 上一帧, 当前帧, 真实距离)"""
+    width = REGION[2]
+    for pitch, same in ((100, False), (117, False), (100, True), (117, True)):
+        row = build_row(pitch, 12, seed=pitch, same=same)
+        label = f"pitch={pitch}{' same' if same else ''}"
+        for offset in (0, 30, pitch, 2 * pitch, 234, 250, MAX_OFFSET):
+            # 同一模板滚动整数格后两帧完全相同，任何方法都无法与未滚动区分；
+            # 实际掉落列表中每种物品只占一格，不会出现这种情况
+            if same and offset and offset % pitch == 0:
+                continue
+            for start in (0, 37):
+                yield (
+                    f"{label} start={start} offset={offset}",
+                    row[:, start : start + width],
+                    row[:, start + offset : start + offset + width],
+                    offset,
+                )
+        # 到达末尾：列表右侧没有新内容，滚动被截断
+        end = row.shape[1] - width
+        yield (f"{label} end", row[:, end:], row[:, end:], 0)
+
+
+def file_pairs(directory: Path):
+    with open(directory / "pairs.json", encoding="utf-8") as f:
+        pairs = json.load(f)
+    x, y, w, h = REGION
+    for name, pair in pairs.items():
+        frames = [
+            np.asarray(Image.open(directory / pair[key]).convert("RGB"))
+            for key in ("previous", "current")
+        ]
+        yield (
+            name,
+            frames[0][y : y + h, x : x + w],
+            frames[1][y : y + h, x : x + w],
+            pair["offset"],
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="掉落列表滚动距离估计检查")
+    parser.add_argument("directory", nargs="?", help="实际帧对目录（包含 pairs.json）")
+    args = parser.parse_args()
+
+    pairs = file_pairs(Path(args.directory)) if args.directory else synthetic_pairs()
+    total = failures = unknown = 0
+    for name, previous, current, expected in pairs:
+        total += 1
+        if frame_difference(previous, current) < SCROLL_STILL_DIFF:
+            result = "still"
+            ok = expected == 0
+        else:
+            offset = estimate_scroll_offset(previous, current, MAX_OFFSET)
+            result = offset
+            if offset is None:
+                unknown += 1
+            ok = offset is None or abs(offset - expected) <= TOLERANCE
+        if not ok:
+            failures += 1
+        print(f"[{'OK' if ok else 'FAIL'}] {name}: {result}")
+
+    print(f"total: {total} pairs, {unknown} unknown (full scan), {failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
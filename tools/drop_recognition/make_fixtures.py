@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""
+生成掉落稀有度合成截图
+
+仓库中没有保存的战斗结算截图，这里用游戏内的物品模板（Items_processed）
+按结算界面的掉落行布局（DropRegionRec 的 roi）拼出 1280x720 截图，
+在每个物品下方画出稀有度色条，背景为公告中的游戏主界面截图。
+色条颜色取自 pipeline 中对应 DropRarity* 节点范围内的随机值（或有意偏离范围），
+并非游戏中的实际颜色，见 check_rarity.py 的说明。
+
+截图按 agent 保存截图的方式写出：BGR 数组直接写入 PNG。
+
+期望结果见 fixtures/golden.json，与下方 LAYOUTS 中的色条稀有度一一对应
+（偏离范围的色条期望为 null），布局修改后需同步更新 golden.json。
+
+用法:
+    python tools/drop_recognition/make_fixtures.py
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPT_DIR.parent.parent
+FIXTURE_DIR = SCRIPT_DIR / "fixtures"
+sys.path.insert(0, str(ROOT_DIR / "tools" / "ci"))
+
+from build_template_bank import RARITY_TO_COLOR_NODE, _find_rarity_nodes
+
+ITEM_DIR = ROOT_DIR / "assets" / "resource" / "base" / "image" / "Items_processed"
+BACKGROUND = (
+    ROOT_DIR
+    / "assets"
+    / "resource"
+    / "announcement"
+    / "images"
+    / "newbie-main-interface.png"
+)
+
+# 掉落行物品框顶部 y
+ROW_Y = 555
+# 色条相对物品框顶部的位置与高度
+BAR_OFFSET = 80
+BAR_HEIGHT = 6
+
+# 截图名 -> [(物品 id, 物品框 x, 色条稀有度或 None, 色条颜色偏移)]
+# 颜色偏移非零时色条颜色落在范围之外，用于检查不会误判
+LAYOUTS = {
+    # 一行不同稀有度的掉落
+    "drops_mixed.png": [
+        ("111005", 661, "gold", 0),
+        ("110604", 761, "yellow", 0),
+        ("110503", 861, "purple", 0),
+        ("110302", 961, "blue", 0),
+        ("110401", 1061, "green", 0),
+        ("110704", 1161, "yellow", 0),
+    ],
+    # 靠近右边缘：边框区域超出截图
+    "drops_edge.png": [
+        ("111007", 1000, "gold", 0),
+        ("110803", 1100, "purple", 0),
+        ("110102", 1195, "blue", 0),
+    ],
+    # 物品图标自身含其他稀有度颜色，以及无色条/色条颜色偏离范围的物品
+    "drops_icon_colours.png": [
+        ("110604", 661, "blue", 0),
+        ("111007", 761, "green", 0),
+        ("110802", 861, None, 0),
+        ("111103", 961, "yellow", 24),
+        ("110204", 1061, "yellow", 0),
+    ],
+}
+
+
+def load_color_ranges() -> dict:
+    nodes = _find_rarity_nodes(ROOT_DIR / "assets" / "resource")
+    ranges = {}
+    for rarity, node_name in RARITY_TO_COLOR_NODE.items():
+        param, _ = nodes[node_name]
+        ranges[rarity] = (
+            np.reshape(param["lower"], (-1, 3))[0],
+            np.reshape(param["upper"], (-1, 3))[0],
+        )
+    return ranges
+
+
+def to_bgr(img: Image.Image) -> np.ndarray:
+    return np.asarray(img.convert("RGB"))[:, :, ::-1]
+
+
+def compose(layout, ranges, rng) -> np.ndarray:
+    background = Image.open(BACKGROUND).resize((1280, 720), Image.BILINEAR)
+    img = to_bgr(background).copy()
+    # 结算界面掉落行底色较暗
+    img[ROW_Y - 10 : ROW_Y + 100] //= 3
+
+    for item_id, x, rarity, offset in layout:
+        icon = to_bgr(Image.open(ITEM_DIR / f"Item-{item_id}.png"))
+        h, w = icon.shape[:2]
+        img[ROW_Y : ROW_Y + h, x : x + w] = icon[:, : max(min(w, 1280 - x), 0)]
+        if rarity is None:
+            continue
+        lower, upper = ranges[rarity]
+        bar = rng.integers(lower, upper + 1, size=(BAR_HEIGHT, w, 3)) + offset
+        bar = np.clip(bar, 0, 255).astype(np.uint8)[:, : max(min(w, 1280 - x), 0)]
+        y = ROW_Y + BAR_OFFSET
+        img[y : y + BAR_HEIGHT, x : x + bar.shape[1]] = bar[:, :, ::-1]
+    return img
+
+
+def main():
+    ranges = load_color_ranges()
+    rng = np.random.default_rng(0)
+    FIXTURE_DIR.mkdir(exist_ok=True)
+    for filename, layout in LAYOUTS.items():
+        img = compose(layout, ranges, rng)
+        # 与 agent 保存截图一致：BGR 数组直接写入 PNG
+        Image.fromarray(img).save(FIXTURE_DIR / filename, optimize=True)
+        print(f"已生成 {FIXTURE_DIR / filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""
+截图复用检查
+
+用 maa CustomController（不需要设备）产生真实的 controller 事件，经与
+agent/custom/hooks.FrameFreshnessSink 相同的转发交给 FrameProvider，确认：
+    1. 截图后 max_age 内再次 get_frame 复用 cached_image，不再截图
+    2. 收到点击（输入动作）事件后当前帧作废，重新截图
+    3. 超过 max_age 后重新截图
+框架可能不发送部分动作的事件，此时只能依靠 max_age，
+这里统计未收到事件、复用了点击前截图的次数（不作为失败条件）。
+
+用法:
+    python tools/frame_provider/check_frame_reuse.py
+"""
+
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+AGENT_DIR = SCRIPT_DIR.parent.parent / "agent"
+sys.path.insert(0, str(AGENT_DIR))
+
+from maa.controller import ControllerEventSink, CustomController
+
+from utils.frame_provider import FrameProvider, get_frame_provider
+
+
+# 导入 maa.agent 会把框架切换为 AgentServer 模式（无法创建控制器），
+# 因此这里不导入 custom.hooks，而是使用相同的转发逻辑
+class FrameFreshnessSink(ControllerEventSink):
+    def __init__(self):
+        super().__init__()
+        # 收到过事件的动作 id
+        self.seen_ids = set()
+
+    def on_raw_notification(self, controller, msg: str, details: dict):
+        self.seen_ids.add(details.get("ctrl_id"))
+        get_frame_provider().on_controller_notification(msg, details)
+
+
+class FakeDevice(CustomController):
+    """每次截图返回不同内容的虚拟设备"""
+
+    def __init__(self):
+        super().__init__()
+        self.screencaps = 0
+
+    def connect(self) -> bool:
+        return True
+
+    def request_uuid(self) -> str:
+        return "check-frame-reuse"
+
+    def start_app(self, intent: str) -> bool:
+        return True
+
+    def stop_app(self, intent: str) -> bool:
+        return True
+
+    def screencap(self) -> np.ndarray:
+        self.screencaps += 1
+        return np.full((720, 1280, 3), self.screencaps % 256, dtype=np.uint8)
+
+    def click(self, x: int, y: int) -> bool:
+        return True
+
+    def swipe(self, x1, y1, x2, y2, duration) -> bool:
+        return True
+
+    def touch_down(self, contact, x, y, pressure) -> bool:
+        return True
+
+    def touch_move(self, contact, x, y, pressure) -> bool:
+        return True
+
+    def touch_up(self, contact) -> bool:
+        return True
+
+    def click_key(self, keycode) -> bool:
+        return True
+
+    def input_text(self, text) -> bool:
+        return True
+
+    def key_down(self, keycode) -> bool:
+        return True
+
+    def key_up(self, keycode) -> bool:
+        return True
+
+    def scroll(self, dx, dy) -> bool:
+        return True
+
+
+def check(name: str, ok: bool) -> bool:
+    print(f"[{'OK' if ok else 'FAIL'}] {name}")
+    return ok
+
+
+def main() -> int:
+    device = FakeDevice()
+    sink = FrameFreshnessSink()
+    device.add_sink(sink)
+    device.post_connection().wait()
+
+    context = SimpleNamespace(tasker=SimpleNamespace(controller=device))
+    provider: FrameProvider = get_frame_provider()
+    results = []
+
+    provider.get_frame(context)
+    captured = device.screencaps
+    frame = provider.get_frame(context, max_age=0.5)
+    results.append(
+        check("max_age 内复用截图", device.screencaps == captured and frame.size > 0)
+    )
+
+    # pipeline 为节点识别截图（不经过 FrameProvider，通过事件得知）
+    device.post_screencap().wait()
+    time.sleep(0.05)
+    captured = device.screencaps
+    provider.get_frame(context, max_age=0.5)
+    # 框架偶尔不发送事件，此时重新截图（不复用）也是正确的
+    print(f"pipeline 截图后{'复用' if device.screencaps == captured else '重新截图'}")
+
+    # 点击后立即取帧（含连续点击）：收到事件时必须重新截图，
+    # 未收到事件时复用点击前的截图，最长 max_age
+    missed = stale = 0
+    for i in range(20):
+        job = device.post_click(10, 10).wait()
+        if i % 2:
+            time.sleep(0.05)
+        before = device.screencaps
+        provider.get_frame(context, max_age=0.5)
+        reused = device.screencaps == before
+        if job.job_id in sink.seen_ids:
+            stale += reused
+        else:
+            missed += 1
+    results.append(check("收到点击事件后重新截图", stale == 0))
+    print(f"点击 20 次，未收到事件 {missed} 次")
+
+    time.sleep(0.3)
+    before = device.screencaps
+    provider.get_frame(context, max_age=0.2)
+    results.append(check("超过 max_age 后重新截图", device.screencaps == before + 1))
+
+    print(f"截图 {provider.captured} 次，复用 {provider.reused} 次")
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""
+manifest 检查基准测试
+
+启动本地模拟服务器（带注入延迟），对 agent/utils/manifest_checker 执行：
+    1. 冷启动全量遍历（串行 vs 并发）
+    2. 缓存命中（根 manifest 无变化）
+    3. 单个叶子目录变化后的增量检查（未变化的子树走 304 或不请求）
+
+用法:
+    python tools/hot_update/bench_manifest.py --latency 0.05
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+AGENT_DIR = SCRIPT_DIR.parent.parent / "agent"
+sys.path.insert(0, str(SCRIPT_DIR))
+sys.path.insert(0, str(AGENT_DIR))
+
+from mock_server import ManifestTree, MockHotUpdateServer
+
+
+def run_check(manifest_checker, server, label: str, save: bool = True) -> dict:
+    server.reset_stats()
+    begin = time.perf_counter()
+    result = manifest_checker.check_manifest_updates()
+    cost = time.perf_counter() - begin
+    if save:
+        manifest_checker.save_manifest_cache_from_result(result)
+    stats = server.stats
+    print(
+        f"{label:<28} {cost * 1000:8.1f} ms  requests={stats.get('requests', 0):<4}"
+        f" 200={stats.get('manifest', 0):<4} 304={stats.get('not_modified', 0):<4}"
+        f" updated={len(result['updated_manifests'])}"
+    )
+    assert result["success"], result["error"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="manifest 检查基准测试")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="每个请求的延迟（秒）"
+    )
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=4)
+    args = parser.parse_args()
+
+    tree = ManifestTree(depth=args.depth, fanout=args.fanout)
+    server = MockHotUpdateServer(tree, latency=args.latency).start()
+
+    # 在临时目录中运行，避免写入项目的 config/debug
+    work_dir = tempfile.mkdtemp(prefix="m9a_bench_")
+    os.chdir(work_dir)
+
+    from utils import manifest_checker
+
+    manifest_checker.API_BASE_URL = server.api_base_url
+    manifest_checker.MANIFEST_URL = f"{server.api_base_url}/manifest.json"
+    cache_file = Path(work_dir) / "config" / "manifest_cache.json"
+    manifest_checker.CACHE_FILE = cache_file
+
+    leaves = sorted(tree.leaf_manifests())
+    print(
+        f"manifests={len(tree.dirs)} leaves={len(leaves)} "
+        f"latency={args.latency * 1000:.0f}ms"
+    )
+
+    try:
+        workers = manifest_checker.MAX_WORKERS
+        manifest_checker.MAX_WORKERS = 1
+        result = run_check(manifest_checker, server, "cold (serial)", save=False)
+        manifest_checker.MAX_WORKERS = workers
+        result = run_check(manifest_checker, server, f"cold ({workers} workers)")
+        assert sorted(result["updated_manifests"]) == leaves
+
+        result = run_check(manifest_checker, server, "warm (unchanged)")
+        assert not result["has_any_update"]
+
+        target = leaves[len(leaves) // 2]
+        tree.touch(target)
+        result = run_check(manifest_checker, server, "one leaf changed")
+        assert result["updated_manifests"] == [target], result["updated_manifests"]
+
+        result = run_check(manifest_checker, server, "warm again")
+        assert not result["has_any_update"]
+
+        # 根 manifest 变化但子树未变化时，子 manifest 应返回 304
+        cache_file.write_text(
+            cache_file.read_text(encoding="utf-8").replace(
+                f'"root_updated": {tree.dirs["manifest.json"]["updated"]}',
+                '"root_updated": 1',
+            ),
+            encoding="utf-8",
+        )
+        result = run_check(manifest_checker, server, "stale root cache")
+        assert not result["has_any_update"]
+        print("OK")
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+资源下载吞吐基准测试
+
+启动本地模拟服务器（带注入延迟），在空目录中执行
+agent/utils/resource_updater.check_and_update_resources，对比：
+    1. 逐个下载，无压缩
+    2. 逐个下载，gzip/zstd 压缩
+    3. 批量 tar 流下载，压缩
+    4. 服务器不支持批量接口时的回退
+
+用法:
+    python tools/hot_update/bench_update.py --latency 0.05 --files 10
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+AGENT_DIR = SCRIPT_DIR.parent.parent / "agent"
+sys.path.insert(0, str(SCRIPT_DIR))
+sys.path.insert(0, str(AGENT_DIR))
+
+from mock_server import ManifestTree, MockHotUpdateServer
+
+
+def run_update(
+    tree: ManifestTree, label: str, latency: float, bulk: bool, compress: bool
+):
+    from utils import hash_index, resource_updater
+
+    server = MockHotUpdateServer(
+        tree, latency=latency, bulk=bulk, compress=compress
+    ).start()
+    # 每次在新的空目录中运行，保证所有文件都需要下载
+    os.chdir(tempfile.mkdtemp(prefix="m9a_bench_"))
+    hash_index._index = None
+    resource_updater._bulk_unsupported.clear()
+
+    try:
+        begin = time.perf_counter()
+        result = resource_updater.check_and_update_resources(
+            server.api_base_url, sorted(tree.leaf_manifests())
+        )
+        cost = time.perf_counter() - begin
+    finally:
+        server.stop()
+
+    stats = server.stats
+    total_bytes = result["stats"]["total_bytes"]
+    print(
+        f"{label:<26} {cost * 1000:8.1f} ms  requests={stats.get('requests', 0):<4}"
+        f" sent={stats.get('bytes_sent', 0):<9} payload={total_bytes:<9}"
+        f" {total_bytes / cost / 1024 / 1024:6.2f} MiB/s"
+        f" bulk_files={result['stats'].get('bulk_files', 0)}"
+    )
+    assert result["success"], result["error"]
+    assert len(result["updated_files"]) == len(tree.files) - tree.files_per_dir
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="资源下载吞吐基准测试")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="每个请求的延迟（秒）"
+    )
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--files", type=int, default=10, help="每个叶子目录的文件数")
+    args = parser.parse_args()
+
+    tree = ManifestTree(depth=args.depth, fanout=args.fanout, files_per_dir=args.files)
+    print(
+        f"files={len(tree.files) - args.files} "
+        f"leaves={len(tree.leaf_manifests())} latency={args.latency * 1000:.0f}ms"
+    )
+
+    run_update(tree, "per-file, identity", args.latency, bulk=False, compress=False)
+    run_update(tree, "per-file, compressed", args.latency, bulk=False, compress=True)
+    run_update(tree, "bulk tar, compressed", args.latency, bulk=True, compress=True)
+    run_update(tree, "bulk tar, identity", args.latency, bulk=True, compress=False)
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
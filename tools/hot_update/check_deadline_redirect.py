@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+"""
+启动期限后的热更新重定向检查
+
+启动本地模拟服务器（带注入延迟，逐个下载），在下载进行中将 UpdateTarget 切换到暂存目录，
+检查：
+    1. 切换之后项目目录中不再有文件被替换
+    2. 切换前后完成的文件数之和等于需要下载的文件数
+    3. 暂存的文件经 hot_update.apply_staged_update 应用后项目目录完整
+
+用法:
+    python tools/hot_update/check_deadline_redirect.py --latency 0.05 --files 10
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+AGENT_DIR = SCRIPT_DIR.parent.parent / "agent"
+sys.path.insert(0, str(SCRIPT_DIR))
+sys.path.insert(0, str(AGENT_DIR))
+
+from mock_server import ManifestTree, MockHotUpdateServer
+
+
+def snapshot(root: Path, exclude: Path) -> dict:
+    """项目目录下各文件的 mtime（排除 exclude 目录与下载中的临时文件）"""
+    files = {}
+    for path in root.rglob("*"):
+        if path.name.endswith(".tmp"):
+            continue
+        if path.is_file() and exclude not in path.parents:
+            files[path.relative_to(root).as_posix()] = path.stat().st_mtime_ns
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动期限后的热更新重定向检查")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="每个请求的延迟（秒）"
+    )
+    parser.add_argument("--files", type=int, default=10, help="每个叶子目录的文件数")
+    parser.add_argument(
+        "--redirect-after", type=float, default=0.5, help="切换时间（秒）"
+    )
+    args = parser.parse_args()
+
+    from utils import hash_index, hot_update, resource_updater
+
+    tree = ManifestTree(depth=2, fanout=4, files_per_dir=args.files)
+    server = MockHotUpdateServer(tree, latency=args.latency, bulk=False).start()
+    project_root = Path(tempfile.mkdtemp(prefix="m9a_redirect_"))
+    os.chdir(project_root)
+    hash_index._index = None
+    staging_dir = hot_update.STAGING_DIR.resolve()
+
+    target = resource_updater.UpdateTarget(project_root)
+    live_at_redirect = {}
+
+    def redirect():
+        time.sleep(args.redirect_after)
+        target.redirect(staging_dir)
+        live_at_redirect.update(snapshot(project_root, project_root / "config"))
+
+    redirect_thread = threading.Thread(target=redirect)
+    redirect_thread.start()
+    try:
+        result = resource_updater.check_and_update_resources(
+            server.api_base_url, sorted(tree.leaf_manifests()), target=target
+        )
+    finally:
+        redirect_thread.join()
+        server.stop()
+
+    live_after = snapshot(project_root, project_root / "config")
+    staged = result["staged_files"]
+    live_files = set(result["updated_files"]) - set(staged)
+    expected = len(tree.files) - tree.files_per_dir
+    print(
+        f"需要下载 {expected} 个，切换前替换 {len(live_files)} 个，暂存 {len(staged)} 个"
+    )
+
+    assert result["success"], result["error"]
+    assert live_after == live_at_redirect, "切换后项目目录中仍有文件被替换"
+    assert set(live_at_redirect) == live_files
+    assert len(live_files) + len(staged) == expected
+    assert staged, "切换过早或过晚，未产生暂存文件，请调整 --redirect-after"
+
+    hot_update.stage_files(staged, {"success": True})
+    applied = hot_update.apply_staged_update()
+    assert sorted(applied["applied_files"]) == sorted(staged), applied
+    assert set(snapshot(project_root, project_root / "config")) == (
+        live_files | set(staged)
+    )
+    print("检查通过")
+
+
+if __name__ == "__main__":
+    main()
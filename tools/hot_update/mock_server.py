@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+
+"""
+热更新本地模拟服务器
+
+生成一棵合成的 manifest 树并通过 HTTP 提供服务，可注入固定延迟，
+用于离线测试/基准测试 agent/utils 下的 manifest 检查与资源热更新。
+
+接口与线上 API 保持一致：
+    GET /api/manifest.json
+    GET /api/<dir>/manifest.json
+    GET /api/<file path>
+    POST /api/bulk  {"paths": [...]}  -> tar 流
+
+支持 ETag / Last-Modified 条件请求（返回 304），
+以及按 Accept-Encoding 协商 gzip / zstd（需安装 zstandard）压缩。
+
+用法:
+    python tools/hot_update/mock_server.py --port 8765 --latency 0.05
+    python tools/hot_update/mock_server.py --no-bulk --no-compress
+"""
+
+import io
+import sys
+import gzip
+import json
+import time
+import random
+import tarfile
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class ManifestTree:
+    """
+    合成 manifest 树
+
+    结构: manifest.json -> resource/<d>/... （depth 层，每层 fanout 个子目录），
+    叶子目录包含 files_per_dir 个文件。另附一个应被忽略的 images 目录。
+    """
+
+    def __init__(self, depth=3, fanout=4, files_per_dir=5, file_size=2048, seed=0):
+        self.depth = depth
+        self.fanout = fanout
+        self.files_per_dir = files_per_dir
+        self.file_size = file_size
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.clock = 1700000000
+
+        self.files = {}  # path -> bytes
+        self.dirs = {}  # manifest path -> {"updated", "directories", "files", "parent"}
+
+        self._build("resource", depth, None)
+        self._build("images", 0, None)
+        self.dirs["manifest.json"] = {
+            "updated": self.clock,
+            "directories": [
+                {"name": "resource", "manifest": "resource/manifest.json"},
+                {"name": "images", "manifest": "images/manifest.json"},
+            ],
+            "files": [],
+            "parent": None,
+        }
+        self.dirs["resource/manifest.json"]["parent"] = "manifest.json"
+        self.dirs["images/manifest.json"]["parent"] = "manifest.json"
+
+    def _make_file(self, path: str) -> bytes:
+        payload = {
+            "path": path,
+            "nonce": self.rng.random(),
+            "data": "".join(
+                self.rng.choice("abcdefghij") for _ in range(self.file_size)
+            ),
+        }
+        return json.dumps(payload).encode("utf-8")
+
+    def _build(self, dir_path: str, depth: int, parent: str):
+        manifest_path = f"{dir_path}/manifest.json"
+        node = {
+            "updated": self.clock,
+            "directories": [],
+            "files": [],
+            "parent": parent,
+        }
+        if depth == 0:
+            for i in range(self.files_per_dir):
+                path = f"{dir_path}/file_{i}.json"
+                self.files[path] = self._make_file(path)
+                node["files"].append(path)
+        else:
+            for i in range(self.fanout):
+                sub_dir = f"{dir_path}/d{i}"
+                node["directories"].append(
+                    {"name": f"d{i}", "manifest": f"{sub_dir}/manifest.json"}
+                )
+                self._build(sub_dir, depth - 1, manifest_path)
+        self.dirs[manifest_path] = node
+
+    def leaf_manifests(self):
+        return [
+            path
+            for path, node in self.dirs.items()
+            if node["files"] and not path.startswith("images/")
+        ]
+
+    def touch(self, manifest_path: str):
+        """修改某个叶子目录下的所有文件，并沿父链更新 updated 时间戳"""
+        with self.lock:
+            self.clock += 1
+            node = self.dirs[manifest_path]
+            for path in node["files"]:
+                self.files[path] = self._make_file(path)
+            while manifest_path:
+                self.dirs[manifest_path]["updated"] = self.clock
+                manifest_path = self.dirs[manifest_path]["parent"]
+
+    def render_manifest(self, manifest_path: str) -> bytes:
+        with self.lock:
+            node = self.dirs[manifest_path]
+            data = {"updated": node["updated"], "directories": node["directories"]}
+            if node["files"]:
+                data["files"] = [
+                    {
+                        "name": path.rsplit("/", 1)[-1],
+                        "path": path,
+                        "hash": hashlib.sha256(self.files[path]).hexdigest(),
+                        "size": len(self.files[path]),
+                    }
+                    for path in node["files"]
+                ]
+            return json.dumps(data).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "MockHotUpdate/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _count(self, key: str, value: int = 1):
+        with self.server.stats_lock:
+            self.server.stats[key] = self.server.stats.get(key, 0) + value
+
+    def _encode(self, body: bytes, headers: dict) -> bytes:
+        """按 Accept-Encoding 协商压缩"""
+        if not self.server.compress:
+            return body
+        accepted = {
+            item.split(";")[0].strip()
+            for item in self.headers.get("Accept-Encoding", "").split(",")
+        }
+        if "zstd" in accepted and zstandard is not None:
+            headers["Content-Encoding"] = "zstd"
+            return zstandard.ZstdCompressor().compress(body)
+        if "gzip" in accepted:
+            headers["Content-Encoding"] = "gzip"
+            return gzip.compress(body, compresslevel=6)
+        return body
+
+    def _send(self, status: int, body: bytes = b"", headers: dict = None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+            self._count("bytes_sent", len(body))
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        self._count("requests")
+
+        path = urlparse(self.path).path
+        if not path.startswith("/api/"):
+            self._send(404)
+            return
+        rel = path[len("/api/") :]
+        tree = self.server.tree
+
+        if rel in tree.dirs:
+            body = tree.render_manifest(rel)
+            etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+            last_modified = formatdate(json.loads(body)["updated"], usegmt=True)
+            if self.headers.get("If-None-Match") == etag:
+                self._count("not_modified")
+                self._send(304, headers={"ETag": etag})
+                return
+            self._count("manifest")
+            headers = {
+                "Content-Type": "application/json",
+                "ETag": etag,
+                "Last-Modified": last_modified,
+            }
+            self._send(200, self._encode(body, headers), headers)
+            return
+
+        with tree.lock:
+            data = tree.files.get(rel)
+        if data is None:
+            self._send(404)
+            return
+        self._count("file")
+        headers = {"Content-Type": "application/octet-stream"}
+        self._send(200, self._encode(data, headers), headers)
+
+    def do_POST(self):
+        time.sleep(self.server.latency)
+        self._count("requests")
+
+        length = int(self.headers.get("Content-Length", 0))
+        request_body = self.rfile.read(length)
+        if urlparse(self.path).path != "/api/bulk" or not self.server.bulk:
+            self._send(404)
+            return
+
+        try:
+            paths = json.loads(request_body)["paths"]
+        except (ValueError, KeyError, TypeError):
+            self._send(400)
+            return
+
+        tree = self.server.tree
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            for path in paths:
+                with tree.lock:
+                    data = tree.files.get(path)
+                if data is None:
+                    continue
+                info = tarfile.TarInfo(path)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+                self._count("bulk_files")
+
+        self._count("bulk")
+        headers = {"Content-Type": "application/x-tar"}
+        self._send(200, self._encode(buffer.getvalue(), headers), headers)
+
+
+class MockHotUpdateServer:
+    """在后台线程中运行的模拟服务器"""
+
+    def __init__(
+        self,
+        tree: ManifestTree,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        bulk=True,
+        compress=True,
+    ):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.tree = tree
+        self.httpd.latency = latency
+        self.httpd.bulk = bulk
+        self.httpd.compress = compress
+        self.httpd.verbose = False
+        self.httpd.stats = {}
+        self.httpd.stats_lock = threading.Lock()
+        self.tree = tree
+        self._thread = None
+
+    @property
+    def api_base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    @property
+    def stats(self) -> dict:
+        with self.httpd.stats_lock:
+            return dict(self.httpd.stats)
+
+    def reset_stats(self):
+        with self.httpd.stats_lock:
+            self.httpd.stats.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="热更新本地模拟服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="每个请求的延迟（秒）"
+    )
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--files", type=int, default=5, help="每个叶子目录的文件数")
+    parser.add_argument(
+        "--no-bulk", action="store_true", help="禁用批量接口（返回 404）"
+    )
+    parser.add_argument("--no-compress", action="store_true", help="禁用压缩")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    tree = ManifestTree(depth=args.depth, fanout=args.fanout, files_per_dir=args.files)
+    server = MockHotUpdateServer(
+        tree,
+        args.host,
+        args.port,
+        args.latency,
+        bulk=not args.no_bulk,
+        compress=not args.no_compress,
+    )
+    server.httpd.verbose = args.verbose
+    print(f"Serving {len(tree.dirs)} manifests / {len(tree.files)} files")
+    print(f"API base: {server.api_base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""
+弹窗中断分发检查
+
+加载 assets/resource/base，用 maa CustomController（不需要设备）创建真实的 Tasker，
+在自定义动作中以 SOS 的中断列表调用 InterruptDispatcher.find，确认：
+    1. 能在当前 MaaFW 版本上运行（不抛出异常）
+    2. 没有弹窗时返回 None，有弹窗时返回命中的节点
+    3. 同一帧上有多个弹窗时按列表顺序返回靠前的节点
+    4. 同一帧上再次检查时结果全部来自 recognition_memo，不再识别
+
+默认截图由中断节点的模板贴到各自 roi 上合成（仓库中没有保存的弹窗截图，
+也没有 OCR 模型，OCR 类中断节点只检查不会误命中）。
+有实际截图时可指定目录，目录中 expected.json 格式:
+    {
+        "xxx.png": "SOSWarning",
+        "yyy.png": null
+    }
+截图为 agent 保存的 BGR PNG。
+
+用法:
+    python tools/interrupt_dispatcher/check_dispatch.py [截图目录]
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT_DIR = SCRIPT_DIR.parent.parent
+RESOURCE_DIR = ROOT_DIR / "assets" / "resource" / "base"
+sys.path.insert(0, str(ROOT_DIR / "agent"))
+sys.path.insert(0, str(ROOT_DIR / "tools" / "frame_provider"))
+
+from maa.context import Context
+from maa.custom_action import CustomAction
+from maa.resource import Resource
+from maa.tasker import Tasker
+
+# 导入 maa.agent 会把框架切换为 AgentServer 模式（无法创建控制器），
+# 因此这里不导入 custom，只使用 utils
+from check_frame_reuse import FakeDevice
+from utils import recognition_memo
+from utils.interrupt_dispatcher import get_interrupt_dispatcher
+
+# 与 SOSSelectNode 中的中断列表一致
+INTERRUPTS = [
+    "SOSWarning",
+    "SOSStatsUpButton",
+    "SOSStatsUp",
+    "SOSArtefactsObtained",
+    "SOSSelectArtefact",
+    "SOSLoseArtefact",
+    "SOSStrengthenArtefact",
+    "SOSHarmonicObtained",
+    "SOSSelectHarmonic",
+    "SOSResonatorObtained",
+    "SOSSelectResonator",
+    "CloseTip",
+]
+ENTRY = "CheckInterruptDispatch"
+
+
+class CheckDispatch(CustomAction):
+    """对每张截图调用两次 find，记录结果与第二次的识别缓存命中情况"""
+
+    def __init__(self, images: dict):
+        super().__init__()
+        self.images = images
+        self.results = {}
+
+    def run(
+        self, context: Context, argv: CustomAction.RunArg
+    ) -> CustomAction.RunResult:
+        dispatcher = get_interrupt_dispatcher()
+        memo = recognition_memo.get_recognition_memo()
+        task_id = context.get_task_job().job_id
+        for name, image in self.images.items():
+            try:
+                found = dispatcher.find(context, INTERRUPTS, image)
+                memo.pop_stats(task_id)
+                again = dispatcher.find(context, INTERRUPTS, image)
+                stats = memo.pop_stats(task_id)
+            except Exception as e:
+                self.results[name] = e
+                continue
+            self.results[name] = (
+                found[0] if found else None,
+                again[0] if again else None,
+                stats,
+            )
+        return CustomAction.RunResult(success=True)
+
+
+def paste_template(image: np.ndarray, resource: Resource, node: str):
+    """把节点的第一个模板贴到其 roi 左上角"""
+    param = resource.get_node_data(node)["recognition"]["param"]
+    template = Image.open(RESOURCE_DIR / "image" / param["template"][0])
+    template = np.asarray(template.convert("RGB"))[:, :, ::-1]
+    x, y = param["roi"][:2]
+    h, w = template.shape[:2]
+    image[y : y + h, x : x + w] = template
+
+
+def synthetic_images(resource: Resource):
+    """(名称, 截图, 期望命中的节点)"""
+    blank = np.full((720, 1280, 3), 40, dtype=np.uint8)
+    yield "blank", blank, None
+
+    close_tip = blank.copy()
+    paste_template(close_tip, resource, "CloseTip")
+    yield "close_tip", close_tip, "CloseTip"
+
+    # SOSWarning 在列表中位于 CloseTip 之前
+    both = close_tip.copy()
+    paste_template(both, resource, "SOSWarning")
+    yield "warning_and_close_tip", both, "SOSWarning"
+
+
+def file_images(directory: Path):
+    with open(directory / "expected.json", encoding="utf-8") as f:
+        expected = json.load(f)
+    for filename, node in expected.items():
+        image = np.asarray(Image.open(directory / filename).convert("RGB"))
+        yield filename, image, node
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="弹窗中断分发检查")
+    parser.add_argument(
+        "directory", nargs="?", help="实际截图目录（包含 expected.json）"
+    )
+    args = parser.parse_args()
+
+    resource = Resource()
+    if not resource.post_bundle(RESOURCE_DIR).wait().succeeded:
+        print(f"资源加载失败: {RESOURCE_DIR}")
+        return 1
+
+    cases = list(
+        file_images(Path(args.directory))
+        if args.directory
+        else synthetic_images(resource)
+    )
+    action = CheckDispatch({name: image for name, image, _ in cases})
+    resource.register_custom_action(ENTRY, action)
+
+    device = FakeDevice()
+    device.post_connection().wait()
+    tasker = Tasker()
+    tasker.bind(resource, device)
+    tasker.post_task(
+        ENTRY,
+        {ENTRY: {"action": {"type": "Custom", "param": {"custom_action": ENTRY}}}},
+    ).wait()
+
+    failures = 0
+    for name, _, expected in cases:
+        result = action.results.get(name)
+        if isinstance(result, Exception) or result is None:
+            ok, detail = False, repr(result)
+        else:
+            found, again, stats = result
+            recognized = sum(misses for _, misses in stats.values())
+            ok = found == expected and again == found and recognized == 0
+            detail = f"found={found} again={again} 再次检查时识别 {recognized} 次"
+        failures += not ok
+        print(f"[{'OK' if ok else 'FAIL'}] {name}: expected={expected} {detail}")
+
+    print(f"total: {len(cases)} images, {failures} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())